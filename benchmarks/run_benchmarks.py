@@ -0,0 +1,394 @@
+"""
+核心玩法热点路径的基准测试
+
+用法：
+    python -m benchmarks.run_benchmarks [--width W] [--height H] [--events N] [--only 名称] [--save-baseline]
+
+所有数据由benchmarks.synthetic按随机数种子生成，地图大小、存档和重放的事件数可以配置。
+每项测试用timeit自动确定每轮的执行次数，重复若干轮，报告每次操作耗时的中位数和最小值；
+--save-baseline把结果保存为基准文件，之后的运行与参数相同的基准比较，
+中位数变慢超过--threshold时视为性能退化，返回码为1；准备失败的测试不会被跳过，返回码同样为1
+
+仓库中的benchmarks/baseline.json是在参考环境上以默认参数生成的，生成时的环境（主机、CPU、
+Python和pygame版本等）记录在文件中；本次运行的环境与基准不同时只打印比较结果，不判定性能退化
+（--ignore-environment可以强制判定）。在其他机器上请先在改动前用--save-baseline生成自己的基准，
+或者用--baseline指定基准文件的位置
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from data.config import GameConfig
+
+BASELINE_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 影响测试数据的参数，与基准文件中的不一致时不做比较
+CONFIG_KEYS = ['width', 'height', 'events', 'pieces', 'full_rows', 'seed']
+
+# 测试准备函数的返回值：(执行一轮的函数, 每轮包含的操作次数)
+BenchmarkRun = Tuple[Callable[[], Any], int]
+
+
+class BenchmarkContext:
+    """基准测试的共享数据，游玩得到的对局只生成一次，供存档和重放测试共用"""
+
+    def __init__(self, args: argparse.Namespace, temp_dir: str):
+        """
+        初始化BenchmarkContext对象
+
+        Args:
+            args: 命令行参数
+            temp_dir: 存放临时文件的目录
+        """
+        self.args = args
+        self.temp_dir = temp_dir
+        self._engine = None
+
+    @property
+    def engine(self):
+        """机器人游玩得到的对局（GameEngine）"""
+        if self._engine is None:
+            from benchmarks.synthetic import play_game
+            args = self.args
+            self._engine = play_game(args.width, args.height, args.events, args.seed)
+        return self._engine
+
+
+def bench_check_and_clear_lines(context: BenchmarkContext) -> BenchmarkRun:
+    """每次从快照恢复有full_rows个满行的地图后消行，耗时包括Map.set_cells"""
+    from benchmarks.synthetic import create_board
+    args = context.args
+    board = create_board(args.width, args.height, full_rows=args.full_rows, seed=args.seed)
+    cells = board.get_cells()
+
+    def run():
+        board.set_cells(cells)
+        board.check_and_clear_lines()
+    return run, 1
+
+
+def _create_collision_engine(context: BenchmarkContext):
+    """在随机地图上准备GameEngine和一组不重叠的方块，按回放处理，不记录事件"""
+    from benchmarks.synthetic import create_board, create_pieces
+    from scene.game.game_engine import GameEngine
+    args = context.args
+    engine = GameEngine(args.width, args.height)
+    engine.map = create_board(args.width, args.height, seed=args.seed)
+    engine.is_replay = True
+    return engine, create_pieces(engine.map, args.pieces, args.seed)
+
+
+def bench_try_move_piece(context: BenchmarkContext) -> BenchmarkRun:
+    """每个方块依次尝试左移、右移、下移（GameScene._try_move_piece的碰撞检测），成功时移回原位"""
+    engine, pieces = _create_collision_engine(context)
+    moves = [(-1, 0), (1, 0), (0, 1)]
+
+    def run():
+        for piece in pieces:
+            engine.current_piece = piece
+            for dx, dy in moves:
+                if engine.try_move_piece(dx, dy):
+                    piece.move(-dx, -dy)
+    return run, len(pieces) * len(moves)
+
+
+def bench_try_rotate_piece(context: BenchmarkContext) -> BenchmarkRun:
+    """每个方块尝试旋转（GameScene._try_rotate_piece的碰撞检测），成功时转回原来的方向"""
+    engine, pieces = _create_collision_engine(context)
+
+    def run():
+        for piece in pieces:
+            engine.current_piece = piece
+            if engine.try_rotate_piece():
+                piece.rotate_counterclockwise()
+    return run, len(pieces)
+
+
+def bench_ghost_piece(context: BenchmarkContext) -> BenchmarkRun:
+    """计算每个方块的硬降落距离（落点缓存失效时LandingCache的计算）"""
+    from benchmarks.synthetic import create_board, create_pieces
+    args = context.args
+    board = create_board(args.width, args.height, seed=args.seed)
+    pieces = create_pieces(board, args.pieces, args.seed)
+
+    def run():
+        for piece in pieces:
+            piece.get_drop_distance(board)
+    return run, len(pieces)
+
+
+def bench_create_map_texture(context: BenchmarkContext) -> BenchmarkRun:
+    """
+    使用dummy视频驱动，每次把整个地图标记为脏后重绘地图纹理
+
+    没有resources包时用生成的纯色图片构建方块图集，绘制的开销与真实图片相同
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import importlib.util
+    import pygame
+    from benchmarks.synthetic import create_board, create_tile_image
+    from tools.tile_atlas import TileAtlas
+    args = context.args
+    pygame.init()
+    pygame.display.set_mode((args.width * GameConfig.TILE_SIZE, args.height * GameConfig.TILE_SIZE))
+    if importlib.util.find_spec("resources") is None:
+        print("没有找到resources包，地图纹理测试使用生成的方块图片")
+        TileAtlas().build(image_loader=create_tile_image)
+    else:
+        TileAtlas().build()
+    board = create_board(args.width, args.height, seed=args.seed)
+
+    def run():
+        board.mark_all_dirty()
+        board.create_map_texture()
+    return run, 1
+
+
+def bench_game_data_to_json(context: BenchmarkContext) -> BenchmarkRun:
+    """将约events个事件的存档序列化为JSON"""
+    from scene.game.game_data import GameData
+    game_data = GameData.from_game_engine(context.engine)
+    return game_data.to_json, 1
+
+
+def bench_game_data_from_json(context: BenchmarkContext) -> BenchmarkRun:
+    """从JSON加载约events个事件的存档"""
+    from scene.game.game_data import GameData
+    json_str = GameData.from_game_engine(context.engine).to_json()
+    return lambda: GameData.from_json(json_str), 1
+
+
+def _write_replay(context: BenchmarkContext, binary: bool) -> str:
+    """将对局保存为二进制或JSON格式的重放文件，返回文件路径"""
+    from scene.game.game_replay_data import GameReplayData
+    replay_data = GameReplayData.from_game_engine(context.engine)
+    if binary:
+        file_path = os.path.join(context.temp_dir, "replay.replay")
+        with open(file_path, 'wb') as f:
+            f.write(replay_data.to_bytes())
+    else:
+        file_path = os.path.join(context.temp_dir, "replay.json")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(replay_data.to_json())
+    return file_path
+
+
+def bench_load_replay_binary(context: BenchmarkContext) -> BenchmarkRun:
+    """加载约events个事件的二进制重放文件"""
+    from scene.game.game_replay_data import GameReplayData
+    file_path = _write_replay(context, binary=True)
+    return lambda: GameReplayData.load_from_file(file_path), 1
+
+
+def bench_load_replay_json(context: BenchmarkContext) -> BenchmarkRun:
+    """加载约events个事件的JSON重放文件"""
+    from scene.game.game_replay_data import GameReplayData
+    file_path = _write_replay(context, binary=False)
+    return lambda: GameReplayData.load_from_file(file_path), 1
+
+
+def bench_create_random_piece(context: BenchmarkContext) -> BenchmarkRun:
+    """连续生成pieces个随机方块"""
+    from core.piece_factory import PieceFactory
+    args = context.args
+    factory = PieceFactory()
+    factory.set_seed(args.seed)
+    x, y = args.width // 2, 0
+
+    def run():
+        for _ in range(args.pieces):
+            factory.create_random_piece(x, y)
+    return run, args.pieces
+
+
+# 名称 -> 准备函数，按报告顺序排列
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], BenchmarkRun]] = {
+    'map.check_and_clear_lines': bench_check_and_clear_lines,
+    'engine.try_move_piece': bench_try_move_piece,
+    'engine.try_rotate_piece': bench_try_rotate_piece,
+    'piece.get_drop_distance': bench_ghost_piece,
+    'map.create_map_texture': bench_create_map_texture,
+    'game_data.to_json': bench_game_data_to_json,
+    'game_data.from_json': bench_game_data_from_json,
+    'replay.load_from_file.binary': bench_load_replay_binary,
+    'replay.load_from_file.json': bench_load_replay_json,
+    'piece_factory.create_random_piece': bench_create_random_piece,
+}
+
+
+def measure(run: Callable[[], Any], ops: int, repeat: int) -> Dict[str, float]:
+    """
+    测量每次操作的耗时
+
+    Args:
+        run: 执行一轮的函数
+        ops: 每轮包含的操作次数
+        repeat: 重复轮数
+
+    Returns:
+        median_us、min_us（每次操作的微秒数）和ops_per_second
+    """
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    times = [seconds / (number * ops) * 1e6 for seconds in timer.repeat(repeat, number)]
+    median = statistics.median(times)
+    return {
+        'median_us': median,
+        'min_us': min(times),
+        'ops_per_second': 1e6 / median if median > 0 else 0.0
+    }
+
+
+def run_benchmarks(args: argparse.Namespace) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    """
+    运行名称包含--only中任意一项的测试
+
+    Returns:
+        (测试名称 -> 测量结果, 准备失败的测试名称)
+    """
+    results = {}
+    failures = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        context = BenchmarkContext(args, temp_dir)
+        for name, setup in BENCHMARKS.items():
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            try:
+                run, ops = setup(context)
+            except Exception as e:
+                print(f"{name:<36} 失败：{e}")
+                failures.append(name)
+                continue
+            results[name] = measure(run, ops, args.repeat)
+            print(format_result(name, results[name]))
+    return results, failures
+
+
+def format_result(name: str, result: Dict[str, float], baseline: Optional[Dict[str, float]] = None) -> str:
+    """格式化单项测量结果，有基准时附上中位数的变化"""
+    line = (f"{name:<36} 中位数 {result['median_us']:10.3f} us  最小 {result['min_us']:10.3f} us  "
+            f"{result['ops_per_second']:12.0f} 次/秒")
+    if baseline:
+        change = result['median_us'] / baseline['median_us'] - 1 if baseline['median_us'] > 0 else 0.0
+        line += f"  基准 {baseline['median_us']:10.3f} us  {change:+.1%}"
+    return line
+
+
+def load_baseline(file_path: str) -> Optional[Dict[str, Any]]:
+    """读取基准文件，不存在或格式错误时返回None"""
+    if not os.path.exists(file_path):
+        return None
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"读取基准文件失败: {e}")
+        return None
+
+
+def get_environment() -> Dict[str, Any]:
+    """获取影响测量结果的运行环境，与基准一起保存"""
+    from importlib import metadata
+    try:
+        # 只读取安装的版本号，不导入pygame
+        pygame_version = metadata.version('pygame')
+    except metadata.PackageNotFoundError:
+        pygame_version = None
+    return {
+        'host': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'platform': platform.platform(),
+        'python': f"{platform.python_implementation()} {platform.python_version()}",
+        'pygame': pygame_version
+    }
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+                          config: Dict[str, Any], threshold: float, environment: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    与基准比较，打印每项的变化
+
+    Args:
+        environment: 本次运行的环境，与基准记录的环境不同时不判定性能退化；为None时不检查环境
+
+    Returns:
+        中位数变慢超过threshold的测试名称
+    """
+    if baseline.get('config') != config:
+        print(f"基准的测试参数 {baseline.get('config')} 与本次 {config} 不同，不做比较")
+        return []
+    same_environment = environment is None or baseline.get('environment') == environment
+    if not same_environment:
+        base_environment = baseline.get('environment') or {}
+        differences = [f"{key}: {base_environment.get(key)} -> {value}"
+                       for key, value in environment.items() if base_environment.get(key) != value]
+        print(f"基准是在其他环境中生成的（{'，'.join(differences)}），只打印比较结果，不判定性能退化")
+    regressions = []
+    print("与基准比较：")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        print(format_result(name, result, base))
+        if same_environment and result['median_us'] > base['median_us'] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="核心玩法热点路径的基准测试")
+    parser.add_argument('--width', type=int, default=30, help="地图宽度（包括两侧墙壁）")
+    parser.add_argument('--height', type=int, default=20, help="地图高度（包括底部墙壁）")
+    parser.add_argument('--events', type=int, default=20000, help="合成存档和重放的事件数")
+    parser.add_argument('--pieces', type=int, default=1000, help="碰撞、落点和随机方块测试每轮的方块数")
+    parser.add_argument('--full-rows', type=int, default=4, help="消行测试中满行的数量")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据的随机数种子")
+    parser.add_argument('--repeat', type=int, default=5, help="每项测试重复的轮数")
+    parser.add_argument('--only', nargs='*', default=[], help="只运行名称包含其中任意一项的测试")
+    parser.add_argument('--baseline', default=BASELINE_FILE_PATH, help="基准文件路径")
+    parser.add_argument('--save-baseline', action='store_true', help="将本次结果保存为基准")
+    parser.add_argument('--threshold', type=float, default=0.25, help="中位数变慢超过该比例时视为退化")
+    parser.add_argument('--ignore-environment', action='store_true', help="运行环境与基准不同时也判定性能退化")
+    args = parser.parse_args(argv)
+
+    config = {key: getattr(args, key) for key in CONFIG_KEYS}
+    print(f"测试参数：{config}")
+    results, failures = run_benchmarks(args)
+
+    regressions = []
+    baseline = load_baseline(args.baseline)
+    if baseline is not None:
+        environment = None if args.ignore_environment else get_environment()
+        regressions = compare_with_baseline(results, baseline, config, args.threshold, environment)
+        for name in regressions:
+            print(f"性能退化：{name}")
+
+    if args.save_baseline:
+        # 只运行部分测试时保留同一环境、同样参数的基准中其他测试的结果
+        keep = baseline and baseline.get('config') == config and baseline.get('environment') == get_environment()
+        merged = dict(baseline.get('results', {})) if keep else {}
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'config': config,
+                'environment': get_environment(),
+                'results': merged
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"基准已保存：{args.baseline}")
+
+    for name in failures:
+        print(f"测试失败：{name}")
+    return 1 if regressions or failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+基准测试用的合成数据 - 随机地图、由简单机器人在GameEngine中实际游玩得到的存档和重放
+
+所有数据都由随机数种子决定，同样的参数每次生成同样的数据，基准结果之间才有可比性
+"""
+import random
+from typing import List, Optional, Tuple
+
+from data.map import Map
+from data.piece import Piece, PIECE_SHAPES
+from data.tile import TileType
+from scene.game.game_engine import GameEngine
+
+# 可以出现在地图上的方块类型（不包括空白和墙壁）
+PIECE_TYPES: List[TileType] = [tile_type for tile_type in TileType if tile_type not in (TileType.EMPTY, TileType.WALL)]
+
+# 机器人每个操作之间经过的帧数，接近真实游戏的按键和下落间隔
+SIDE_MOVE_FRAMES = 6
+ROTATE_FRAMES = 12
+DROP_FRAMES = 30
+
+
+def create_board(width: int, height: int, fill_ratio: float = 0.5, full_rows: int = 0, seed: int = 0) -> Map:
+    """
+    创建随机地图
+
+    地图下方fill_ratio比例的行随机填充一半左右的方块，其中随机的full_rows行填满，
+    上方保持空白，接近游戏进行到中途的局面
+
+    Args:
+        width: 地图宽度（包括两侧墙壁）
+        height: 地图高度（包括底部墙壁）
+        fill_ratio: 有方块的行所占比例
+        full_rows: 填满的行数，用于消行测试
+        seed: 随机数种子
+    """
+    rng = random.Random(seed)
+    board = Map(width, height)
+    bottom = height - 2
+    filled_rows = list(range(bottom - int(bottom * fill_ratio) + 1, bottom + 1))
+    full = set(rng.sample(filled_rows, min(full_rows, len(filled_rows))))
+    for y in filled_rows:
+        for x in range(1, width - 1):
+            if y in full or rng.random() < 0.5:
+                board.set_tile(x, y, rng.choice(PIECE_TYPES))
+    return board
+
+
+def create_tile_image(tile_type: TileType, size: int):
+    """
+    生成纯色带边框的方块图片，没有资源文件时代替ResourcesManager构建TileAtlas
+
+    Args:
+        tile_type: 方块类型，决定颜色
+        size: 方块尺寸
+    """
+    import pygame
+    index = list(TileType).index(tile_type)
+    color = (40 + index * 53 % 200, 40 + index * 97 % 200, 40 + index * 31 % 200, 255)
+    image = pygame.Surface((size, size), pygame.SRCALPHA)
+    image.fill(color)
+    pygame.draw.rect(image, (255, 255, 255, 255), image.get_rect(), 1)
+    return image
+
+
+def create_pieces(board: Map, count: int, seed: int = 0) -> List[Piece]:
+    """
+    在地图的空白区域随机放置方块，用于碰撞和落点测试
+
+    Args:
+        board: 地图
+        count: 方块数量
+        seed: 随机数种子
+    """
+    rng = random.Random(seed)
+    pieces = []
+    while len(pieces) < count:
+        tile_type = rng.choice(PIECE_TYPES)
+        piece = Piece(rng.randrange(2, board.width - 2), rng.randrange(2, board.height - 2),
+                      tile_type, rng.randrange(len(PIECE_SHAPES[tile_type])))
+        if not piece.collides(board):
+            pieces.append(piece)
+    return pieces
+
+
+def _choose_placement(engine: GameEngine, rng: random.Random) -> Tuple[int, int]:
+    """
+    选择当前方块的(旋转次数, 目标列)
+
+    优先选择落下后下方留空最少、方块顶部最低的位置，得分相同时随机选择
+    """
+    piece = engine.current_piece
+    column_tops = engine.map.column_tops
+    best: Optional[Tuple[int, float, int, int]] = None
+    for rotations in range(len(PIECE_SHAPES[piece.type])):
+        candidate = Piece(piece.x, piece.y, piece.type, (piece.rotation + rotations) % len(PIECE_SHAPES[piece.type]))
+        shape = candidate.get_shape()
+        for x in range(1, engine.map.width - 1):
+            if candidate.collides_at(engine.map, x, piece.y):
+                continue
+            candidate.x = x
+            landing_y = piece.y + candidate.get_drop_distance(engine.map)
+            # 方块每一列最下方的格子与该列原来最高的方块之间留下的空格
+            holes = sum(max(0, column_tops[x + dx] - (landing_y + dy) - 1) for dx, dy in shape.column_bottoms)
+            key = (landing_y + shape.min_y - 4 * holes, rng.random(), rotations, x)
+            if best is None or key > best:
+                best = key
+    if best is None:
+        return 0, piece.x
+    return best[2], best[3]
+
+
+def _advance(engine: GameEngine, frames: int):
+    """推进若干帧"""
+    for _ in range(frames):
+        engine.tick()
+
+
+def play_game(width: int, height: int, event_count: int, seed: int = 0) -> GameEngine:
+    """
+    由机器人在GameEngine中游玩一局，直到记录的事件数达到event_count或游戏结束
+
+    机器人每个方块选择下方留空最少、落点最低的位置，先旋转、再横向移动、最后逐格下落并锁定，
+    记录的事件与真实玩家的操作相同，得到的存档和重放都可以正常加载和回放
+
+    Args:
+        width: 地图宽度
+        height: 地图高度
+        event_count: 目标事件数
+        seed: 游戏种子，机器人的随机选择也由它决定
+
+    Returns:
+        游玩后的GameEngine
+    """
+    rng = random.Random(seed)
+    engine = GameEngine(width, height)
+    engine.new_game(game_seed=seed, game_start_date="2000-01-01 00:00:00")
+    while not engine.is_game_over and len(engine.event_queue) < event_count:
+        rotations, target_x = _choose_placement(engine, rng)
+        for _ in range(rotations):
+            _advance(engine, ROTATE_FRAMES)
+            engine.try_rotate_piece()
+        while engine.current_piece.x != target_x:
+            _advance(engine, SIDE_MOVE_FRAMES)
+            if not engine.try_move_piece(1 if target_x > engine.current_piece.x else -1, 0):
+                break
+        while True:
+            _advance(engine, DROP_FRAMES)
+            if not engine.try_move_piece(0, 1):
+                break
+        engine.lock_piece()
+    return engine
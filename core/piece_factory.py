@@ -1,17 +1,47 @@
 from data.piece import Piece
 from data.tile import TileType
 from core.singleton import Singleton
+from typing import Optional
 import random
 import pickle
 import base64
 
+# 随机方块的类型（排除EMPTY WALL类型）和权重，I, O, T更常见一些
+RANDOM_PIECE_TYPES = [t for t in TileType if t not in [TileType.EMPTY, TileType.WALL]]
+RANDOM_PIECE_WEIGHTS = [2, 2, 2, 1, 1, 1, 1]
+
 class PieceFactory(Singleton):
     # 类变量，用于存储随机数生成器
     _random_generator = random.Random()
+    # 设置种子之后生成的随机方块数量，恢复了外部的随机数状态之后为None
+    _draw_count: Optional[int] = 0
     
     def set_seed(self, seed: int):
         """设置随机数种子，实现随机性的可复现"""
         self._random_generator.seed(seed)
+        PieceFactory._draw_count = 0
+
+    def get_draw_count(self) -> Optional[int]:
+        """
+        获取设置种子之后生成的随机方块数量
+
+        种子加上这个数量就能确定随机数生成器的状态，用作回放关键帧中紧凑的随机数状态，
+        恢复了外部的随机数状态（set_random_state）之后无法确定，返回None
+        """
+        return self._draw_count
+
+    def restore_draw_count(self, seed: int, draw_count: int):
+        """
+        重新设置种子并跳过draw_count次随机选择，恢复到get_draw_count返回该值时的随机数状态
+
+        Args:
+            seed: 随机数种子
+            draw_count: get_draw_count的返回值
+        """
+        self.set_seed(seed)
+        for _ in range(draw_count):
+            self._random_piece_type()
+        PieceFactory._draw_count = draw_count
     
     def get_random_state(self) -> str:
         """
@@ -48,6 +78,7 @@ class PieceFactory(Singleton):
             state = pickle.loads(serialized_state)
             # 设置随机数生成器的状态
             self._random_generator.setstate(state)
+            PieceFactory._draw_count = None
             return True
         except Exception as e:
             print(f"恢复随机数状态失败: {e}")
@@ -55,12 +86,14 @@ class PieceFactory(Singleton):
     
     def create_random_piece(self, x: int, y: int) -> Piece: 
         """创建一个随机类型的俄罗斯方块"""
-        # 从TileType枚举中随机选择一个类型 排除EMPTY WALL类型
-        # 添加权重 使某些类型更常见
-        tile_type_list = [t for t in TileType if t not in [TileType.EMPTY, TileType.WALL]]
-        weights = [2, 2, 2, 1, 1, 1, 1]  # I, O, T更常见一些
-        piece_type = self._random_generator.choices(tile_type_list, weights=weights)[0]
+        piece_type = self._random_piece_type()
+        if self._draw_count is not None:
+            PieceFactory._draw_count += 1
         return Piece(x, y, piece_type)
+
+    def _random_piece_type(self) -> TileType:
+        """按权重随机选择一个方块类型"""
+        return self._random_generator.choices(RANDOM_PIECE_TYPES, weights=RANDOM_PIECE_WEIGHTS)[0]
     
     @staticmethod
     def create_piece(x: int, y: int, type: TileType, rotation: int = 0) -> Piece:
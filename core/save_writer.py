@@ -0,0 +1,116 @@
+"""
+存档写入器 - 在后台线程中序列化并写入存档文件
+"""
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from core.singleton import Singleton
+from tools.profiler import Profiler
+
+FileContent = Union[str, bytes]
+
+
+def write_file_atomic(file_path: str, content: FileContent):
+    """
+    原子地写入文件：先写入同目录下的临时文件并fsync，再用os.replace替换目标文件，
+    写入中途崩溃时原文件保持不变；每次写入使用不同的临时文件，
+    主线程和后台线程同时写入同一个文件时不会互相覆盖写了一半的临时文件
+
+    Args:
+        file_path: 文件路径
+        content: 文件内容，字符串按UTF-8编码
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    directory = os.path.dirname(file_path) or "."
+    fd, temp_file_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(file_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str):
+    """fsync目录，保证os.replace的结果写入磁盘；不支持打开目录的系统（Windows）上跳过"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SaveWriter(Singleton):
+    """
+    后台存档写入线程
+
+    submit只登记写入任务，序列化和写文件都在后台线程中执行，不阻塞游戏主循环；
+    同一路径上还没开始写入的任务会合并，只写入最后一次提交的内容
+    """
+    _condition = threading.Condition()
+    # 待写入的任务：文件路径 -> (序列化函数, 完成回调列表)，按提交顺序写入
+    _pending: Dict[str, Tuple[Callable[[], FileContent], List[Callable[[bool], None]]]] = {}
+    _is_writing = False
+    _thread: Optional[threading.Thread] = None
+
+    def submit(self, file_path: str, serialize: Callable[[], FileContent], on_done: Optional[Callable[[bool], None]] = None):
+        """
+        提交写入任务
+
+        Args:
+            file_path: 文件路径
+            serialize: 在后台线程中调用，返回要写入的内容
+            on_done: 写入完成后在后台线程中调用，参数为是否成功；被合并的任务的回调也会被调用
+        """
+        with self._condition:
+            callbacks = self._pending.pop(file_path, (None, []))[1]
+            if on_done is not None:
+                callbacks.append(on_done)
+            self._pending[file_path] = (serialize, callbacks)
+            if self._thread is None or not self._thread.is_alive():
+                SaveWriter._thread = threading.Thread(target=self._run, name="SaveWriter", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待所有已提交的任务写入完成，用于退出程序前
+
+        Returns:
+            全部写入完成返回True，超时返回False
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._is_writing, timeout)
+
+    def _run(self):
+        """后台线程：依次取出任务并写入"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                file_path = next(iter(self._pending))
+                serialize, callbacks = self._pending.pop(file_path)
+                SaveWriter._is_writing = True
+            try:
+                with Profiler().scope("SaveWriter.write"):
+                    write_file_atomic(file_path, serialize())
+                success = True
+            except Exception as e:
+                print(f"保存文件失败: {file_path}，{e}")
+                success = False
+            for callback in callbacks:
+                try:
+                    callback(success)
+                except Exception as e:
+                    print(f"存档写入回调失败: {e}")
+            with self._condition:
+                SaveWriter._is_writing = False
+                self._condition.notify_all()
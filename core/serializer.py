@@ -3,13 +3,17 @@
 """
 import json
 from abc import ABC, abstractmethod
-from typing import Dict, Any, TypeVar, Generic, Type
+from typing import Callable, Dict, Any, Optional, TypeVar, Generic, Type, Union
+
+from tools.profiler import profiled
 
 T = TypeVar('T', bound='Serializer')
 
 
 class Serializer(ABC, Generic[T]):
     """序列化器抽象基类，定义序列化和反序列化的接口"""
+    # 不引入实例字典，允许子类通过__slots__节省内存
+    __slots__ = ()
     
     @abstractmethod
     def to_dict(self) -> Dict[str, Any]:
@@ -58,9 +62,19 @@ class Serializer(ABC, Generic[T]):
         data = json.loads(json_str)
         return cls.from_dict(data)
     
+    def to_file_content(self) -> Union[str, bytes]:
+        """
+        获取保存到文件的内容，默认为JSON字符串，子类可以改为其他格式
+        
+        Returns:
+            文件内容
+        """
+        return self.to_json()
+    
+    @profiled()
     def save_to_file(self, file_path: str) -> bool:
         """
-        将对象保存到文件
+        将对象保存到文件，先写临时文件再替换，写入中途崩溃不会损坏原文件
         
         Args:
             file_path: 文件路径
@@ -68,14 +82,25 @@ class Serializer(ABC, Generic[T]):
         Returns:
             保存成功返回True，失败返回False
         """
+        from core.save_writer import write_file_atomic
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(self.to_json())
+            write_file_atomic(file_path, self.to_file_content())
             return True
         except Exception as e:
             print(f"保存文件失败: {e}")
             return False
     
+    def save_to_file_async(self, file_path: str, on_done: Optional[Callable[[bool], None]] = None):
+        """
+        在后台线程中序列化并保存到文件，提交后调用者不应再修改该对象
+        
+        Args:
+            file_path: 文件路径
+            on_done: 写入完成后在后台线程中调用，参数为是否成功
+        """
+        from core.save_writer import SaveWriter
+        SaveWriter().submit(file_path, self.to_file_content, on_done)
+    
     @classmethod
     def load_from_file(cls: Type[T], file_path: str) -> T:
         """
@@ -1,5 +1,4 @@
 # 游戏配置
-import pygame
 import sys
 import os
 
@@ -25,6 +24,13 @@ class GameConfig:
 
     # 方块大小
     TILE_SIZE = 40
+    # 方块图集启动时预先生成的透明度：空白格和预测落点、地图和当前方块、方块预览
+    TILE_ATLAS_ALPHAS = (50, 200, 230)
+
+    # 模拟频率（每秒模拟步数），每步对应一个游戏帧，必须与FPS一致，游戏时间按帧号计算
+    SIMULATION_TICK_RATE = FPS
+    # 卡顿后每次更新最多补的模拟步数，超出的时间直接丢弃
+    SIMULATION_MAX_TICKS_PER_UPDATE = 15
 
     # 方块下降速度
     MOVE_DOWN_INTERVAL = 750  # 方块下落间隔时间（毫秒）
@@ -40,6 +46,47 @@ class GameConfig:
     # 游戏重放数据文件夹路径
     SAVE_GAME_REPLAY_DATA_FILE_PATH = get_resource_path("saves/replay_json/")
     # 游戏重放数据文件名格式
-    SAVE_GAME_REPLAY_DATA_FILE_NAME = "game_replay_data_{}.json"
+    SAVE_GAME_REPLAY_DATA_FILE_NAME = "game_replay_data_{}.replay"
+    # 游戏重放数据文件名匹配规则，兼容旧版的JSON文件
+    SAVE_GAME_REPLAY_DATA_FILE_PATTERN = r"game_replay_data_(\d+)\.(?:json|replay)$"
+    # 是否以二进制格式保存重放数据（读取时自动识别格式）
+    SAVE_GAME_REPLAY_DATA_BINARY = True
+    # 重放文件索引的文件名（保存在重放文件夹中），排行榜只读取索引
+    SAVE_GAME_REPLAY_INDEX_FILE_NAME = "replay_index.json"
+    # 排行榜数据库路径
+    SAVE_LEADERBOARD_DB_FILE_PATH = get_resource_path("saves/leaderboard.db")
+    # 重放保留策略：保留分数最高的K个加上最近的N个
+    REPLAY_RETENTION_TOP_K = 100
+    REPLAY_RETENTION_LAST_N = 100
+    # 游戏进行中的回放日志文件路径，游戏结束后转存为重放文件
+    SAVE_GAME_REPLAY_JOURNAL_FILE_PATH = get_resource_path("saves/replay_journal.bin")
+    # 回放日志每攒够多少个事件写入一次磁盘
+    REPLAY_JOURNAL_CHUNK_EVENTS = 128
 
     AUTO_SAVE_INTERVAL = 30000  # 自动保存间隔时间（毫秒）
+    AUTO_SAVE_COMPACT_INTERVAL = 10  # 每隔多少次增量自动保存写入一次完整快照
+
+    # 回放速度：瞬间播放到结尾
+    REPLAY_SPEED_INSTANT = 0
+    # 回放速度档位（每次渲染推进的帧数），按F键循环切换，数字键1-5直接选择
+    REPLAY_SPEEDS = [1, 2, 4, 16, REPLAY_SPEED_INSTANT]
+    # 回放关键帧间隔（帧），跳转时最多需要重新模拟这么多帧
+    REPLAY_KEYFRAME_INTERVAL = 1800
+    # 每个回放最多保留的关键帧数量，超出后关键帧间隔加倍并丢弃一半关键帧
+    REPLAY_MAX_KEYFRAMES = 64
+    # 回放中按左右方向键跳转的帧数
+    REPLAY_SEEK_STEP = 300
+
+    # 文字表面缓存容量（条），超出后淘汰最久未使用的文字
+    TEXT_CACHE_SIZE = 512
+
+    # 性能分析：启动时是否开启（游戏中按F3切换浮层，按F4导出trace）
+    PROFILER_ENABLED = False
+    # 浮层统计最近多少帧/多少次调用
+    PROFILER_FRAME_WINDOW = 600
+    # trace缓冲区最多保存的计时区间数，超出后丢弃最早的
+    PROFILER_TRACE_MAX_EVENTS = 200000
+    # 浮层数值的刷新间隔（毫秒）
+    PROFILER_OVERLAY_REFRESH_MS = 500
+    # Chrome trace导出路径
+    PROFILER_TRACE_FILE_PATH = get_resource_path("saves/profile_trace.json")
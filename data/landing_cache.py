@@ -0,0 +1,31 @@
+from typing import Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data.map import Map
+    from data.piece import Piece
+
+
+class LandingCache:
+    """
+    方块硬降落位置（预测的下落位置）缓存
+
+    只有方块移动、旋转或地图内容变化（Map.version变化）时才重新计算落点，
+    计算本身基于Map中每列的高度，复杂度为O(方块宽度)
+    """
+    __slots__ = ('_key', '_landing_y')
+
+    def __init__(self):
+        self._key: Optional[Tuple] = None
+        self._landing_y = 0
+
+    def get_landing_y(self, piece: 'Piece', map: 'Map') -> int:
+        """获取方块硬降落后所在的y坐标"""
+        key = (piece.type, piece.rotation, piece.x, piece.y, id(map), map.version)
+        if key != self._key:
+            self._key = key
+            self._landing_y = piece.y + piece.get_drop_distance(map)
+        return self._landing_y
+
+    def invalidate(self):
+        """使缓存失效"""
+        self._key = None
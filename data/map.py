@@ -1,85 +1,261 @@
 import os
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable
 
-import pygame
-
-from resources.resource_manager import ResourcesManager, ResId
 from .tile import Tile, TileType
 from core.serializer import Serializer
+from tools.profiler import profiled
 from .config import GameConfig
 
+# 方块类型与紧凑编码（bytearray中的单字节）之间的映射
+TILE_TYPES: List[TileType] = list(TileType)
+TILE_CODES: Dict[TileType, int] = {tile_type: code for code, tile_type in enumerate(TILE_TYPES)}
+EMPTY_CODE = TILE_CODES[TileType.EMPTY]
+WALL_CODE = TILE_CODES[TileType.WALL]
+# 将方块类型编码转换为'0'/'1'字符的转换表，用于快速由一行方块计算行掩码
+_OCCUPIED_TABLE = bytes(ord('0') if code == EMPTY_CODE else ord('1') for code in range(256))
+
+
+# 序列化时每格使用一个字符：空白为'.'，墙壁为'#'，其他为方块类型名称
+TILE_CHARS: Dict[TileType, str] = {
+    tile_type: '.' if tile_type == TileType.EMPTY else '#' if tile_type == TileType.WALL else tile_type.name
+    for tile_type in TILE_TYPES
+}
+_ENCODE_TABLE = bytes(ord(TILE_CHARS[TILE_TYPES[code]]) if code < len(TILE_TYPES) else ord('?') for code in range(256))
+_INVALID_CODE = 0xFF
+_DECODE_TABLE = bytes(
+    next((code for code, tile_type in enumerate(TILE_TYPES) if ord(TILE_CHARS[tile_type]) == char), _INVALID_CODE)
+    for char in range(256)
+)
+
+
+def _row_mask_from_cells(row: bytes) -> int:
+    """由一行方块类型编码计算该行的占用掩码"""
+    return int(row.translate(_OCCUPIED_TABLE)[::-1], 2)
+
+
+def _mask_runs(mask: int) -> Iterable[Tuple[int, int]]:
+    """依次返回掩码中连续置位区间的(起始列, 结束列)，结束列不包含在内"""
+    x = 0
+    while mask:
+        # 跳过低位的0，再数出连续的1
+        skip = (mask & -mask).bit_length() - 1
+        mask >>= skip
+        x += skip
+        length = (~mask & (mask + 1)).bit_length() - 1
+        yield x, x + length
+        mask >>= length
+        x += length
+
+
 class Map(Serializer['Map']):
-    """存储游戏地图网格数据的类"""
+    """
+    存储游戏地图网格数据的类
     
-    def __init__(self, width: int = 30, height: int = 20, tile_size: int = GameConfig.TILE_SIZE):
+    地图使用位棋盘（bitboard）存储：
+    - row_masks: 每行一个整数，第x位为1表示该格被占用（非空，包括墙壁）
+    - cell_rows: 每行一个bytearray，保存每格的方块类型编码
+    - dirty_masks: 每行一个整数，第x位为1表示该格需要重绘
+    """
+
+    def __init__(self, width: int = 30, height: int = 20, tile_size: int = GameConfig.TILE_SIZE, cells: Optional[bytes] = None):
         """
         初始化Map对象
         
         Args:
             width: 地图宽度（网格数）
             height: 地图高度（网格数）
-            tile_size: 方块大小（像素）"""
+            tile_size: 方块大小（像素）
+            cells: 地图内容（get_cells的返回值），为None时初始化为只有墙壁的空地图"""
         self.width = width
         self.height = height
-        self.tile_map: List[List[Tile]] = [[Tile() for _ in range(width)] for _ in range(height)]
-        self.tile_map_dirty: List[List[bool]] = [[True for _ in range(width)] for _ in range(height)]  # 地图网格是否需要重绘
+        self.full_row_mask = (1 << width) - 1  # 满行掩码
+        self.wall_row_mask = 1 | (1 << (width - 1))  # 左右墙壁掩码
+        self.inner_row_mask = self.full_row_mask & ~self.wall_row_mask  # 墙壁以内的掩码
+        self.row_masks: List[int] = [0] * height
+        self.cell_rows: List[bytearray] = [bytearray(width) for _ in range(height)]
+        self.dirty_masks: List[int] = [self.full_row_mask] * height  # 地图网格是否需要重绘
+        self.pending_row_shifts: List[Tuple[int, int, int]] = []  # 消行后等待在纹理上滚动的行区间
+        self.column_tops: List[int] = [height] * width  # 每列最上方被占用的行，整列为空时为height
+        self.version = 0  # 地图内容每次变化时递增，供缓存判断是否失效
         self.tile_size = tile_size
-        self.texture = pygame.Surface((self.width * self.tile_size, self.height * self.tile_size)).convert_alpha()
-        self.texture.fill((0, 0, 0, 0))  # 透明背景
+        self.texture = None  # 地图纹理，第一次调用create_map_texture时才创建，使地图可以在无显示环境下使用
         
-        self.initialize_map()
+        if cells is None:
+            self.initialize_map()
+        else:
+            self.set_cells(cells)
     
     def initialize_map(self) -> None:
         """初始化地图网格"""
-        # 创建边界墙壁
-        for x in range(self.width):
-            self.set_tile(x, self.height - 1, TileType.WALL)  # 下边界
+        # 墙壁以内为空白，左右两侧为墙壁，最下方一行全部为墙壁
+        inner_row = bytearray(self.width)
+        inner_row[0] = inner_row[-1] = WALL_CODE
+        bottom_row = bytearray([WALL_CODE]) * self.width
+        self.pending_row_shifts.clear()
         
         for y in range(self.height):
-            self.set_tile(0, y, TileType.WALL)  # 左边界
-            self.set_tile(self.width - 1, y, TileType.WALL)  # 右边界
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                if not self.get_tile(x, y).is_wall():
-                    self.set_tile(x, y, TileType.EMPTY)
+            is_bottom = y == self.height - 1
+            row = bottom_row if is_bottom else inner_row
+            if self.cell_rows[y] != row:
+                self.cell_rows[y][:] = row
+                self.dirty_masks[y] = self.full_row_mask
+            self.row_masks[y] = self.full_row_mask if is_bottom else self.wall_row_mask
+        self._rebuild_column_tops()
+        self.version += 1
         
+    @profiled()
     def create_map_texture(self) -> None:
-        """创建地图的纹理"""
-        resources_manager = ResourcesManager()
+        """创建地图的纹理，只重绘标记为脏的方块"""
+        import pygame
+        from tools.tile_atlas import TileAtlas
+
+        if self.texture is None:
+            self.texture = pygame.Surface((self.width * self.tile_size, self.height * self.tile_size)).convert_alpha()
+            self.texture.fill((0, 0, 0, 0))  # 透明背景
+            self.mark_all_dirty()
+
+        # 先将消行后整体下移的行区间在纹理上滚动到新位置
+        for top, bottom, shift in self.pending_row_shifts:
+            region = pygame.Rect(0, top * self.tile_size, self.texture.get_width(), (bottom - top + 1 + shift) * self.tile_size)
+            self.texture.subsurface(region).scroll(0, shift * self.tile_size)
+        self.pending_row_shifts.clear()
+
+        # 每种方块在图集中的区域只查找一次，空白格的透明度为50，其余为200
+        atlas_areas: Dict[int, Optional[Tuple[Any, Any]]] = {}
+        tile_size = self.tile_size
+        blits = []
         for y in range(self.height):
+            dirty_mask = self.dirty_masks[y]
+            if not dirty_mask:
+                continue
+            self.dirty_masks[y] = 0
+            row = self.cell_rows[y]
+            y_pos = y * tile_size
+            # 连续的脏方块合并为一次清空
+            for start, end in _mask_runs(dirty_mask):
+                self.texture.fill((0, 0, 0, 0), (start * tile_size, y_pos, (end - start) * tile_size, tile_size))
             for x in range(self.width):
-                tile = self.get_tile(x, y)
-                if tile and self.tile_map_dirty[y][x]:
-                    x_pos, y_pos = self.map_position_to_screen_position(x, y)
-                    self.tile_map_dirty[y][x] = False
-                    self.texture.fill((0, 0, 0, 0), (x_pos, y_pos, self.tile_size, self.tile_size))
+                if not dirty_mask >> x & 1:
+                    continue
+                code = row[x]
+                if code not in atlas_areas:
+                    tile_type = TILE_TYPES[code]
                     try:
-                        tile_img = resources_manager.get_resource(ResId[tile.get_type().value], (self.tile_size, self.tile_size), alpha_val=200)
-                        if tile.is_empty():
-                            tile_img.set_alpha(50)  # 设置透明度
-                        
-                        self.texture.blit(tile_img, (x_pos, y_pos))
+                        alpha = 50 if tile_type == TileType.EMPTY else 200
+                        atlas_areas[code] = TileAtlas().get(tile_type, tile_size, alpha)
                     except Exception:
-                        print(f"无法加载方块资源: {tile.get_type().name}")
-                        pygame.draw.rect(self.texture, (255, 0, 0), 
-                                    (x_pos, y_pos, self.tile_size, self.tile_size))
+                        print(f"无法加载方块资源: {tile_type.name}")
+                        atlas_areas[code] = None
+                atlas_area = atlas_areas[code]
+                if atlas_area is None:
+                    pygame.draw.rect(self.texture, (255, 0, 0), (x * tile_size, y_pos, tile_size, tile_size))
+                else:
+                    blits.append((atlas_area[0], (x * tile_size, y_pos), atlas_area[1]))
+        # 所有脏方块一次提交
+        if blits:
+            self.texture.blits(blits, doreturn=False)
+        
+    def get_cells(self) -> bytes:
+        """获取整个地图的方块类型编码（按行依次拼接），用于保存快照"""
+        return b''.join(self.cell_rows)
+                        
+    def set_cells(self, cells: bytes) -> None:
+        """用get_cells得到的快照恢复整个地图"""
+        width = self.width
+        self.cell_rows = [bytearray(cells[y * width:(y + 1) * width]) for y in range(self.height)]
+        self.row_masks = [_row_mask_from_cells(row) for row in self.cell_rows]
+        self._rebuild_column_tops()
+        self.mark_all_dirty()
+        self.version += 1
+
+    def copy(self) -> 'Map':
+        """复制地图数据（不包括纹理），用于在后台线程中序列化"""
+        return Map(self.width, self.height, self.tile_size, cells=self.get_cells())
+
+    def mark_all_dirty(self) -> None:
+        """将整个地图标记为需要重绘，并丢弃等待中的纹理滚动"""
+        self.pending_row_shifts.clear()
+        self.dirty_masks = [self.full_row_mask] * self.height
     
     def check_and_clear_lines(self) -> int:
-        """检查并清除满行方块，返回清除的行数"""
-        clear_count = 0
-        for y in range(self.height - 2, -1, -1):
-            if all(not tile.is_empty() for tile in self.tile_map[y]):
-                # 清除满行 忽略边界墙壁
-                for x in range(1, self.width - 1):
-                    self.set_tile(x, y, TileType.EMPTY)
-                clear_count += 1
-            else:
-                # 下移行
-                for x in range(1, self.width - 1):
-                    if y + clear_count < self.height:
-                        self.set_tile(x, y + clear_count, self.tile_map[y][x].get_type())
+        """
+        检查并清除满行方块，返回清除的行数
+
+        满行通过行掩码与满行掩码比较判断（每行O(1)），清除时直接移动整行的引用压缩地图，
+        并在顶部补充新的空行。被整体下移的行区间记录在pending_row_shifts中，
+        供create_map_texture直接滚动已渲染的纹理区域，而不是逐个方块重绘。
+        """
+        bottom = self.height - 2  # 最下方一行是墙壁，不参与消除
+        full_rows = [y for y in range(bottom + 1) if self.row_masks[y] == self.full_row_mask]
+        clear_count = len(full_rows)
+        if clear_count == 0:
+            return 0
+
+        # 记录下移的行区间 (起始行, 结束行, 下移行数)，按从下到上的顺序
+        shift = 0
+        segment_end = bottom
+        for y in reversed(full_rows):
+            if shift and y < segment_end:
+                self.pending_row_shifts.append((y + 1, segment_end, shift))
+            shift += 1
+            segment_end = y - 1
+        if segment_end >= 0:
+            self.pending_row_shifts.append((0, segment_end, shift))
+
+        # 压缩地图：保留未满的行，并在顶部补充新的空行
+        kept = [y for y in range(bottom + 1) if self.row_masks[y] != self.full_row_mask]
+        empty_row = bytearray(self.width)
+        empty_row[0] = empty_row[-1] = WALL_CODE
+        self.cell_rows[:bottom + 1] = [bytearray(empty_row) for _ in range(clear_count)] + [self.cell_rows[y] for y in kept]
+        self.row_masks[:bottom + 1] = [self.wall_row_mask] * clear_count + [self.row_masks[y] for y in kept]
+        self.dirty_masks[:bottom + 1] = [self.full_row_mask] * clear_count + [self.dirty_masks[y] for y in kept]
+        self._rebuild_column_tops()
+        self.version += 1
         return clear_count
+
+    def _rebuild_column_tops(self) -> None:
+        """从上到下扫描行掩码，重建每列最上方被占用的行"""
+        column_tops = [self.height] * self.width
+        remaining = self.full_row_mask
+        for y, row_mask in enumerate(self.row_masks):
+            found = row_mask & remaining
+            if not found:
+                continue
+            remaining &= ~found
+            while found:
+                low_bit = found & -found
+                column_tops[low_bit.bit_length() - 1] = y
+                found ^= low_bit
+            if not remaining:
+                break
+        self.column_tops = column_tops
+
+    def get_drop_distance(self, shape, x: int, y: int) -> int:
+        """
+        获取预计算的方块形状（data.piece.PieceShape）从(x, y)可以直接下落的行数
+
+        通过每列最上方被占用的行计算，复杂度为O(方块宽度)；
+        只有方块位于悬空方块下方时才需要沿该列逐行向下查找
+        """
+        distance = self.height
+        bit_rows = self.row_masks
+        for dx, dy in shape.column_bottoms:
+            column = x + dx
+            if not 0 <= column < self.width:
+                continue
+            bottom_row = y + dy
+            top = self.column_tops[column]
+            if bottom_row < top:
+                column_distance = top - bottom_row - 1
+            else:
+                bit = 1 << column
+                row = bottom_row + 1
+                while row < self.height and not bit_rows[row] & bit:
+                    row += 1
+                column_distance = row - bottom_row - 1
+            if column_distance < distance:
+                distance = column_distance
+        return distance
     
     def map_position_to_screen_position(self, x: int, y: int) -> Tuple[int, int]:
         """将地图坐标转换为屏幕坐标"""
@@ -96,21 +272,77 @@ class Map(Serializer['Map']):
         """
         获取指定位置的方块
         Returns:
-            指定位置的Tile对象，如果坐标超出范围则返回None
+            指定位置方块的Tile对象（只读副本，修改请使用set_tile），如果坐标超出范围则返回None
         """
         if 0 <= x < self.width and 0 <= y < self.height:
-            return self.tile_map[y][x]
+            return Tile(TILE_TYPES[self.cell_rows[y][x]])
+        return None
+
+    def get_tile_type(self, x: int, y: int) -> Optional[TileType]:
+        """获取指定位置的方块类型，如果坐标超出范围则返回None"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return TILE_TYPES[self.cell_rows[y][x]]
         return None
     
     def set_tile(self, x: int, y: int, tile_type: TileType) -> bool:
         """设置指定位置的方块类型 如果目标类型与原类型不同则修改方块类型 且标记为脏"""
         if 0 <= x < self.width and 0 <= y < self.height:
-            if tile_type == self.tile_map[y][x].get_type():
+            code = TILE_CODES[tile_type]
+            row = self.cell_rows[y]
+            if code == row[x]:
                 return False
-            self.tile_map_dirty[y][x] = True
-            self.tile_map[y][x].set_type(tile_type)
+            row[x] = code
+            bit = 1 << x
+            if code == EMPTY_CODE:
+                self.row_masks[y] &= ~bit
+                if self.column_tops[x] == y:
+                    # 最上方的方块被移除，向下查找新的最上方方块
+                    top = y + 1
+                    while top < self.height and not self.row_masks[top] & bit:
+                        top += 1
+                    self.column_tops[x] = top
+            else:
+                self.row_masks[y] |= bit
+                if y < self.column_tops[x]:
+                    self.column_tops[x] = y
+            self.dirty_masks[y] |= bit
+            self.version += 1
             return True
         return False
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        """检查指定位置是否被占用（非空），超出地图范围的位置视为未占用"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.row_masks[y] >> x & 1 == 1
+        return False
+
+    def collides(self, positions: Iterable[Tuple[int, int]]) -> bool:
+        """检查一组坐标中是否有任意一个与已占用的方块重叠"""
+        width, height, row_masks = self.width, self.height, self.row_masks
+        for x, y in positions:
+            if 0 <= x < width and 0 <= y < height and row_masks[y] >> x & 1:
+                return True
+        return False
+
+    def collides_shape(self, shape, x: int, y: int) -> bool:
+        """
+        检查预计算的方块形状（data.piece.PieceShape）放在(x, y)时是否与已占用的方块重叠
+
+        每一行只需一次移位和一次按位与，超出地图范围的部分视为未占用
+        """
+        row_masks = self.row_masks
+        shift = x + shape.min_x
+        row = y + shape.min_y
+        for mask in shape.row_masks:
+            if 0 <= row < self.height:
+                if row_masks[row] & (mask << shift if shift >= 0 else mask >> -shift):
+                    return True
+            row += 1
+        return False
+
+    def is_row_full(self, y: int) -> bool:
+        """检查指定行是否已满"""
+        return 0 <= y < self.height and self.row_masks[y] == self.full_row_mask
     
     def is_valid_position(self, x: int, y: int) -> bool:
         """检查坐标是否在地图范围内"""
@@ -121,23 +353,19 @@ class Map(Serializer['Map']):
         return 0 < x < self.width - 1 and 0 < y < self.height - 1
     
     def to_dict(self) -> Dict[str, Any]:
-        """将Map对象转换为字典，用于序列化"""
-        tile_map_data = []
-        for y in range(self.height):
-            row_data = []
-            for x in range(self.width):
-                row_data.append(self.tile_map[y][x].to_dict())
-            tile_map_data.append(row_data)
-        
+        """将Map对象转换为字典，用于序列化，每行编码为一个字符串，每格一个字符（见TILE_CHARS）"""
         return {
             'width': self.width,
             'height': self.height,
-            'tile_map': tile_map_data
+            'rows': [row.translate(_ENCODE_TABLE).decode('ascii') for row in self.cell_rows]
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Map':
-        """从字典创建Map对象，用于反序列化"""
+        """从字典创建Map对象，用于反序列化，兼容旧版逐格保存的tile_map格式"""
+        if 'rows' in data:
+            return cls.from_rows(data['width'], data['height'], data['rows'])
+
         map_obj = cls(
             width=data.get('width', 20),
             height=data.get('height', 20)
@@ -150,6 +378,16 @@ class Map(Serializer['Map']):
             for x, tile_data in enumerate(row_data):
                 if x >= map_obj.width:
                     break
-                map_obj.tile_map[y][x] = Tile.from_dict(tile_data)
+                map_obj.set_tile(x, y, Tile.from_dict(tile_data).get_type())
         
         return map_obj
+
+    @classmethod
+    def from_rows(cls, width: int, height: int, rows: List[str]) -> 'Map':
+        """由to_dict生成的行字符串直接创建Map对象，跳过墙壁初始化和逐格设置"""
+        if len(rows) != height or any(len(row) != width for row in rows):
+            raise ValueError(f"地图数据大小与{width}x{height}不一致")
+        cells = ''.join(rows).encode('ascii').translate(_DECODE_TABLE)
+        if _INVALID_CODE in cells:
+            raise ValueError("地图数据包含未知的方块字符")
+        return cls(width, height, cells=cells)
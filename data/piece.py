@@ -1,9 +1,12 @@
 # core/piece.py
 from dataclasses import dataclass
 from data.tile import TileType
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, TYPE_CHECKING
 from core.serializer import Serializer
 
+if TYPE_CHECKING:
+    from data.map import Map
+
 # 定义俄罗斯方块的相对形状
 PIECE = {
     TileType.I: [
@@ -40,7 +43,48 @@ PIECE = {
         [(1,1), (0,0), (-1,0), (1,0)]
     ]
 }
+
+
+@dataclass(frozen=True)
+class PieceShape:
+    """某种方块在某个旋转状态下的预计算形状"""
+    # 相对方块中心的地图坐标偏移（已将PIECE中向上为正的dy转换为地图中向下为正）
+    offsets: Tuple[Tuple[int, int], ...]
+    # 包围盒（相对方块中心，包含边界）
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+    # 从min_y开始的每一行的列掩码，第i位对应列min_x + i
+    row_masks: Tuple[int, ...]
+    # 每一列最下方方块的偏移 (dx, dy)，用于计算硬降落距离
+    column_bottoms: Tuple[Tuple[int, int], ...]
+
+
+def _build_shape(shape: List[Tuple[int, int]]) -> PieceShape:
+    """根据PIECE中的相对形状构建预计算形状"""
+    offsets = tuple((dx, -dy) for dx, dy in shape)
+    xs = [x for x, _ in offsets]
+    ys = [y for _, y in offsets]
+    min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+    row_masks = [0] * (max_y - min_y + 1)
+    column_bottoms: Dict[int, int] = {}
+    for x, y in offsets:
+        row_masks[y - min_y] |= 1 << (x - min_x)
+        column_bottoms[x] = max(y, column_bottoms.get(x, y))
+    return PieceShape(offsets, min_x, max_x, min_y, max_y, tuple(row_masks), tuple(sorted(column_bottoms.items())))
+
+
+# 导入时一次性构建的形状表：方块类型 -> 各旋转状态的预计算形状
+PIECE_SHAPES: Dict[TileType, Tuple[PieceShape, ...]] = {
+    piece_type: tuple(_build_shape(shape) for shape in shapes)
+    for piece_type, shapes in PIECE.items()
+}
+
+
 class Piece(Serializer['Piece']):
+    __slots__ = ('x', 'y', 'type', 'rotation')
+
     def __init__(self, x, y, type: TileType, rotation: int = 0):
         self.x = x
         self.y = y
@@ -50,19 +94,40 @@ class Piece(Serializer['Piece']):
     def shape(self) -> List[Tuple[int, int]]: 
         """获取当前旋转状态下的方块形状"""
         return PIECE[self.type][self.rotation]
+
+    def get_shape(self) -> PieceShape:
+        """获取当前旋转状态下的预计算形状"""
+        return PIECE_SHAPES[self.type][self.rotation]
     
     def rotate(self):
         """顺时针旋转方块"""
-        self.rotation = (self.rotation + 1) % len(PIECE[self.type])
+        self.rotation = (self.rotation + 1) % len(PIECE_SHAPES[self.type])
 
     def rotate_counterclockwise(self):
         """逆时针旋转方块"""
-        self.rotation = (self.rotation - 1) % len(PIECE[self.type])
+        self.rotation = (self.rotation - 1) % len(PIECE_SHAPES[self.type])
 
     def get_block_positions(self) -> List[Tuple[int, int]]:
         """返回当前方块在地图上的所有坐标位置"""
-        return [(self.x + dx, self.y - dy) for dx, dy in self.shape()]
+        x, y = self.x, self.y
+        return [(x + dx, y + dy) for dx, dy in PIECE_SHAPES[self.type][self.rotation].offsets]
+
+    def collides_at(self, map: 'Map', x: int, y: int) -> bool:
+        """检查方块以当前旋转状态放在(x, y)时是否与地图上已占用的方块重叠"""
+        return map.collides_shape(PIECE_SHAPES[self.type][self.rotation], x, y)
+
+    def collides(self, map: 'Map') -> bool:
+        """检查方块在当前位置是否与地图上已占用的方块重叠"""
+        return self.collides_at(map, self.x, self.y)
+
+    def get_drop_distance(self, map: 'Map') -> int:
+        """获取方块从当前位置可以直接下落的行数"""
+        return map.get_drop_distance(PIECE_SHAPES[self.type][self.rotation], self.x, self.y)
     
+    def copy(self) -> 'Piece':
+        """复制方块"""
+        return Piece(self.x, self.y, self.type, self.rotation)
+
     def move(self, dx: int, dy: int):
         """移动方块位置"""
         self.x += dx
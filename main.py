@@ -6,6 +6,10 @@ from data.config import GameConfig
 from scene.scene_manager import SceneManager
 from scene.menu_scene import MenuScene
 from resources.resource_manager import ResourcesManager, ResId
+from core.save_writer import SaveWriter
+from tools.profiler import Profiler
+from ui.profiler_overlay import ProfilerOverlay
+from tools.tile_atlas import TileAtlas
 
 def get_resource_path(relative_path):
     """获取资源的绝对路径，兼容开发环境和打包环境"""
@@ -43,6 +47,8 @@ clock = pygame.time.Clock()
 
 # 初始化管理器
 ResourcesManager().load_all()
+# 预先生成方块图集
+TileAtlas().build()
 menu_scene = MenuScene()
 SceneManager().add_scene(menu_scene)
 SceneManager().set_active_scene(menu_scene.name)
@@ -56,23 +62,54 @@ pygame.mixer.init()
 pygame.mixer.music.load(get_resource_path("resources/" + ResId.MUSIC_MAIN.value))
 pygame.mixer.music.play(loops=-1, fade_ms=1000)
 
+# 性能分析浮层
+profiler = Profiler()
+profiler_overlay = ProfilerOverlay()
+
 # 游戏主循环
 while GameConfig.RUNNING:
     # 控制帧率为60FPS
     clock.tick(GameConfig.FPS)
+    profiler.begin_frame()
     
     # 处理事件
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            GameConfig.RUNNING = False
-        SceneManager().input(event)
+    window_exposed = False
+    with profiler.scope("input"):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                GameConfig.RUNNING = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                window_exposed = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                # 切换性能分析浮层，浮层显示或隐藏后整屏重绘
+                profiler.set_enabled(not Profiler.enabled)
+                SceneManager().active_scene.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                profiler.export_chrome_trace()
+            SceneManager().input(event)
     # 更新场景
-    SceneManager().update()
-    # 渲染场景
-    screen.fill((0, 0, 0))
-    SceneManager().render()
-    # 更新显示
-    pygame.display.flip()
+    with profiler.scope("update"):
+        SceneManager().update()
+    # 渲染场景，场景返回本帧发生变化的矩形
+    with profiler.scope("render"):
+        dirty_rects = SceneManager().render()
+        overlay_rect = profiler_overlay.render(screen, clock.get_fps())
+        if overlay_rect is not None and dirty_rects is not None:
+            dirty_rects.append(overlay_rect)
+    # 更新显示：只更新变化的矩形，场景没有返回矩形或窗口需要重绘时更新整个窗口
+    with profiler.scope("display"):
+        if dirty_rects is None or window_exposed:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+    profiler.end_frame()
+
+# 退出当前场景，例如写入游戏中缓存的回放日志
+if SceneManager().active_scene is not None:
+    SceneManager().active_scene.exit()
+
+# 等待后台线程写完所有存档
+SaveWriter().flush()
 
 # 退出pygame
 pygame.quit()
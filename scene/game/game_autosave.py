@@ -0,0 +1,127 @@
+import json
+import os
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+from data.config import GameConfig
+
+if TYPE_CHECKING:
+    from scene.game.game_data import GameData
+    from scene.game.game_engine import GameEngine
+
+
+class GameAutoSave:
+    """
+    增量自动存档：基础快照(GameData) + 追加写入的增量记录
+
+    游戏事件已经写在回放日志中，增量记录只保存存档点的帧号、事件数和分数，
+    读档时从基础快照开始重新执行回放日志中的事件。每条增量记录都带有基础快照的代号(generation)，
+    基础快照在后台线程中写入，新代号的第一条增量记录会清空增量文件，
+    与磁盘上的快照代号不一致的记录会被忽略。
+    """
+
+    def __init__(self, file_path: str = GameConfig.SAVE_GAME_DATA_FILE_PATH):
+        """
+        初始化GameAutoSave对象
+
+        Args:
+            file_path: 基础快照文件路径，增量记录保存在同名的.delta文件中
+        """
+        self.file_path = file_path
+        self.delta_file_path = os.path.splitext(file_path)[0] + ".delta"
+        self.generation = 0  # 当前基础快照的代号
+        self.delta_count = 0  # 当前基础快照之后的增量记录数
+        self.has_snapshot = False
+
+    def save(self, game_engine: 'GameEngine', compact: bool = False) -> bool:
+        """
+        自动存档，增量记录攒够GameConfig.AUTO_SAVE_COMPACT_INTERVAL条后压缩为新的基础快照
+
+        Args:
+            game_engine: 游戏引擎
+            compact: 是否强制写入完整快照
+
+        Returns:
+            保存成功返回True，失败返回False
+        """
+        if (compact or not self.has_snapshot or game_engine.replay_journal is None
+                or self.delta_count >= GameConfig.AUTO_SAVE_COMPACT_INTERVAL):
+            return self.save_snapshot(game_engine)
+        return self.save_delta(game_engine)
+
+    def save_snapshot(self, game_engine: 'GameEngine') -> bool:
+        """在后台线程中写入完整的基础快照，之后的增量记录属于新的代号"""
+        from scene.game.game_data import GameData
+        game_data = GameData.from_game_engine(game_engine)
+        game_data.generation = self.generation + 1
+
+        def on_done(success: bool):
+            if not success:
+                # 快照写入失败，下次自动保存时重新写入完整快照
+                self.has_snapshot = False
+
+        game_data.save_to_file_async(self.file_path, on_done)
+        self.generation = game_data.generation
+        self.delta_count = 0
+        self.has_snapshot = True
+        return True
+
+    def save_delta(self, game_engine: 'GameEngine') -> bool:
+        """追加一条增量记录"""
+        record = {
+            'generation': self.generation,
+            'frame': game_engine.game_frame_counter.frame_count,
+            'event_count': game_engine.get_recorded_event_count(),
+            'score': game_engine.score
+        }
+        try:
+            # 新代号的第一条记录覆盖旧的增量文件
+            with open(self.delta_file_path, 'a' if self.delta_count > 0 else 'w', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"保存增量存档失败: {e}")
+            return False
+        self.delta_count += 1
+        return True
+
+    def load_snapshot(self) -> Optional['GameData']:
+        """读取基础快照，失败返回None"""
+        from core.save_writer import SaveWriter
+        from scene.game.game_data import GameData
+        # 等待还在写入的快照和增量记录，避免读到上一代存档
+        SaveWriter().flush()
+        game_data = GameData.load_from_file(self.file_path)
+        if game_data is not None:
+            self.generation = game_data.generation
+            self.delta_count = 0
+            self.has_snapshot = True
+        return game_data
+
+    def load_latest_delta(self) -> Optional[Dict[str, Any]]:
+        """读取属于当前基础快照的最后一条增量记录，没有时返回None"""
+        if not os.path.exists(self.delta_file_path):
+            return None
+        latest = None
+        self.delta_count = 0
+        with open(self.delta_file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                if record.get('generation') == self.generation:
+                    latest = record
+                    self.delta_count += 1
+        return latest
+
+    def remove(self):
+        """删除基础快照和增量记录"""
+        from core.save_writer import SaveWriter
+        # 等待还在写入的快照，避免删除后又被写回
+        SaveWriter().flush()
+        for path in (self.file_path, self.delta_file_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.generation = 0
+        self.delta_count = 0
+        self.has_snapshot = False
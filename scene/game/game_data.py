@@ -18,7 +18,9 @@ class GameData(Serializer['GameData']):
                 next_piece_queue: Optional[List[Piece]] = None,
                 game_frame_counter: Optional[GameFrameCounter] = None,
                 event_queue: Optional[List[GameEventCommand]] = None,
-                game_start_date: Optional[str] = None):
+                game_start_date: Optional[str] = None,
+                generation: int = 0,
+                event_count: int = 0):
         """
         初始化GameData对象
         
@@ -32,6 +34,8 @@ class GameData(Serializer['GameData']):
             game_frame_counter: 游戏帧计数器
             event_queue: 游戏事件队列
             game_start_date: 游戏开始日期
+            generation: 自动存档快照的代号
+            event_count: 存档时已记录的事件总数（包括回放日志中的事件）
         """
         self.map = map
         self.random_state = random_state
@@ -42,28 +46,36 @@ class GameData(Serializer['GameData']):
         self.game_frame_counter = game_frame_counter or GameFrameCounter()
         self.event_queue = event_queue or []
         self.game_start_date = game_start_date
+        self.generation = generation
+        self.event_count = event_count
     
     @classmethod
     def from_game_scene(cls, game_scene) -> 'GameData':
         """从GameScene对象创建GameData对象"""
-        # 直接使用Piece对象，利用其自身的序列化方法
-        current_piece = game_scene.current_piece
+        return cls.from_game_engine(game_scene.engine)
+
+    @classmethod
+    def from_game_engine(cls, game_engine) -> 'GameData':
+        """从GameEngine对象创建GameData对象，地图、方块和计时器都会复制一份，可以在后台线程中序列化"""
+        current_piece = game_engine.current_piece.copy() if game_engine.current_piece else None
         
         # 获取下一个方块队列
-        next_piece_queue = list(game_scene.next_piece_queue) if game_scene.next_piece_queue else []
+        next_piece_queue = [piece.copy() for piece in game_engine.next_piece_queue]
         # 获取游戏事件队列
-        event_queue = list(game_scene.event_queue) if game_scene.event_queue else []
+        event_queue = list(game_engine.event_queue) if game_engine.event_queue else []
         
+        frame_counter = game_engine.game_frame_counter
         return cls(
-            map=game_scene.map,
+            map=game_engine.map.copy(),
             random_state=PieceFactory().get_random_state(),
-            game_seed=game_scene.game_seed,
-            score=game_scene.score,
+            game_seed=game_engine.game_seed,
+            score=game_engine.score,
             current_piece=current_piece,
             next_piece_queue=next_piece_queue,
-            game_frame_counter=game_scene.game_frame_counter,
+            game_frame_counter=GameFrameCounter(frame_counter.frame_count, frame_counter.fps),
             event_queue=event_queue,
-            game_start_date=game_scene.game_start_date
+            game_start_date=game_engine.game_start_date,
+            event_count=game_engine.get_recorded_event_count()
         )
     
     def to_dict(self) -> Dict[str, Any]:
@@ -77,7 +89,9 @@ class GameData(Serializer['GameData']):
             'next_piece_queue': [piece.to_dict() for piece in self.next_piece_queue] if self.next_piece_queue else [],
             'game_frame_counter': self.game_frame_counter.to_dict() if self.game_frame_counter else None,
             'event_queue': [event.to_dict() for event in self.event_queue] if self.event_queue else [],
-            'game_start_date': self.game_start_date
+            'game_start_date': self.game_start_date,
+            'generation': self.generation,
+            'event_count': self.event_count
         }
     
     @classmethod
@@ -93,5 +107,7 @@ class GameData(Serializer['GameData']):
             next_piece_queue=[Piece.from_dict(piece_data) for piece_data in data['next_piece_queue']] if data.get('next_piece_queue') else [],
             game_frame_counter=GameFrameCounter.from_dict(data['game_frame_counter']) if data.get('game_frame_counter') else None,
             event_queue=[GameEventCommand.create_event_from_dict(event_data) for event_data in data.get('event_queue', [])],
-            game_start_date=data.get('game_start_date')
+            game_start_date=data.get('game_start_date'),
+            generation=data.get('generation', 0),
+            event_count=data.get('event_count', 0)
         )
@@ -0,0 +1,409 @@
+import bisect
+from collections import deque
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, TYPE_CHECKING
+
+from data.config import GameConfig
+from data.map import Map
+from data.piece import Piece
+from core.piece_factory import PieceFactory
+from core.random_seed_generator import RandomSeedGenerator
+from scene.game.game_frame_counter import GameFrameCounter
+from scene.game.game_keyframe import GameKeyframe
+from tools.profiler import profiled
+
+if TYPE_CHECKING:
+    from scene.game.game_event import GameEventCommand
+    from scene.game.game_data import GameData
+    from scene.game.game_replay_data import GameReplayData
+    from scene.game.game_replay_journal import ReplayJournal
+
+
+class GameEngine:
+    """
+    无界面的游戏规则核心
+
+    持有地图、当前方块、方块预览队列、分数和事件记录，按帧推进，
+    不依赖显示、时钟和资源管理器，可用于回放校验、机器人和无显示环境下的压力测试。
+    GameScene只负责输入、定时和渲染，游戏规则全部委托给GameEngine。
+    """
+
+    def __init__(self, width: int = 30, height: int = 20):
+        """
+        初始化GameEngine对象
+
+        Args:
+            width: 地图宽度（网格数）
+            height: 地图高度（网格数）
+        """
+        self.map = Map(width, height)
+        self.game_seed: Optional[int] = None
+        self.game_start_date: Optional[str] = None
+        self.score = 0
+        self.current_piece: Optional[Piece] = None
+        self.next_piece_queue: deque[Piece] = deque()
+        self.game_frame_counter = GameFrameCounter()
+        self.event_queue: deque['GameEventCommand'] = deque()  # 非回放模式下记录的、尚未写入回放日志的事件
+        # 回放日志，设置后记录的事件直接追加到日志中，不在内存中保留
+        self.replay_journal: Optional['ReplayJournal'] = None
+        self.is_game_over = False
+
+        # 回放相关
+        self.is_replay = False
+        self.replay_events: Sequence['GameEventCommand'] = []  # 回放的全部事件
+        self.replay_event_frames: List[int] = []  # 回放事件的帧号，用于跳转时二分查找
+        self.replay_cursor = 0  # 下一个待执行的回放事件下标
+        # 关键帧（按帧号排序），只在回放播放和跳转时每隔keyframe_interval帧生成一次，
+        # 超过GameConfig.REPLAY_MAX_KEYFRAMES个时间隔加倍
+        self.keyframes: List[GameKeyframe] = []
+        self.keyframe_interval = GameConfig.REPLAY_KEYFRAME_INTERVAL
+        self.keyframes_changed = False  # 加载回放之后是否生成了新的关键帧，供调用者写回重放文件
+
+        # 游戏结束时的回调（例如停止定时器、保存回放），回放模式下不触发
+        self.on_game_over: Optional[Callable[[], None]] = None
+
+        self._reset_spawn_position()
+
+    def _reset_spawn_position(self):
+        """根据地图大小计算新方块的出生位置和预览队列长度"""
+        self.current_piece_dx = self.map.width // 2
+        self.current_piece_dy = 0
+        self.next_piece_length = self.map.height // 5
+
+    def _create_random_piece(self) -> Piece:
+        """在出生位置创建一个随机方块"""
+        return PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy)
+
+    def _spawn_pieces(self):
+        """创建当前方块和方块预览队列"""
+        self.current_piece = self._create_random_piece()
+        self.next_piece_queue = deque(self._create_random_piece() for _ in range(self.next_piece_length))
+
+    def new_game(self, game_seed: Optional[int] = None, game_start_date: Optional[str] = None):
+        """
+        开始新游戏
+
+        Args:
+            game_seed: 游戏种子，默认基于当前时间生成
+            game_start_date: 游戏开始日期，默认为当前时间
+        """
+        self.is_replay = False
+        self.is_game_over = False
+        self.score = 0
+        self.map.initialize_map()
+        self.game_seed = game_seed if game_seed is not None else RandomSeedGenerator.generate_seed()
+        PieceFactory().set_seed(self.game_seed)
+        self._spawn_pieces()
+        self.game_frame_counter.reset()
+        self.game_start_date = game_start_date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.event_queue.clear()
+        # 游戏进行中不生成关键帧，回放时再按需生成
+        self.keyframes = []
+
+    def load_game_data(self, game_data: 'GameData') -> bool:
+        """从GameData恢复游戏状态"""
+        # 恢复游戏地图和状态
+        if game_data.map is None:
+            print("游戏数据中没有地图，加载失败")
+            return False
+        # 恢复随机数种子和随机数状态
+        if game_data.game_seed is None:
+            print("游戏数据中没有随机数种子，加载失败")
+            return False
+        if game_data.random_state is None:
+            print("游戏数据中没有随机数状态，加载失败")
+            return False
+        # 恢复游戏分数
+        if game_data.score is None:
+            print("游戏数据中没有分数，加载失败")
+            return False
+        # 恢复当前方块
+        if game_data.current_piece is None:
+            print("游戏数据中没有当前方块，加载失败")
+            return False
+        # 恢复方块预览队列
+        if game_data.next_piece_queue is None:
+            print("游戏数据中没有方块预览队列，加载失败")
+            return False
+        # 恢复游戏帧计数器
+        if game_data.game_frame_counter is None:
+            print("游戏数据中没有游戏帧计数器，加载失败")
+            return False
+        # 恢复游戏事件队列
+        if game_data.event_queue is None:
+            print("游戏数据中没有游戏事件队列，加载失败")
+            return False
+
+        self.is_replay = False
+        self.is_game_over = False
+        self.map = game_data.map
+        self._reset_spawn_position()
+        self.game_seed = game_data.game_seed
+        PieceFactory().set_seed(self.game_seed)
+        PieceFactory().set_random_state(game_data.random_state)
+        self.score = game_data.score
+        self.current_piece = game_data.current_piece
+        self.next_piece_queue = deque(game_data.next_piece_queue)
+        self.next_piece_length = len(self.next_piece_queue)
+        self.game_frame_counter = game_data.game_frame_counter
+        self.event_queue = deque(game_data.event_queue)
+        # 存档之前的关键帧无法恢复，回放时会在播放过程中补齐
+        self.keyframes = []
+        if game_data.game_start_date is not None:
+            self.game_start_date = game_data.game_start_date
+        return True
+
+    def load_replay_data(self, game_replay_data: 'GameReplayData') -> bool:
+        """从GameReplayData加载回放，并回到回放的第0帧"""
+        # 恢复游戏地图大小
+        if game_replay_data.map_size is None:
+            print("游戏重放数据中没有地图，加载失败")
+            return False
+        # 恢复游戏开始日期
+        if game_replay_data.game_start_date is None:
+            print("游戏重放数据中没有开始日期，加载失败")
+            return False
+        # 恢复随机数种子
+        if game_replay_data.game_seed is None:
+            print("游戏重放数据中没有随机数种子，加载失败")
+            return False
+        # 恢复游戏事件队列
+        if game_replay_data.event_queue is None:
+            print("游戏重放数据中没有游戏事件队列，加载失败")
+            return False
+
+        self.map = Map(game_replay_data.map_size[0], game_replay_data.map_size[1])
+        self._reset_spawn_position()
+        self.game_start_date = game_replay_data.game_start_date
+        self.game_seed = game_replay_data.game_seed
+        from scene.game.game_replay_codec import ReplayEventList
+        if isinstance(game_replay_data.event_queue, ReplayEventList):
+            # 二进制重放的事件对象在播放到时才创建，帧号直接使用解码得到的列表
+            self.replay_events = game_replay_data.event_queue
+            self.replay_event_frames = game_replay_data.event_queue.frames
+        else:
+            self.replay_events = list(game_replay_data.event_queue)
+            self.replay_event_frames = [event.frame for event in self.replay_events]
+        self.keyframes = sorted(game_replay_data.keyframes, key=lambda keyframe: keyframe.frame)
+        self.keyframe_interval = GameConfig.REPLAY_KEYFRAME_INTERVAL
+        self._limit_keyframes()
+        self.restart_replay()
+        # 第0帧的关键帧随时可以重新生成，只有播放中生成了其他关键帧才需要写回
+        self.keyframes_changed = False
+        return True
+
+    def restart_replay(self):
+        """回到回放的第0帧"""
+        self.is_replay = True
+        self.is_game_over = False
+        self.score = 0
+        self.map.initialize_map()
+        PieceFactory().set_seed(self.game_seed)
+        self._spawn_pieces()
+        self.game_frame_counter.reset()
+        self.event_queue.clear()
+        self.replay_cursor = 0
+        self._capture_keyframe()
+
+    @property
+    def is_replay_over(self) -> bool:
+        """回放是否已经结束（事件全部执行完毕或游戏结束）"""
+        return self.is_game_over or self.replay_cursor >= len(self.replay_events)
+
+    def step_replay(self) -> bool:
+        """
+        回放模式下推进一帧，并执行该帧及之前的所有事件
+
+        Returns:
+            bool: 回放是否已经结束
+        """
+        self.game_frame_counter.tick()
+        frame = self.game_frame_counter.frame_count
+        if frame % self.keyframe_interval == 0:
+            # 回放文件中缺少的关键帧在播放过程中补齐
+            self._capture_keyframe()
+        self._execute_replay_events(frame)
+        return self.is_replay_over
+
+    def _execute_replay_events(self, frame: int):
+        """执行帧号不大于frame的所有待执行回放事件"""
+        events = self.replay_events
+        event_frames = self.replay_event_frames
+        while self.replay_cursor < len(events) and event_frames[self.replay_cursor] <= frame and not self.is_game_over:
+            event = events[self.replay_cursor]
+            self.replay_cursor += 1
+            event.execute(self)
+
+    def seek_replay(self, frame: int):
+        """
+        跳转到回放的指定帧（帧号不大于frame的事件全部执行完毕）
+
+        从不晚于目标帧的最近关键帧恢复状态，之后最多重新模拟一个关键帧间隔；
+        向后跳转且当前位置已经比最近的关键帧更近时，直接从当前位置继续模拟
+        """
+        frame = max(0, frame)
+        current_frame = self.game_frame_counter.frame_count
+        keyframe_frames = [keyframe.frame for keyframe in self.keyframes]
+        index = bisect.bisect_right(keyframe_frames, frame) - 1
+        if current_frame <= frame and (index < 0 or keyframe_frames[index] <= current_frame):
+            pass
+        elif index < 0:
+            self.restart_replay()
+            self._execute_replay_events(0)
+        else:
+            self._restore_keyframe(self.keyframes[index])
+            self._execute_replay_events(self.game_frame_counter.frame_count)
+        while self.game_frame_counter.frame_count < frame and not self.is_replay_over:
+            self.step_replay()
+
+    def _capture_keyframe(self):
+        """保存当前状态为关键帧，同一帧只保存一次"""
+        frame = self.game_frame_counter.frame_count
+        random_draws = PieceFactory().get_draw_count()
+        if random_draws is None:
+            return
+        keyframe_frames = [keyframe.frame for keyframe in self.keyframes]
+        index = bisect.bisect_left(keyframe_frames, frame)
+        if index < len(keyframe_frames) and keyframe_frames[index] == frame:
+            return
+        self.keyframes.insert(index, GameKeyframe(
+            frame=frame,
+            map_cells=self.map.get_cells(),
+            current_piece=self.current_piece.copy() if self.current_piece else None,
+            next_piece_queue=[piece.copy() for piece in self.next_piece_queue],
+            random_draws=random_draws,
+            score=self.score
+        ))
+        self.keyframes_changed = True
+        self._limit_keyframes()
+
+    def _limit_keyframes(self):
+        """关键帧超过GameConfig.REPLAY_MAX_KEYFRAMES个时，间隔加倍并只保留帧号是新间隔整数倍的关键帧"""
+        while len(self.keyframes) > GameConfig.REPLAY_MAX_KEYFRAMES:
+            self.keyframe_interval *= 2
+            self.keyframes = [keyframe for keyframe in self.keyframes if keyframe.frame % self.keyframe_interval == 0]
+
+    def _restore_keyframe(self, keyframe: GameKeyframe):
+        """从关键帧恢复回放状态"""
+        self.map.set_cells(keyframe.map_cells)
+        self.current_piece = keyframe.current_piece.copy() if keyframe.current_piece else None
+        self.next_piece_queue = deque(piece.copy() for piece in keyframe.next_piece_queue)
+        PieceFactory().restore_draw_count(self.game_seed, keyframe.random_draws)
+        self.score = keyframe.score
+        self.is_game_over = False
+        self.game_frame_counter.frame_count = keyframe.frame
+        self.replay_cursor = bisect.bisect_left(self.replay_event_frames, keyframe.frame)
+
+    def run_replay(self) -> int:
+        """
+        一次性执行完整个回放
+
+        Returns:
+            int: 回放结束时的分数
+        """
+        while not self.is_replay_over:
+            self.step_replay()
+        return self.score
+
+    def tick(self):
+        """非回放模式下推进一帧"""
+        self.game_frame_counter.tick()
+
+    def record_event(self, event: 'GameEventCommand'):
+        """记录一个游戏事件，回放模式下不记录"""
+        if self.is_replay:
+            return
+        if self.replay_journal is not None:
+            self.replay_journal.append(event)
+        else:
+            self.event_queue.append(event)
+
+    def get_recorded_event_count(self) -> int:
+        """获取本局已记录的事件总数"""
+        count = len(self.event_queue)
+        if self.replay_journal is not None:
+            count += self.replay_journal.event_count + len(self.replay_journal.pending_events)
+        return count
+
+    def apply_events(self, events: List['GameEventCommand'], frame: int):
+        """
+        在当前状态上依次执行已记录的事件并推进到frame帧，用于从增量存档恢复
+
+        执行期间按回放处理，事件不会被重复记录，也不会触发游戏结束回调
+        """
+        is_replay = self.is_replay
+        self.is_replay = True
+        try:
+            for event in events:
+                self.game_frame_counter.frame_count = event.frame
+                event.execute(self)
+        finally:
+            self.is_replay = is_replay
+        self.game_frame_counter.frame_count = frame
+
+    def get_recorded_events(self) -> List['GameEventCommand']:
+        """获取本局记录的全部事件（包括已写入回放日志的事件）"""
+        if self.replay_journal is not None:
+            return self.replay_journal.read_events() + list(self.event_queue)
+        return list(self.event_queue)
+
+    def try_move_piece(self, dx: int, dy: int, callback: Optional[Callable] = None) -> bool:
+        """尝试移动当前方块，移动失败时调用callback"""
+        if self.current_piece:
+            self.current_piece.move(dx, dy)
+            if self.current_piece.collides(self.map):
+                self.current_piece.move(-dx, -dy)  # 撤销移动
+                if callback:
+                    callback()
+                return False
+            if not self.is_replay:
+                from scene.game.game_event import MoveEventCommand
+                self.record_event(MoveEventCommand(self.game_frame_counter.frame_count, dx, dy))
+            return True
+        return False
+
+    def try_rotate_piece(self) -> bool:
+        """尝试旋转当前方块"""
+        if self.current_piece:
+            self.current_piece.rotate()
+            if self.current_piece.collides(self.map):
+                self.current_piece.rotate_counterclockwise()  # 撤销旋转
+                return False
+            if not self.is_replay:
+                from scene.game.game_event import RotateEventCommand
+                self.record_event(RotateEventCommand(self.game_frame_counter.frame_count))
+            return True
+        return False
+
+    @profiled()
+    def lock_piece(self):
+        """锁定当前方块到地图"""
+        if not self.is_replay:
+            from scene.game.game_event import LockPieceEventCommand
+            self.record_event(LockPieceEventCommand(self.game_frame_counter.frame_count))
+        if self.current_piece:
+            reached_top = False
+            for x, y in self.current_piece.get_block_positions():
+                # 方块超出顶部，游戏结束
+                if y == 0:
+                    reached_top = True
+                self.map.set_tile(x, y, self.current_piece.type)
+            if reached_top:
+                self._game_over()
+            # 游戏结束后不再生成新的方块
+            if self.is_game_over:
+                return
+
+            self.current_piece = self.next_piece_queue.popleft()
+            self.next_piece_queue.append(self._create_random_piece())
+            # 检查并清除完整的行
+            clear_count = self.map.check_and_clear_lines()
+            # 更新分数
+            if clear_count > 0:
+                self.score += clear_count * 100
+
+    def _game_over(self):
+        """处理游戏结束逻辑"""
+        self.is_game_over = True
+        if not self.is_replay and self.on_game_over:
+            self.on_game_over()
@@ -1,15 +1,17 @@
-from typing import Any, Dict
+from typing import Any, Dict, TYPE_CHECKING
 from core.command import Command
 from core.serializer import Serializer
 
+if TYPE_CHECKING:
+    from scene.game.game_engine import GameEngine
+
 class GameEventCommand(Command, Serializer['GameEventCommand']):
     """游戏事件基类，定义了游戏事件的基本接口"""
-    from scene.game.game_scene import GameScene
     def __init__(self, frame: int, type: str):
         super().__init__(frame)
         self.type = type
 
-    def execute(self, game_scene: 'GameScene'):
+    def execute(self, game_engine: 'GameEngine'):
         pass
 
     def to_dict(self) -> Dict[str, Any]:
@@ -47,15 +49,14 @@ class GameEventCommand(Command, Serializer['GameEventCommand']):
             return GameEventCommand.from_dict(data)
 
 class MoveEventCommand(GameEventCommand):
-    from scene.game.game_scene import GameScene
     """移动事件"""
     def __init__(self, frame: int, dx: int, dy: int):
         super().__init__(frame, "move")
         self.dx = dx
         self.dy = dy
 
-    def execute(self, game_scene: 'GameScene'):
-        game_scene._try_move_piece(self.dx, self.dy)
+    def execute(self, game_engine: 'GameEngine'):
+        game_engine.try_move_piece(self.dx, self.dy)
 
     def to_dict(self) -> Dict[str, Any]:
             return {
@@ -73,13 +74,12 @@ class MoveEventCommand(GameEventCommand):
         return cls(frame, dx, dy)
     
 class RotateEventCommand(GameEventCommand):
-    from scene.game.game_scene import GameScene
     """旋转事件"""
     def __init__(self, frame: int):
         super().__init__(frame, "rotate")
 
-    def execute(self, game_scene: 'GameScene'):
-        game_scene._try_rotate_piece()
+    def execute(self, game_engine: 'GameEngine'):
+        game_engine.try_rotate_piece()
 
     def to_dict(self) -> Dict[str, Any]:
             return {
@@ -93,13 +93,12 @@ class RotateEventCommand(GameEventCommand):
         return cls(frame)
 
 class LockPieceEventCommand(GameEventCommand):
-    from scene.game.game_scene import GameScene
     """锁定事件"""
     def __init__(self, frame: int):
         super().__init__(frame, "lock_piece")
 
-    def execute(self, game_scene: 'GameScene'):
-        game_scene._lock_piece()
+    def execute(self, game_engine: 'GameEngine'):
+        game_engine.lock_piece()
 
     def to_dict(self) -> Dict[str, Any]:
             return {
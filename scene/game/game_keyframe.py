@@ -0,0 +1,61 @@
+import base64
+from typing import Any, Dict, List, Optional
+from core.serializer import Serializer
+from data.piece import Piece
+
+
+class GameKeyframe(Serializer['GameKeyframe']):
+    """
+    回放关键帧，保存某一帧开始时（帧号小于frame的事件已全部执行）的完整游戏状态
+
+    回放跳转时从不晚于目标帧的最近关键帧恢复，只需重新模拟不超过一个关键帧间隔的帧
+    """
+
+    def __init__(self,
+                frame: int,
+                map_cells: bytes,
+                current_piece: Optional[Piece],
+                next_piece_queue: List[Piece],
+                random_draws: int,
+                score: int):
+        """
+        初始化GameKeyframe对象
+
+        Args:
+            frame: 关键帧所在的帧号
+            map_cells: 地图快照（Map.get_cells的返回值）
+            current_piece: 当前方块
+            next_piece_queue: 方块预览队列
+            random_draws: 设置种子之后生成的随机方块数量（PieceFactory.get_draw_count的返回值），
+                与游戏种子一起确定随机数状态，比完整的随机数状态小得多
+            score: 游戏分数
+        """
+        self.frame = frame
+        self.map_cells = map_cells
+        self.current_piece = current_piece
+        self.next_piece_queue = next_piece_queue
+        self.random_draws = random_draws
+        self.score = score
+
+    def to_dict(self) -> Dict[str, Any]:
+        """将GameKeyframe对象转换为字典，用于序列化"""
+        return {
+            'frame': self.frame,
+            'map_cells': base64.b64encode(self.map_cells).decode('ascii'),
+            'current_piece': self.current_piece.to_dict() if self.current_piece else None,
+            'next_piece_queue': [piece.to_dict() for piece in self.next_piece_queue],
+            'random_draws': self.random_draws,
+            'score': self.score
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GameKeyframe':
+        """从字典创建GameKeyframe对象，用于反序列化"""
+        return cls(
+            frame=data['frame'],
+            map_cells=base64.b64decode(data['map_cells']),
+            current_piece=Piece.from_dict(data['current_piece']) if data.get('current_piece') else None,
+            next_piece_queue=[Piece.from_dict(piece_data) for piece_data in data.get('next_piece_queue', [])],
+            random_draws=data['random_draws'],
+            score=data.get('score', 0)
+        )
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+from typing import Any, Dict, List
+
+from data.config import GameConfig
+from scene.game.game_replay_index import GameReplayIndex
+from scene.game.game_replay_store import GameReplayStore
+
+# 可选的排序字段：名称 -> 数据库列
+SORT_COLUMNS: Dict[str, str] = {
+    'score': 'score',
+    'start_date': 'game_start_date',
+    'game_time': 'duration'
+}
+
+
+def parse_game_time(game_time: str) -> int:
+    """将GameFrameCounter.get_time_parts格式的用时（HH:MM:SS、MM:SS或SS）转换为秒数"""
+    seconds = 0
+    for part in (game_time or "").split(":"):
+        if not part.isdigit():
+            return 0
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+class GameLeaderboard:
+    """
+    基于SQLite的排行榜
+
+    数据来自重放索引，打开排行榜时只在索引文件变化后按文件名和修改时间增量同步；
+    分数、开始日期和用时都建有索引，每次只查询当前显示的一页
+    """
+
+    def __init__(self, db_file_path: str = GameConfig.SAVE_LEADERBOARD_DB_FILE_PATH):
+        """
+        初始化GameLeaderboard对象
+
+        Args:
+            db_file_path: 数据库文件路径
+        """
+        directory = os.path.dirname(db_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_file_path)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(replays)")]
+        if columns and 'replay_id' not in columns:
+            # 旧版数据库没有编号列，数据都来自重放索引，直接重建
+            self.connection.executescript("DROP TABLE replays; DROP TABLE IF EXISTS meta;")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS replays (
+                file_name TEXT PRIMARY KEY,
+                replay_id INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                score INTEGER NOT NULL,
+                game_finished_time TEXT NOT NULL,
+                duration INTEGER NOT NULL,
+                game_start_date TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_replays_score ON replays (score, replay_id);
+            CREATE INDEX IF NOT EXISTS idx_replays_start_date ON replays (game_start_date, replay_id);
+            CREATE INDEX IF NOT EXISTS idx_replays_duration ON replays (duration, replay_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+
+    def sync_if_changed(self, replay_data_path: str = GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH) -> int:
+        """
+        重放目录或索引文件的修改时间、索引文件的大小与上次同步时不同才读取索引并同步，
+        没有变化时不遍历重放目录和数据库，打开排行榜的开销只与查询的页数有关；
+        目录中的重放文件被添加、删除或替换时目录的修改时间会变化，即使索引没有重新写入
+
+        Args:
+            replay_data_path: 重放文件目录
+
+        Returns:
+            插入、更新和删除的记录数
+        """
+        from core.save_writer import SaveWriter
+        # 等待后台还没写完的重放和索引，刚结束的一局才能出现在排行榜上
+        SaveWriter().flush()
+        index_file_path = GameReplayIndex.get_index_file_path(replay_data_path)
+        try:
+            directory_stat = os.stat(replay_data_path)
+            stat = os.stat(index_file_path)
+            signature = (f"{os.path.abspath(replay_data_path)}:{directory_stat.st_mtime_ns}:"
+                         f"{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            # 没有索引文件时由GameReplayIndex.load扫描目录后创建
+            signature = None
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'index_signature'").fetchone()
+        if signature is not None and row is not None and row[0] == signature:
+            return 0
+        changes = self.sync(GameReplayIndex.load(replay_data_path))
+        if signature is not None:
+            with self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('index_signature', ?)", (signature,))
+        return changes
+
+    def sync(self, index: GameReplayIndex) -> int:
+        """
+        与重放索引同步，只写入有变化的记录
+
+        Returns:
+            插入、更新和删除的记录数
+        """
+        existing = dict(self.connection.execute("SELECT file_name, mtime FROM replays"))
+        upserts = [
+            (file_name, GameReplayStore.get_replay_id(file_name), entry['mtime'], entry['score'], entry['game_finished_time'] or "",
+             parse_game_time(entry['game_finished_time']), entry['game_start_date'] or "")
+            for file_name, entry in index.entries.items()
+            if existing.get(file_name) != entry['mtime']
+        ]
+        deletes = [(file_name,) for file_name in existing if file_name not in index.entries]
+        if upserts or deletes:
+            with self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO replays VALUES (?, ?, ?, ?, ?, ?, ?)", upserts)
+                self.connection.executemany("DELETE FROM replays WHERE file_name = ?", deletes)
+        return len(upserts) + len(deletes)
+
+    def count(self) -> int:
+        """获取记录总数"""
+        return self.connection.execute("SELECT COUNT(*) FROM replays").fetchone()[0]
+
+    def get_page(self, page: int, page_size: int, sort_key: str = 'score', descending: bool = True) -> List[Dict[str, Any]]:
+        """
+        查询一页记录
+
+        Args:
+            page: 页码，从0开始
+            page_size: 每页记录数
+            sort_key: 排序字段，见SORT_COLUMNS
+            descending: 是否降序
+
+        Returns:
+            记录列表，格式与RankScene.game_records一致，额外包含rank字段
+        """
+        column = SORT_COLUMNS[sort_key]
+        order = "DESC" if descending else "ASC"
+        offset = page * page_size
+        rows = self.connection.execute(
+            f"SELECT file_name, score, game_finished_time, game_start_date FROM replays "
+            f"ORDER BY {column} {order}, replay_id {order} LIMIT ? OFFSET ?",
+            (page_size, offset)
+        )
+        replay_data_path = GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH
+        return [
+            {
+                'rank': offset + i + 1,
+                'file_name': file_name,
+                'file_path': os.path.join(replay_data_path, file_name),
+                'score': score,
+                'game_time': game_finished_time,
+                'start_date': game_start_date
+            }
+            for i, (file_name, score, game_finished_time, game_start_date) in enumerate(rows)
+        ]
+
+    def close(self):
+        """关闭数据库连接"""
+        self.connection.close()
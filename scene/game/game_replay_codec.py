@@ -0,0 +1,335 @@
+"""
+回放二进制编解码器 - 将GameReplayData编码为紧凑的二进制格式
+
+文件格式（整数均为无符号LEB128变长整数，有符号整数先做zigzag编码）：
+    魔数 b"TRPL" | 版本号(1字节)
+    地图宽 | 地图高 | 分数 | 种子(zigzag) | 文件索引
+    开始时间(长度+UTF-8) | 用时(长度+UTF-8)
+    事件数量 | 事件...
+    关键帧段（版本2起）：段版本 | 关键帧数量 | 关键帧...
+
+每个事件以一个变长整数开头：(与上一个事件的帧差 << 4) | 操作码，
+常见的移动/旋转/锁定事件只占1到2个字节。解码时只保存每个事件的帧号和操作码（ReplayEventList），
+事件对象在第一次访问时才创建。
+
+每个关键帧：与上一个关键帧的帧差 | 分数 | 随机方块数 | 当前方块 | 预览数量 | 预览方块... | 地图(长度+zlib压缩的各行方块编码)，
+方块：类型编码+1（0表示没有方块，之后的字段省略） | 旋转 | x(zigzag) | y(zigzag)。
+关键帧只是跳转用的缓存，段版本不认识时忽略整个关键帧段，回放时按需重建。
+"""
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from data.map import TILE_CODES, TILE_TYPES
+from data.piece import Piece
+from scene.game.game_event import GameEventCommand, LockPieceEventCommand, MoveEventCommand, RotateEventCommand
+from scene.game.game_keyframe import GameKeyframe
+from scene.game.game_replay_data import GameReplayData
+
+REPLAY_MAGIC = b"TRPL"
+REPLAY_VERSION = 2
+KEYFRAME_SECTION_VERSION = 1
+
+_OPCODE_BITS = 4
+_OPCODE_MASK = (1 << _OPCODE_BITS) - 1
+_OP_ROTATE = 0
+_OP_LOCK_PIECE = 1
+_OP_MOVE_BASE = 2  # 2..10：dx、dy均在[-1, 1]内的移动事件
+_OP_MOVE = 14  # 其他移动事件，后跟zigzag编码的dx、dy
+_OP_GENERIC = 15  # 未知类型的事件，后跟类型字符串
+
+
+def is_binary_replay(data: bytes) -> bool:
+    """判断数据是否为二进制回放格式"""
+    return data[:len(REPLAY_MAGIC)] == REPLAY_MAGIC
+
+
+def zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def write_str(out: bytearray, value: str):
+    raw = (value or "").encode('utf-8')
+    write_varint(out, len(raw))
+    out += raw
+
+
+def read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    length, pos = read_varint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise IndexError("字符串越界")
+    return data[pos:end].decode('utf-8'), end
+
+
+def encode_events(events: List[GameEventCommand], out: bytearray):
+    """编码事件列表，帧号按差值编码，事件的帧号必须单调不减"""
+    write_varint(out, len(events))
+    last_frame = 0
+    for event in events:
+        delta = event.frame - last_frame
+        if delta < 0:
+            raise ValueError(f"事件帧号不是单调递增的：{event.frame}")
+        last_frame = event.frame
+        if isinstance(event, MoveEventCommand):
+            if -1 <= event.dx <= 1 and -1 <= event.dy <= 1:
+                write_varint(out, (delta << _OPCODE_BITS) | (_OP_MOVE_BASE + (event.dx + 1) * 3 + event.dy + 1))
+            else:
+                write_varint(out, (delta << _OPCODE_BITS) | _OP_MOVE)
+                write_varint(out, zigzag(event.dx))
+                write_varint(out, zigzag(event.dy))
+        elif isinstance(event, RotateEventCommand):
+            write_varint(out, (delta << _OPCODE_BITS) | _OP_ROTATE)
+        elif isinstance(event, LockPieceEventCommand):
+            write_varint(out, (delta << _OPCODE_BITS) | _OP_LOCK_PIECE)
+        else:
+            write_varint(out, (delta << _OPCODE_BITS) | _OP_GENERIC)
+            write_str(out, event.type)
+
+
+class ReplayEventList(Sequence[GameEventCommand]):
+    """
+    从二进制格式解码的事件列表
+
+    只保存每个事件的帧号和操作码，事件对象在第一次访问时才创建并缓存；
+    加载重放时（例如索引只需要分数）不再为每个事件创建对象，回放时按播放进度逐个创建
+    """
+
+    def __init__(self, frames: List[int], opcodes: bytearray, operands: Dict[int, Union[Tuple[int, int], str]]):
+        """
+        初始化ReplayEventList对象
+
+        Args:
+            frames: 每个事件的帧号，单调不减，回放时直接用于二分查找
+            opcodes: 每个事件的操作码
+            operands: 事件下标 -> 带参数的操作码的参数（_OP_MOVE为(dx, dy)，_OP_GENERIC为事件类型）
+        """
+        self.frames = frames
+        self._opcodes = opcodes
+        self._operands = operands
+        self._events: List[Optional[GameEventCommand]] = [None] * len(frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.frames)))]
+        event = self._events[index]
+        if event is None:
+            if index < 0:
+                index += len(self.frames)
+            event = self._create_event(index)
+            self._events[index] = event
+        return event
+
+    def _create_event(self, index: int) -> GameEventCommand:
+        """创建第index个事件对象"""
+        frame = self.frames[index]
+        opcode = self._opcodes[index]
+        if opcode == _OP_ROTATE:
+            return RotateEventCommand(frame)
+        if opcode == _OP_LOCK_PIECE:
+            return LockPieceEventCommand(frame)
+        if opcode == _OP_MOVE:
+            dx, dy = self._operands[index]
+            return MoveEventCommand(frame, dx, dy)
+        if opcode == _OP_GENERIC:
+            return GameEventCommand(frame, self._operands[index])
+        dx, dy = divmod(opcode - _OP_MOVE_BASE, 3)
+        return MoveEventCommand(frame, dx - 1, dy - 1)
+
+
+def decode_events(data: bytes, pos: int) -> Tuple[List[GameEventCommand], int]:
+    """解码事件列表，返回事件对象列表和新的读取位置"""
+    events, pos = decode_event_list(data, pos)
+    return list(events), pos
+
+
+def decode_event_list(data: bytes, pos: int) -> Tuple[ReplayEventList, int]:
+    """解码事件列表，返回按需创建事件对象的ReplayEventList和新的读取位置"""
+    count, pos = read_varint(data, pos)
+    frames = [0] * count
+    opcodes = bytearray(count)
+    operands = {}
+    frame = 0
+    for i in range(count):
+        # 帧差小于8的事件占1个字节，小于1024的占2个字节，跳过通用的变长整数解码
+        token = data[pos]
+        if token < 0x80:
+            pos += 1
+        else:
+            second = data[pos + 1]
+            if second < 0x80:
+                token = (token & 0x7F) | (second << 7)
+                pos += 2
+            else:
+                token, pos = read_varint(data, pos)
+        frame += token >> _OPCODE_BITS
+        frames[i] = frame
+        opcode = token & _OPCODE_MASK
+        opcodes[i] = opcode
+        if opcode >= _OP_MOVE_BASE + 9:
+            if opcode == _OP_MOVE:
+                dx, pos = read_varint(data, pos)
+                dy, pos = read_varint(data, pos)
+                operands[i] = (unzigzag(dx), unzigzag(dy))
+            elif opcode == _OP_GENERIC:
+                operands[i], pos = read_str(data, pos)
+            else:
+                raise ValueError(f"未知的事件操作码：{opcode}")
+    return ReplayEventList(frames, opcodes, operands), pos
+
+
+def write_piece(out: bytearray, piece: Optional[Piece]):
+    if piece is None:
+        write_varint(out, 0)
+        return
+    write_varint(out, TILE_CODES[piece.type] + 1)
+    write_varint(out, piece.rotation)
+    write_varint(out, zigzag(piece.x))
+    write_varint(out, zigzag(piece.y))
+
+
+def read_piece(data: bytes, pos: int) -> Tuple[Optional[Piece], int]:
+    code, pos = read_varint(data, pos)
+    if code == 0:
+        return None, pos
+    if code > len(TILE_TYPES):
+        raise ValueError(f"未知的方块类型编码：{code - 1}")
+    rotation, pos = read_varint(data, pos)
+    x, pos = read_varint(data, pos)
+    y, pos = read_varint(data, pos)
+    return Piece(unzigzag(x), unzigzag(y), TILE_TYPES[code - 1], rotation), pos
+
+
+def encode_keyframes(keyframes: List[GameKeyframe], out: bytearray):
+    """编码关键帧段，关键帧必须按帧号排序"""
+    write_varint(out, KEYFRAME_SECTION_VERSION)
+    write_varint(out, len(keyframes))
+    last_frame = 0
+    for keyframe in keyframes:
+        write_varint(out, keyframe.frame - last_frame)
+        last_frame = keyframe.frame
+        write_varint(out, keyframe.score)
+        write_varint(out, keyframe.random_draws)
+        write_piece(out, keyframe.current_piece)
+        write_varint(out, len(keyframe.next_piece_queue))
+        for piece in keyframe.next_piece_queue:
+            write_piece(out, piece)
+        map_data = zlib.compress(keyframe.map_cells)
+        write_varint(out, len(map_data))
+        out += map_data
+
+
+def decode_keyframes(data: bytes, pos: int, cell_count: int) -> Tuple[List[GameKeyframe], int]:
+    """解码关键帧段，段版本不认识时返回空列表"""
+    section_version, pos = read_varint(data, pos)
+    if section_version != KEYFRAME_SECTION_VERSION:
+        return [], len(data)
+    count, pos = read_varint(data, pos)
+    keyframes = []
+    frame = 0
+    for _ in range(count):
+        delta, pos = read_varint(data, pos)
+        frame += delta
+        score, pos = read_varint(data, pos)
+        random_draws, pos = read_varint(data, pos)
+        current_piece, pos = read_piece(data, pos)
+        queue_length, pos = read_varint(data, pos)
+        next_piece_queue = []
+        for _ in range(queue_length):
+            piece, pos = read_piece(data, pos)
+            next_piece_queue.append(piece)
+        length, pos = read_varint(data, pos)
+        end = pos + length
+        if end > len(data):
+            raise IndexError("关键帧越界")
+        try:
+            map_cells = zlib.decompress(data[pos:end])
+        except zlib.error as e:
+            raise ValueError(f"关键帧地图损坏：{e}")
+        if len(map_cells) != cell_count:
+            raise ValueError("关键帧地图大小不正确")
+        pos = end
+        keyframes.append(GameKeyframe(
+            frame=frame,
+            map_cells=map_cells,
+            current_piece=current_piece,
+            next_piece_queue=next_piece_queue,
+            random_draws=random_draws,
+            score=score
+        ))
+    return keyframes, pos
+
+
+def encode_replay(replay_data: GameReplayData) -> bytes:
+    """将回放数据编码为二进制"""
+    out = bytearray(REPLAY_MAGIC)
+    out.append(REPLAY_VERSION)
+    write_varint(out, replay_data.map_size[0])
+    write_varint(out, replay_data.map_size[1])
+    write_varint(out, replay_data.score)
+    write_varint(out, zigzag(replay_data.game_seed))
+    write_varint(out, replay_data.file_index)
+    write_str(out, replay_data.game_start_date)
+    write_str(out, replay_data.game_finished_time)
+    encode_events(replay_data.event_queue, out)
+    encode_keyframes(sorted(replay_data.keyframes, key=lambda keyframe: keyframe.frame), out)
+    return bytes(out)
+
+
+def decode_replay(data: bytes) -> GameReplayData:
+    """从二进制解码回放数据，格式不正确或数据被截断时抛出ValueError"""
+    if not is_binary_replay(data):
+        raise ValueError("不是二进制回放文件")
+    version = data[len(REPLAY_MAGIC)] if len(data) > len(REPLAY_MAGIC) else 0
+    if version < 1 or version > REPLAY_VERSION:
+        raise ValueError(f"不支持的回放文件版本：{version}")
+    try:
+        pos = len(REPLAY_MAGIC) + 1
+        width, pos = read_varint(data, pos)
+        height, pos = read_varint(data, pos)
+        score, pos = read_varint(data, pos)
+        game_seed, pos = read_varint(data, pos)
+        file_index, pos = read_varint(data, pos)
+        game_start_date, pos = read_str(data, pos)
+        game_finished_time, pos = read_str(data, pos)
+        event_queue, pos = decode_event_list(data, pos)
+        keyframes = []
+        if version >= 2:
+            keyframes, pos = decode_keyframes(data, pos, width * height)
+    except IndexError:
+        raise ValueError("回放文件被截断")
+    return GameReplayData(
+        map_size=[width, height],
+        game_start_date=game_start_date,
+        game_finished_time=game_finished_time,
+        file_index=file_index,
+        score=score,
+        game_seed=unzigzag(game_seed),
+        event_queue=event_queue,
+        keyframes=keyframes
+    )
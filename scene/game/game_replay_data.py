@@ -1,8 +1,8 @@
-from typing import Any, Dict
+from typing import Any, Dict, Union
 from data.config import GameConfig
 from core.serializer import Serializer
 from scene.game.game_event import GameEventCommand
-import os
+from scene.game.game_keyframe import GameKeyframe
 
 class GameReplayData(Serializer['GameReplayData']):
     """游戏重放数据"""
@@ -13,7 +13,8 @@ class GameReplayData(Serializer['GameReplayData']):
                 file_index: int = 0,
                 score: int = 0,
                 game_seed: int = 0,
-                event_queue: list[GameEventCommand] = []):
+                event_queue: list[GameEventCommand] = [],
+                keyframes: list[GameKeyframe] = None):
         self.map_size = map_size
         self.game_start_date = game_start_date
         self.game_finished_time = game_finished_time
@@ -21,23 +22,23 @@ class GameReplayData(Serializer['GameReplayData']):
         self.score = score
         self.game_seed = game_seed
         self.event_queue = event_queue
+        self.keyframes = keyframes or []  # 回放关键帧，用于快速跳转
 
     @classmethod
     def from_game_scene(cls, game_scene) -> 'GameReplayData':
-        file_index = 0
-        with os.scandir(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH) as entries:
-            for entry in entries:
-                if entry.is_file() and entry.name.endswith(".json"):
-                    file_index += 1
+        return cls.from_game_engine(game_scene.engine)
 
+    @classmethod
+    def from_game_engine(cls, game_engine) -> 'GameReplayData':
+        # file_index由GameReplayStore在保存时分配
         return cls(
-            map_size=[game_scene.map.width, game_scene.map.height],
-            game_start_date=game_scene.game_start_date,
-            game_finished_time=game_scene.game_frame_counter.get_time_parts(),
-            file_index=file_index,
-            score=game_scene.score,
-            game_seed=game_scene.game_seed,
-            event_queue=list(game_scene.event_queue)
+            map_size=[game_engine.map.width, game_engine.map.height],
+            game_start_date=game_engine.game_start_date,
+            game_finished_time=game_engine.game_frame_counter.get_time_parts(),
+            score=game_engine.score,
+            game_seed=game_engine.game_seed,
+            event_queue=game_engine.get_recorded_events(),
+            keyframes=list(game_engine.keyframes)
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -48,7 +49,8 @@ class GameReplayData(Serializer['GameReplayData']):
             "file_index": self.file_index,
             "score": self.score,
             "game_seed": self.game_seed,
-            "events": [event.to_dict() for event in self.event_queue]
+            "events": [event.to_dict() for event in self.event_queue],
+            "keyframes": [keyframe.to_dict() for keyframe in self.keyframes]
         }
     
     @classmethod
@@ -61,5 +63,46 @@ class GameReplayData(Serializer['GameReplayData']):
             file_index=data["file_index"],
             score=data["score"],
             game_seed=data["game_seed"],
-            event_queue=[GameEventCommand.create_event_from_dict(event_data) for event_data in data["events"]]
+            event_queue=[GameEventCommand.create_event_from_dict(event_data) for event_data in data["events"]],
+            # 旧版关键帧保存的是完整的随机数状态，直接丢弃，回放时重新生成
+            keyframes=[GameKeyframe.from_dict(keyframe_data) for keyframe_data in data.get("keyframes", []) if 'random_draws' in keyframe_data]
         )
+
+    def to_bytes(self) -> bytes:
+        """编码为二进制回放格式（见game_replay_codec）"""
+        from scene.game.game_replay_codec import encode_replay
+        return encode_replay(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GameReplayData':
+        """从二进制回放格式解码"""
+        from scene.game.game_replay_codec import decode_replay
+        return decode_replay(data)
+
+    def to_file_content(self) -> Union[str, bytes]:
+        """GameConfig.SAVE_GAME_REPLAY_DATA_BINARY为True时保存为二进制格式"""
+        if GameConfig.SAVE_GAME_REPLAY_DATA_BINARY:
+            return self.to_bytes()
+        return self.to_json()
+
+    @classmethod
+    def load_from_file(cls, file_path: str) -> 'GameReplayData':
+        """
+        从文件加载回放，根据文件头自动识别二进制格式和JSON格式
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            加载的回放数据，失败返回None
+        """
+        from scene.game.game_replay_codec import is_binary_replay
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            if is_binary_replay(data):
+                return cls.from_bytes(data)
+            return cls.from_json(data.decode('utf-8'))
+        except Exception as e:
+            print(f"加载文件失败: {e}")
+            return None
@@ -0,0 +1,118 @@
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from core.serializer import Serializer
+from data.config import GameConfig
+from scene.game.game_replay_data import GameReplayData
+
+
+class GameReplayIndex(Serializer['GameReplayIndex']):
+    """
+    重放文件索引，保存每个重放文件的分数、用时和开始日期
+
+    排行榜只读取索引，不需要解码每个重放文件的全部事件；
+    索引记录了每个文件的修改时间和大小，与磁盘不一致的文件会重新读取
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None, next_id: int = 0):
+        """
+        初始化GameReplayIndex对象
+
+        Args:
+            entries: 文件名 -> 索引项（mtime、size、score、game_finished_time、game_start_date）
+            next_id: 下一个重放文件的编号（见GameReplayStore）
+        """
+        self.entries = entries or {}
+        self.next_id = next_id
+
+    @staticmethod
+    def get_index_file_path(replay_data_path: str) -> str:
+        """获取重放目录对应的索引文件路径"""
+        return os.path.join(replay_data_path, GameConfig.SAVE_GAME_REPLAY_INDEX_FILE_NAME)
+
+    @classmethod
+    def load(cls, replay_data_path: str = GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH) -> 'GameReplayIndex':
+        """
+        读取重放目录的索引，并与目录中的文件同步，有变化时在后台保存索引
+
+        Args:
+            replay_data_path: 重放文件目录
+        """
+        index_file_path = cls.get_index_file_path(replay_data_path)
+        index = None
+        if os.path.exists(index_file_path):
+            index = cls.load_from_file(index_file_path)
+        if index is None:
+            index = cls()
+        if index.refresh(replay_data_path):
+            index.save_to_file_async(index_file_path)
+        return index
+
+    def refresh(self, replay_data_path: str) -> bool:
+        """
+        与目录中的重放文件同步：删除已不存在的文件，重新读取新增或修改时间、大小不一致的文件
+
+        Returns:
+            索引有变化返回True
+        """
+        changed = False
+        existing = set()
+        if os.path.isdir(replay_data_path):
+            with os.scandir(replay_data_path) as entries:
+                for entry in entries:
+                    if not entry.is_file() or not re.match(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATTERN, entry.name):
+                        continue
+                    existing.add(entry.name)
+                    stat = entry.stat()
+                    cached = self.entries.get(entry.name)
+                    if cached and cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                        continue
+                    replay_data = GameReplayData.load_from_file(entry.path)
+                    if replay_data is None:
+                        print(f"加载重放文件失败 {entry.path}")
+                        self.entries.pop(entry.name, None)
+                        continue
+                    self.set_entry(entry.name, replay_data, stat.st_mtime_ns, stat.st_size)
+                    changed = True
+        for file_name in list(self.entries):
+            if file_name not in existing:
+                del self.entries[file_name]
+                changed = True
+        return changed
+
+    def set_entry(self, file_name: str, replay_data: GameReplayData, mtime: int, size: int):
+        """添加或更新一个重放文件的索引项"""
+        self.entries[file_name] = {
+            'mtime': mtime,
+            'size': size,
+            'score': replay_data.score,
+            'game_finished_time': replay_data.game_finished_time,
+            'game_start_date': replay_data.game_start_date
+        }
+
+    def get_records(self, replay_data_path: str) -> List[Dict[str, Any]]:
+        """获取排行榜记录，格式与RankScene.game_records一致"""
+        return [
+            {
+                'file_name': file_name,
+                'file_path': os.path.join(replay_data_path, file_name),
+                'score': entry['score'],
+                'game_time': entry['game_finished_time'],
+                'start_date': entry['game_start_date']
+            }
+            for file_name, entry in self.entries.items()
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """将GameReplayIndex对象转换为字典，用于序列化"""
+        return {
+            'version': 1,
+            'next_id': self.next_id,
+            'entries': self.entries
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GameReplayIndex':
+        """从字典创建GameReplayIndex对象，用于反序列化"""
+        return cls(entries=dict(data.get('entries', {})), next_id=data.get('next_id', 0))
@@ -0,0 +1,191 @@
+"""
+回放日志 - 游戏进行中以追加方式把事件分块写入磁盘
+
+文件格式：
+    魔数 b"TRJL" | 版本号(1字节) | 地图宽 | 地图高 | 种子(zigzag) | 开始时间(长度+UTF-8)
+    事件块... 每块为：负载长度(变长整数) | CRC32(4字节小端) | 负载(game_replay_codec.encode_events)
+
+程序崩溃时最后一块可能只写了一半，打开日志时会丢弃并截断掉不完整或校验失败的尾部。
+"""
+import os
+import struct
+import zlib
+from typing import List, Optional
+
+from data.config import GameConfig
+from scene.game.game_event import GameEventCommand
+from scene.game.game_replay_codec import decode_events, encode_events, read_str, read_varint, unzigzag, write_str, write_varint, zigzag
+
+JOURNAL_MAGIC = b"TRJL"
+JOURNAL_VERSION = 1
+
+
+class ReplayJournal:
+    """追加写入的回放日志，事件先缓存在内存中，攒满一块后写入磁盘"""
+
+    def __init__(self, file_path: str, map_size: List[int], game_seed: int, game_start_date: str):
+        """
+        初始化ReplayJournal对象，不会读写文件，请使用create或open
+
+        Args:
+            file_path: 日志文件路径
+            map_size: 地图大小[宽, 高]
+            game_seed: 游戏种子
+            game_start_date: 游戏开始日期
+        """
+        self.file_path = file_path
+        self.map_size = map_size
+        self.game_seed = game_seed
+        self.game_start_date = game_start_date
+        self.chunk_size = GameConfig.REPLAY_JOURNAL_CHUNK_EVENTS
+        self.pending_events: List[GameEventCommand] = []  # 尚未写入磁盘的事件
+        self.event_count = 0  # 已写入磁盘的事件数
+        self.last_frame = 0  # 最后一个事件的帧号
+        self._file = None
+
+    @classmethod
+    def create(cls, file_path: str, map_size: List[int], game_seed: int, game_start_date: str) -> 'ReplayJournal':
+        """创建新的日志文件，已存在的同名文件会被覆盖"""
+        journal = cls(file_path, map_size, game_seed, game_start_date)
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = bytearray(JOURNAL_MAGIC)
+        header.append(JOURNAL_VERSION)
+        write_varint(header, map_size[0])
+        write_varint(header, map_size[1])
+        write_varint(header, zigzag(game_seed))
+        write_str(header, game_start_date)
+        with open(file_path, 'wb') as f:
+            f.write(header)
+        journal._file = open(file_path, 'ab')
+        return journal
+
+    @classmethod
+    def open(cls, file_path: str) -> Optional['ReplayJournal']:
+        """
+        打开已有的日志文件继续追加，自动截断不完整的尾部
+
+        Returns:
+            日志对象，文件不存在或文件头损坏时返回None
+        """
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            journal, valid_size, _ = cls._parse(file_path, data, keep_events=False)
+        except Exception as e:
+            print(f"回放日志损坏，无法恢复：{file_path}，{e}")
+            return None
+        if valid_size < len(data):
+            print(f"回放日志尾部不完整，已截断{len(data) - valid_size}字节：{file_path}")
+            with open(file_path, 'r+b') as f:
+                f.truncate(valid_size)
+        journal._file = open(file_path, 'ab')
+        return journal
+
+    @classmethod
+    def _parse(cls, file_path: str, data: bytes, keep_events: bool):
+        """解析日志，返回(日志对象, 有效数据长度, 事件列表)，文件头损坏时抛出ValueError"""
+        if data[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC:
+            raise ValueError("不是回放日志文件")
+        version = data[len(JOURNAL_MAGIC)] if len(data) > len(JOURNAL_MAGIC) else 0
+        if version < 1 or version > JOURNAL_VERSION:
+            raise ValueError(f"不支持的回放日志版本：{version}")
+        try:
+            pos = len(JOURNAL_MAGIC) + 1
+            width, pos = read_varint(data, pos)
+            height, pos = read_varint(data, pos)
+            game_seed, pos = read_varint(data, pos)
+            game_start_date, pos = read_str(data, pos)
+        except IndexError:
+            raise ValueError("回放日志文件头被截断")
+        journal = cls(file_path, [width, height], unzigzag(game_seed), game_start_date)
+
+        events = []
+        valid_size = pos
+        while pos < len(data):
+            try:
+                length, pos = read_varint(data, pos)
+                end = pos + 4 + length
+                if end > len(data):
+                    break
+                (crc,) = struct.unpack_from('<I', data, pos)
+                payload = data[pos + 4:end]
+                if zlib.crc32(payload) != crc:
+                    break
+                chunk_events, _ = decode_events(payload, 0)
+            except (IndexError, ValueError):
+                break
+            if chunk_events:
+                journal.event_count += len(chunk_events)
+                journal.last_frame = chunk_events[-1].frame
+                if keep_events:
+                    events.extend(chunk_events)
+            pos = end
+            valid_size = end
+        return journal, valid_size, events
+
+    def append(self, event: GameEventCommand):
+        """追加一个事件，攒满一块后自动写入磁盘"""
+        self.pending_events.append(event)
+        self.last_frame = event.frame
+        if len(self.pending_events) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """把缓存的事件作为一块写入磁盘"""
+        if not self.pending_events or self._file is None:
+            return
+        payload = bytearray()
+        encode_events(self.pending_events, payload)
+        chunk = bytearray()
+        write_varint(chunk, len(payload))
+        chunk += struct.pack('<I', zlib.crc32(payload))
+        chunk += payload
+        self._file.write(chunk)
+        self._file.flush()
+        self.event_count += len(self.pending_events)
+        self.pending_events = []
+
+    def read_events(self) -> List[GameEventCommand]:
+        """读取日志中的全部事件（包括尚未写入磁盘的事件）"""
+        if self._file is not None:
+            self._file.flush()
+        with open(self.file_path, 'rb') as f:
+            data = f.read()
+        _, _, events = self._parse(self.file_path, data, keep_events=True)
+        return events + self.pending_events
+
+    def truncate(self, event_count: int):
+        """
+        只保留前event_count个事件，用于从较早的存档继续游戏
+
+        按事件数而不是帧号截断：与存档同一帧但在存档之后记录的事件也会被丢弃
+        """
+        if self.event_count + len(self.pending_events) <= event_count:
+            return
+        events = self.read_events()[:event_count]
+        self.close()
+        journal = ReplayJournal.create(self.file_path, self.map_size, self.game_seed, self.game_start_date)
+        self._file = journal._file
+        self.event_count = 0
+        self.last_frame = 0
+        self.pending_events = []
+        for event in events:
+            self.append(event)
+        self.flush()
+
+    def close(self):
+        """写入缓存的事件并关闭文件"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def delete(self):
+        """关闭并删除日志文件"""
+        self.close()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
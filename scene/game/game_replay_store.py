@@ -0,0 +1,140 @@
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from data.config import GameConfig
+from scene.game.game_replay_data import GameReplayData
+from scene.game.game_replay_index import GameReplayIndex
+
+
+class GameReplayStore:
+    """
+    重放文件仓库
+
+    每个重放文件使用单调递增的编号命名，写入后不再重命名；
+    保留策略为分数最高的GameConfig.REPLAY_RETENTION_TOP_K个加上最近的GameConfig.REPLAY_RETENTION_LAST_N个，
+    其余文件在新重放写入后删除，每次只需更新索引，不需要遍历和重命名其他文件
+    """
+    # 各重放目录的索引，主线程分配编号和后台线程更新索引共用同一份，避免读到还没写入磁盘的旧索引
+    _indexes: Dict[str, GameReplayIndex] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, replay_data_path: str = GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH):
+        """
+        初始化GameReplayStore对象
+
+        Args:
+            replay_data_path: 重放文件目录
+        """
+        self.replay_data_path = replay_data_path
+
+    @staticmethod
+    def get_replay_id(file_name: str) -> int:
+        """从重放文件名中解析编号，不是重放文件时返回-1"""
+        match = re.match(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATTERN, file_name)
+        return int(match.group(1)) if match else -1
+
+    def _get_index(self) -> GameReplayIndex:
+        """获取重放目录的索引，第一次使用时从磁盘读取并与目录同步，调用者需持有_lock"""
+        index = self._indexes.get(self.replay_data_path)
+        if index is None:
+            index = GameReplayIndex.load(self.replay_data_path)
+            self._indexes[self.replay_data_path] = index
+        return index
+
+    def _allocate_id(self) -> int:
+        """分配下一个重放编号"""
+        with self._lock:
+            index = self._get_index()
+            replay_id = max([index.next_id] + [self.get_replay_id(file_name) + 1 for file_name in index.entries])
+            index.next_id = replay_id + 1
+            return replay_id
+
+    def save(self, replay_data: GameReplayData, on_done: Optional[Callable[[bool], None]] = None) -> bool:
+        """
+        在后台线程中保存重放，写入完成后更新索引并执行保留策略
+
+        Args:
+            replay_data: 重放数据，提交后不应再修改
+            on_done: 写入完成后在后台线程中调用，参数为是否写入成功
+
+        Returns:
+            提交成功返回True
+        """
+        os.makedirs(self.replay_data_path, exist_ok=True)
+        replay_data.file_index = self._allocate_id()
+        file_name = GameConfig.SAVE_GAME_REPLAY_DATA_FILE_NAME.format(replay_data.file_index)
+
+        def on_saved(success: bool):
+            if success:
+                self._add_to_index(file_name, replay_data)
+            if on_done is not None:
+                on_done(success)
+
+        # 序列化和写文件在后台线程中进行
+        replay_data.save_to_file_async(os.path.join(self.replay_data_path, file_name), on_saved)
+        return True
+
+    def update(self, file_name: str, replay_data: GameReplayData):
+        """
+        在后台线程中用新的内容（例如回放时生成的关键帧）覆盖已有的重放文件，文件保持原来的格式，写入完成后更新索引
+
+        Args:
+            file_name: 重放文件名
+            replay_data: 重放数据，提交后不应再修改
+        """
+        from core.save_writer import SaveWriter
+        file_path = os.path.join(self.replay_data_path, file_name)
+        if not os.path.exists(file_path):
+            return
+        serialize = replay_data.to_json if file_name.endswith('.json') else replay_data.to_bytes
+
+        def on_done(success: bool):
+            if success:
+                self._add_to_index(file_name, replay_data)
+
+        SaveWriter().submit(file_path, serialize, on_done)
+
+    def _add_to_index(self, file_name: str, replay_data: GameReplayData):
+        """重放文件写入磁盘后更新索引并执行保留策略，不读取其他重放文件"""
+        try:
+            stat = os.stat(os.path.join(self.replay_data_path, file_name))
+        except OSError as e:
+            print(f"更新重放索引失败: {e}")
+            return
+        with self._lock:
+            index = self._get_index()
+            index.set_entry(file_name, replay_data, stat.st_mtime_ns, stat.st_size)
+            for removed_file_name in self.apply_retention(index):
+                print(f"删除超出保留范围的重放文件：{removed_file_name}")
+            # 提交索引的副本，后台写入时不受之后的修改影响
+            snapshot = GameReplayIndex(dict(index.entries), index.next_id)
+        snapshot.save_to_file_async(GameReplayIndex.get_index_file_path(self.replay_data_path))
+
+    def apply_retention(self, index: GameReplayIndex) -> List[str]:
+        """
+        按保留策略删除重放文件并更新索引
+
+        Returns:
+            被删除的文件名列表
+        """
+        file_names = list(index.entries)
+        by_score = sorted(file_names, key=lambda name: (index.entries[name]['score'], self.get_replay_id(name)), reverse=True)
+        by_id = sorted(file_names, key=self.get_replay_id, reverse=True)
+        keep = set(by_score[:GameConfig.REPLAY_RETENTION_TOP_K]) | set(by_id[:GameConfig.REPLAY_RETENTION_LAST_N])
+
+        removed = []
+        for file_name in file_names:
+            if file_name in keep:
+                continue
+            try:
+                os.remove(os.path.join(self.replay_data_path, file_name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"删除重放文件失败 {file_name}: {e}")
+                continue
+            del index.entries[file_name]
+            removed.append(file_name)
+        return removed
@@ -1,16 +1,18 @@
-from collections import deque
 import os
 import pygame
 from scene.scene import Scene
 from data.config import GameConfig
 from resources.resource_manager import ResId, ResourcesManager
 from typing import Optional, Tuple
-from data.map import Map
-from core.piece_factory import PieceFactory
-from core.random_seed_generator import RandomSeedGenerator
-from tools.timer import Timer
+from data.landing_cache import LandingCache
+from tools.timer import FixedTimestep, Timer, TimerScheduler
+from tools.text_cache import TextCache
+from tools.tile_atlas import TileAtlas
+from tools.profiler import profiled
 from scene.game.game_frame_counter import GameFrameCounter
+from scene.game.game_engine import GameEngine
 from ui.panel import Panel
+from ui.compositor import Compositor
 from scene.scene_manager import SceneManager
 
 
@@ -19,71 +21,93 @@ class GameScene(Scene):
         super().__init__(name)
 
         self.game_background = ResourcesManager().get_resource(ResId.GAME_BACKGROUND, (GameConfig.WINDOW_WIDTH, GameConfig.WINDOW_HEIGHT))
-        self.is_game_over = False
+        # 分层合成器，静态层只有游戏背景，每帧只重绘发生变化的区域
+        self.compositor = Compositor(lambda surface: surface.blit(self.game_background, (0, 0)))
+        # 游戏规则和状态全部由无界面的游戏引擎负责，场景只负责输入、定时和渲染
+        self.engine = GameEngine()
         self.is_game_paused = False
         self.is_replay = False
         self.is_replay_over = False
         self.is_replay_paused = False
+        self.replay_speed_index = 0  # 回放速度档位，对应GameConfig.REPLAY_SPEEDS的下标
+        self.current_replay_file_path: Optional[str] = None
+        self.current_replay_data = None  # 当前回放的重放数据，用于写回播放中生成的关键帧
+        # 增量自动存档
+        from scene.game.game_autosave import GameAutoSave
+        self.autosave = GameAutoSave(GameConfig.SAVE_GAME_DATA_FILE_PATH)
+
+    @property
+    def map(self):
+        return self.engine.map
+
+    @property
+    def score(self) -> int:
+        return self.engine.score
+
+    @property
+    def current_piece(self):
+        return self.engine.current_piece
+
+    @property
+    def next_piece_queue(self):
+        return self.engine.next_piece_queue
+
+    @property
+    def event_queue(self):
+        return self.engine.event_queue
+
+    @property
+    def game_seed(self):
+        return self.engine.game_seed
+
+    @property
+    def game_start_date(self):
+        return self.engine.game_start_date
+
+    @property
+    def game_frame_counter(self) -> GameFrameCounter:
+        return self.engine.game_frame_counter
+
+    @property
+    def is_game_over(self) -> bool:
+        return self.engine.is_game_over
 
     def _init(self):
         """初始化游戏场景"""
-        # 初始化游戏分数
-        if not hasattr(self, 'score'):
-            self.score = 0
-        # 初始化游戏开始日期
-        if not hasattr(self, 'game_start_date'):
-            from datetime import datetime
-            self.game_start_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # 初始化游戏帧计数器
-        if not hasattr(self, 'game_frame_counter'):
-            self.game_frame_counter = GameFrameCounter()
-        # 初始化地图
-        if not hasattr(self, 'map'):
-            self.map = Map()
-        # 初始化游戏种子
-        if not hasattr(self, 'game_seed'):
-            self.game_seed = RandomSeedGenerator.generate_seed()
-            PieceFactory().set_seed(self.game_seed)
-        # 创建当前方块
-        self.current_piece_dx = self.map.width // 2
-        self.current_piece_dy = 0
-        if not hasattr(self, 'current_piece'):
-            self.current_piece = PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy)
-        # 初始化方块预览队列
-        if not hasattr(self, 'next_piece_queue'):
-            self.next_piece_length = self.map.height // 5
-            self.next_piece_queue = deque()
-            self.next_piece_queue.extend([PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy) for _ in range(self.next_piece_length)])
-
-        # 初始化事件队列
-        if not hasattr(self, 'event_queue'):
-            from scene.game.game_event import GameEventCommand
-            self.event_queue: deque[GameEventCommand] = deque()
+        # 没有加载存档或回放时开始新游戏
+        if self.engine.current_piece is None:
+            self.engine.new_game()
+            self._start_replay_journal()
+        self.engine.on_game_over = self._game_over
+
+        # 初始化方块落点缓存
+        self.landing_cache = LandingCache()
 
         # 创建地图纹理
         self.map.create_map_texture()
         self.map_x = (GameConfig.WINDOW_WIDTH - self.map.width * GameConfig.TILE_SIZE) // 2
         self.map_y = (GameConfig.WINDOW_HEIGHT - self.map.height * GameConfig.TILE_SIZE) // 2 + GameConfig.TILE_SIZE
 
-        # 初始化定时器
+        # 固定步长的模拟时钟，每个模拟步执行一次定时器并推进一帧，与渲染帧率无关
+        self.simulation_clock = FixedTimestep(GameConfig.SIMULATION_TICK_RATE, GameConfig.SIMULATION_MAX_TICKS_PER_UPDATE)
+
+        # 初始化定时器，定时器按模拟帧号计时，同样的输入总是在同一帧触发；
+        # 所有定时器由同一个调度器管理，每个模拟步只需更新一次调度器
+        self.timer_scheduler = TimerScheduler(self._get_simulation_tick)
         # 用于控制方块下落
-        self.move_down_timer = Timer(GameConfig.MOVE_DOWN_INTERVAL, lambda: self._try_move_piece(0, 1, self._lock_piece))
-        self.move_down_timer.start()
+        self.move_down_timer = Timer(self._ms_to_ticks(GameConfig.MOVE_DOWN_INTERVAL), lambda: self._try_move_piece(0, 1, self._lock_piece), scheduler=self.timer_scheduler)
         # 用于控制方块持续左右移动
         self.is_move_left = False
-        self.move_left_timer = Timer(GameConfig.MOVE_SIDE_INTERVAL, lambda: self._try_move_piece(-1, 0))
-        self.move_left_timer.start()
+        self.move_left_timer = Timer(self._ms_to_ticks(GameConfig.MOVE_SIDE_INTERVAL), lambda: self._try_move_piece(-1, 0), scheduler=self.timer_scheduler)
         # 用于控制方块持续左右移动
         self.is_move_right = False
-        self.move_right_timer = Timer(GameConfig.MOVE_SIDE_INTERVAL, lambda: self._try_move_piece(1, 0))
-        self.move_right_timer.start()
+        self.move_right_timer = Timer(self._ms_to_ticks(GameConfig.MOVE_SIDE_INTERVAL), lambda: self._try_move_piece(1, 0), scheduler=self.timer_scheduler)
         # 用于控制方块持续旋转
         self.is_rotate = False
-        self.rotate_timer = Timer(GameConfig.ROTATE_INTERVAL, lambda: self._try_rotate_piece())
-        self.rotate_timer.start()
+        self.rotate_timer = Timer(self._ms_to_ticks(GameConfig.ROTATE_INTERVAL), lambda: self._try_rotate_piece(), scheduler=self.timer_scheduler)
         # 自动保存游戏状态
-        self.auto_save_timer = Timer(GameConfig.AUTO_SAVE_INTERVAL, lambda: self._save_game_data(GameConfig.SAVE_GAME_DATA_FILE_PATH))
-        self.auto_save_timer.start()
+        self.auto_save_timer = Timer(self._ms_to_ticks(GameConfig.AUTO_SAVE_INTERVAL), lambda: self._save_game_data(), scheduler=self.timer_scheduler)
+        self._start_timers()
 
         # 初始化游戏UI元素
         # 方块预览位置放在地图右侧
@@ -98,6 +122,10 @@ class GameScene(Scene):
         self.game_frame_counter_dx = self.map.width // 3 * 2
         self.game_frame_counter_dy = -1
 
+        # 回放速度的显示位置
+        self.replay_speed_dx = 1
+        self.replay_speed_dy = -1
+
         # 游戏结束提示框
         self.game_over_panel_width = 600
         self.game_over_panel_height = 600
@@ -148,17 +176,16 @@ class GameScene(Scene):
         self.replay_over_panel.add_button("重新开始回放", self._handle_restart_replay_game)
         self.replay_over_panel.add_button("返回主菜单", self._handle_return_to_menu)
 
-    def _save_game_data(self, file_path: str) -> bool:
-        """保存游戏状态到指定文件
+    @profiled()
+    def _save_game_data(self, compact: bool = False) -> bool:
+        """保存游戏状态，平时只追加增量记录
         Args:
-            file_path (str): (Default: GameConfig.SAVE_GAME_DATA_FILE_PATH)
+            compact (bool): 是否写入完整快照（例如保存并退出时）
         """
-        from scene.game.game_data import GameData
-        game_data = GameData.from_game_scene(self)
-        if game_data is None:
-            print(f"从游戏场景创建游戏数据失败：{file_path}")
-            return False
-        return game_data.save_to_file(file_path)
+        # 先把回放日志写入磁盘，保证存档中的状态对应的事件都已在日志中
+        if self.engine.replay_journal is not None:
+            self.engine.replay_journal.flush()
+        return self.autosave.save(self.engine, compact)
 
     def _save_game_replay_data(self, file_path: str) -> bool:
         """保存游戏重放状态到指定文件
@@ -172,93 +199,183 @@ class GameScene(Scene):
             print(f"从游戏场景创建游戏重放数据失败：{file_path}")
             return False
         
-        # 构建完整的文件路径
-        full_file_path = os.path.join(file_path, GameConfig.SAVE_GAME_REPLAY_DATA_FILE_NAME.format(game_replay_data.file_index))
-        if not game_replay_data.save_to_file(full_file_path):
-            return False
-        
-        if game_replay_data.file_index > 9:
-            print(f"游戏重放数据文件索引超出范围：{game_replay_data.file_index}，已删除最旧文件")
-            delete_oldest_file = os.path.join(file_path, GameConfig.SAVE_GAME_REPLAY_DATA_FILE_NAME.format(0))
-            if os.path.exists(delete_oldest_file):
-                os.remove(delete_oldest_file)
-
-            file_list = [f for f in os.listdir(file_path) if f.endswith(".json")]
-            file_list.sort(key=lambda x: int(x.split("_")[-1].split(".")[0]))
-            for i, file_name in enumerate(file_list):
-                # 重命名文件，将索引重新排序为从0开始
-                print(f"重命名文件：{file_name} 为 {GameConfig.SAVE_GAME_REPLAY_DATA_FILE_NAME.format(i)}")
-                os.rename(os.path.join(file_path, file_name), os.path.join(file_path, GameConfig.SAVE_GAME_REPLAY_DATA_FILE_NAME.format(i)))
-        return True
+        from scene.game.game_replay_store import GameReplayStore
+        # 分配编号并在后台线程中写入，完成后更新索引并删除超出保留范围的旧重放
+        return GameReplayStore(file_path).save(game_replay_data)
 
     def load_game_data(self, file_path: str) -> bool:
         """从指定文件加载游戏状态
         Args:
             file_path (str): (Default: GameConfig.SAVE_GAME_DATA_FILE_PATH)
         """
-        from scene.game.game_data import GameData
-        game_data = GameData.load_from_file(file_path)
+        from scene.game.game_autosave import GameAutoSave
+        self.autosave = GameAutoSave(file_path)
+        game_data = self.autosave.load_snapshot()
         if game_data is None:
             print(f"加载游戏数据失败：{file_path}")
             return False
-        
-        # 恢复游戏地图和状态
-        if game_data.map is not None:
-            self.map = game_data.map
-        else:
-            print("游戏数据中没有地图，加载失败")
-            return False
-        
-        # 恢复随机数种子和随机数状态
-        if game_data.game_seed is not None:
-            self.game_seed = game_data.game_seed
-            PieceFactory().set_seed(self.game_seed)
-        else:
-            print("游戏数据中没有随机数种子，加载失败")
-            return False
-        if game_data.random_state is not None:
-            PieceFactory().set_random_state(game_data.random_state)
-        else:
-            print("游戏数据中没有随机数状态，加载失败")
-            return False
-        
-        # 恢复游戏分数
-        if game_data.score is not None:
-            self.score = game_data.score
-        else:
-            print("游戏数据中没有分数，加载失败")
+        if not self.engine.load_game_data(game_data):
             return False
-        
-        # 恢复当前方块
-        if game_data.current_piece is not None:
-            self.current_piece = game_data.current_piece
-        else:
-            print("游戏数据中没有当前方块，加载失败")
+        self._resume_replay_journal(game_data.event_count)
+        return True
+
+    def _start_replay_journal(self):
+        """为新的一局创建回放日志，游戏中的事件分块追加写入磁盘"""
+        from scene.game.game_replay_journal import ReplayJournal
+        self._close_replay_journal()
+        # 上一局遗留的日志无法保存为重放时不能覆盖，这一局的事件保存在内存中
+        if not self._finalize_replay_journal():
+            return
+        try:
+            self.engine.replay_journal = ReplayJournal.create(
+                GameConfig.SAVE_GAME_REPLAY_JOURNAL_FILE_PATH,
+                [self.map.width, self.map.height],
+                self.game_seed,
+                self.game_start_date
+            )
+        except OSError as e:
+            print(f"创建回放日志失败，事件将保存在内存中：{e}")
+
+    def _finalize_replay_journal(self) -> bool:
+        """
+        把上一局遗留的回放日志（例如没有存档就崩溃或退出的一局）重新模拟后保存为重放，
+        保存成功后删除日志；属于磁盘上的存档的日志在继续游戏时还要使用，保持不变
+
+        Returns:
+            bool: 没有遗留的日志或者已经保存为重放时返回True，可以创建新的日志
+        """
+        from core.piece_factory import PieceFactory
+        from core.save_writer import SaveWriter
+        from scene.game.game_replay_data import GameReplayData
+        from scene.game.game_replay_journal import ReplayJournal
+        from scene.game.game_replay_store import GameReplayStore
+        journal = ReplayJournal.open(GameConfig.SAVE_GAME_REPLAY_JOURNAL_FILE_PATH)
+        if journal is None:
+            return True
+        if self._journal_belongs_to_save(journal):
+            print("回放日志属于保存的游戏，已保留，这一局的事件保存在内存中")
+            journal.close()
             return False
-        
-        # 恢复方块预览队列
-        if game_data.next_piece_queue is not None:
-            self.next_piece_queue = deque(game_data.next_piece_queue)
-            self.next_piece_length = len(self.next_piece_queue)
-        else:
-            print("游戏数据中没有方块预览队列，加载失败")
+        events = journal.read_events()
+        if not events:
+            journal.delete()
+            return True
+
+        replay_data = GameReplayData(
+            map_size=journal.map_size,
+            game_start_date=journal.game_start_date,
+            game_seed=journal.game_seed,
+            event_queue=events
+        )
+        # 重新模拟得到分数和游戏时长，模拟会重新设置PieceFactory的种子，结束后恢复当前一局的随机数状态
+        random_state = PieceFactory().get_random_state()
+        try:
+            engine = GameEngine(journal.map_size[0], journal.map_size[1])
+            if engine.load_replay_data(replay_data):
+                replay_data.score = engine.run_replay()
+                replay_data.game_finished_time = engine.game_frame_counter.get_time_parts()
+        finally:
+            PieceFactory().set_random_state(random_state)
+
+        # 等待写入完成后再删除日志，写入失败时保留日志
+        results = []
+        GameReplayStore(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH).save(replay_data, results.append)
+        SaveWriter().flush()
+        if results != [True]:
+            print(f"上一局的回放日志保存为重放失败，已保留：{journal.file_path}")
+            journal.close()
             return False
+        print(f"上一局的回放日志已保存为重放，分数：{replay_data.score}")
+        journal.delete()
+        return True
 
-        # 恢复游戏帧计数器
-        if game_data.game_frame_counter is not None:
-            self.game_frame_counter = game_data.game_frame_counter
-        else:
-            print("游戏数据中没有游戏帧计数器，加载失败")
+    @staticmethod
+    def _journal_belongs_to_save(journal) -> bool:
+        """回放日志的种子和开始日期是否与磁盘上的存档相同"""
+        from core.save_writer import SaveWriter
+        from scene.game.game_data import GameData
+        SaveWriter().flush()
+        if not os.path.exists(GameConfig.SAVE_GAME_DATA_FILE_PATH):
             return False
-        
-        # 恢复游戏事件队列
-        if game_data.event_queue is not None:
-            self.event_queue = deque(game_data.event_queue)
+        game_data = GameData.load_from_file(GameConfig.SAVE_GAME_DATA_FILE_PATH)
+        return (game_data is not None and game_data.game_seed == journal.game_seed
+                and game_data.game_start_date == journal.game_start_date)
+
+    @classmethod
+    def discard_saved_game(cls):
+        """放弃保存的游戏（确认开始新游戏时），存档和属于它的回放日志一起删除"""
+        from scene.game.game_autosave import GameAutoSave
+        from scene.game.game_replay_journal import ReplayJournal
+        journal = ReplayJournal.open(GameConfig.SAVE_GAME_REPLAY_JOURNAL_FILE_PATH)
+        if journal is not None:
+            if cls._journal_belongs_to_save(journal):
+                journal.delete()
+            else:
+                journal.close()
+        GameAutoSave(GameConfig.SAVE_GAME_DATA_FILE_PATH).remove()
+
+    def _resume_replay_journal(self, snapshot_event_count: int = 0):
+        """
+        继续存档时打开对应的回放日志，截断崩溃时写了一半的尾部，
+        从日志中重新执行最后一条增量存档记录之前的事件，并丢弃之后的事件
+
+        Args:
+            snapshot_event_count: 基础快照保存时已记录的事件总数
+        """
+        from scene.game.game_replay_journal import ReplayJournal
+        journal = ReplayJournal.open(GameConfig.SAVE_GAME_REPLAY_JOURNAL_FILE_PATH)
+        if journal is not None and (journal.game_seed != self.game_seed or journal.game_start_date != self.game_start_date):
+            print("回放日志与存档不匹配，已重新创建")
+            journal.close()
+            journal = None
+        if journal is None:
+            self._start_replay_journal()
+            last_frame = -1
         else:
-            print("游戏数据中没有游戏事件队列，加载失败")
-            return False
+            # 存档中的事件（旧版存档或没有日志时）不在日志里
+            event_count = self._apply_autosave_delta(journal, snapshot_event_count) - len(self.engine.event_queue)
+            journal.truncate(max(0, event_count))
+            self.engine.replay_journal = journal
+            last_frame = journal.last_frame
+
+        # 旧版存档把事件保存在存档里，把日志中还没有的事件转存到回放日志中
+        journal = self.engine.replay_journal
+        if journal is not None:
+            for event in self.engine.event_queue:
+                if event.frame > last_frame:
+                    journal.append(event)
+            journal.flush()
+            self.engine.event_queue.clear()
+
+    def _apply_autosave_delta(self, journal, snapshot_event_count: int) -> int:
+        """
+        从基础快照重新执行回放日志中的事件，恢复到最后一条增量存档记录的状态
 
-        return True
+        Returns:
+            int: 恢复后的状态对应的已记录事件总数（增量存档记录的，或者基础快照的）
+        """
+        delta = self.autosave.load_latest_delta()
+        if delta is None:
+            return snapshot_event_count
+        events = journal.read_events()[snapshot_event_count:delta['event_count']]
+        if len(events) != delta['event_count'] - snapshot_event_count:
+            print("回放日志中的事件不足，增量存档无法恢复，将从基础快照继续")
+            return snapshot_event_count
+        self.engine.apply_events(events, delta['frame'])
+        if self.engine.score != delta['score']:
+            print(f"增量存档恢复后的分数不一致：{self.engine.score} != {delta['score']}")
+        return delta['event_count']
+
+    def _close_replay_journal(self, delete: bool = False):
+        """关闭回放日志，delete为True时同时删除日志文件"""
+        journal = self.engine.replay_journal
+        if journal is None:
+            return
+        if delete:
+            journal.delete()
+        else:
+            journal.close()
+        self.engine.replay_journal = None
 
     def load_game_replay_data(self, file_path: str) -> bool:
         """从指定文件加载游戏重放数据
@@ -272,115 +389,44 @@ class GameScene(Scene):
         if game_replay_data is None:
             print(f"加载游戏重放数据失败：{file_path}")
             return False
-        
-        # 恢复游戏地图大小
-        if game_replay_data.map_size is not None:
-            self.map = Map(game_replay_data.map_size[0], game_replay_data.map_size[1])
-        else:
-            print("游戏重放数据中没有地图，加载失败")
-            return False
-        # 恢复游戏开始日期
-        if game_replay_data.game_start_date is not None:
-            self.game_start_date = game_replay_data.game_start_date
-        else:
-            print("游戏重放数据中没有开始日期，加载失败")
-            return False
-        # 恢复随机数种子
-        if game_replay_data.game_seed is not None:
-            self.game_seed = game_replay_data.game_seed
-            PieceFactory().set_seed(self.game_seed)
-        else:
-            print("游戏重放数据中没有随机数种子，加载失败")
-            return False
-        # 恢复游戏事件队列
-        if game_replay_data.event_queue is not None:
-            self.event_queue = deque(game_replay_data.event_queue)
-        else:
-            print("游戏重放数据中没有游戏事件队列，加载失败")
-            return False
-        
-        return True
+        self.current_replay_data = game_replay_data
+        return self.engine.load_replay_data(game_replay_data)
+
+    def _save_replay_keyframes(self):
+        """回放过程中生成了新的关键帧时写回重放文件，下次打开同一个重放时跳转不需要从头模拟"""
+        if not self.is_replay or not self.engine.keyframes_changed:
+            return
+        replay_data = self.current_replay_data
+        if replay_data is None:
+            return
+        from scene.game.game_replay_store import GameReplayStore
+        replay_data.keyframes = list(self.engine.keyframes)
+        self.engine.keyframes_changed = False
+        GameReplayStore(os.path.dirname(self.current_replay_file_path)).update(
+            os.path.basename(self.current_replay_file_path), replay_data)
 
     def _remove_save_game_data(self):
-        """删除保存的游戏数据文件"""
-        if os.path.exists(GameConfig.SAVE_GAME_DATA_FILE_PATH):
-            os.remove(GameConfig.SAVE_GAME_DATA_FILE_PATH)
+        """删除保存的游戏数据文件（基础快照和增量记录）"""
+        self.autosave.remove()
 
     def _try_move_piece(self, dx: int, dy: int, callback: Optional[callable] = None):
         """尝试移动当前方块"""
-        if self.current_piece:
-            self.current_piece.move(dx, dy)
-            for x, y in self.current_piece.get_block_positions():
-                tile = self.map.get_tile(x, y)
-                if tile and not tile.is_empty():
-                    self.current_piece.move(-dx, -dy)  # 撤销移动
-                    if callback:
-                        callback()
-                    return False
-            if not self.is_replay:
-                from scene.game.game_event import MoveEventCommand
-                self.event_queue.append(MoveEventCommand(self.game_frame_counter.frame_count, dx, dy))
-            
-            return True
-        return False
+        return self.engine.try_move_piece(dx, dy, callback)
 
     def _try_rotate_piece(self):
         """尝试旋转当前方块"""
-        if self.current_piece:
-            self.current_piece.rotate()
-            for x, y in self.current_piece.get_block_positions():
-                tile = self.map.get_tile(x, y)
-                if tile and not tile.is_empty():
-                    self.current_piece.rotate_counterclockwise()  # 撤销旋转
-                    return False
-            if not self.is_replay:
-                from scene.game.game_event import RotateEventCommand
-                self.event_queue.append(RotateEventCommand(self.game_frame_counter.frame_count))
-
-            return True
-        return False
+        return self.engine.try_rotate_piece()
 
     def _lock_piece(self):
         """锁定当前方块到地图"""
-        if not self.is_replay:
-            from scene.game.game_event import LockPieceEventCommand
-            self.event_queue.append(LockPieceEventCommand(self.game_frame_counter.frame_count))
-        if self.current_piece:
-            for x, y in self.current_piece.get_block_positions():
-                # 方块超出顶部，游戏结束 且不是重放模式
-                if y == 0 and not self.is_replay:
-                    self._game_over()
-                self.map.set_tile(x, y, self.current_piece.type)
-            # 游戏结束 或 重放模式下 不再生成新的方块
-            if self.is_game_over or self.is_replay_over:
-                return
-            
-            self.current_piece = self.next_piece_queue.popleft()
-            self.next_piece_queue.append(PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy))
-            # 检查并清除完整的行
-            clear_count = self.map.check_and_clear_lines()
-            # 更新分数
-            if clear_count > 0:
-                self.score += clear_count * 100
-            
-            # 重新创建地图纹理
-            self.map.create_map_texture()
+        self.engine.lock_piece()
 
     def _handle_restart_game(self):
         """处理重新开始游戏按钮点击"""
         # 重置游戏状态
-        self.score = 0
-        self.map.initialize_map()
+        self.engine.new_game()
+        self._start_replay_journal()
         self.map.create_map_texture()
-        self.game_seed = RandomSeedGenerator.generate_seed()
-        PieceFactory().set_seed(self.game_seed)
-        self.current_piece = PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy)
-        self.next_piece_queue = deque()
-        self.next_piece_queue.extend([PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy) for _ in range(self.next_piece_length)])
-        self.game_frame_counter.reset()
-        from datetime import datetime
-        self.game_start_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.event_queue.clear()
 
         self.move_down_timer.reset()
         self.move_left_timer.reset()
@@ -388,16 +434,23 @@ class GameScene(Scene):
         self.rotate_timer.reset()
         self.auto_save_timer.reset()
 
+        self._start_timers()
+
+    def _start_timers(self):
+        """启动下落和自动保存定时器，持续移动和旋转的定时器只在按住按键期间运行"""
         self.move_down_timer.start()
-        self.move_left_timer.start()
-        self.move_right_timer.start()
-        self.rotate_timer.start()
         self.auto_save_timer.start()
-        
-        self.is_game_over = False
+        for timer, is_held in ((self.move_left_timer, self.is_move_left),
+                               (self.move_right_timer, self.is_move_right),
+                               (self.rotate_timer, self.is_rotate)):
+            if is_held:
+                timer.start(delay=0)
 
     def _handle_return_to_menu(self):
         """处理返回主菜单按钮点击"""
+        # 没有存档的一局无法继续，返回主菜单即放弃这一局，回放日志一起删除
+        self._close_replay_journal(delete=not self.autosave.has_snapshot)
+        self._save_replay_keyframes()
         from scene.menu_scene import MenuScene
         menu_scene = MenuScene()
         SceneManager().add_scene(menu_scene)
@@ -409,7 +462,7 @@ class GameScene(Scene):
 
     def _handle_save_and_return_to_menu(self):
         """处理保存并返回主菜单按钮点击"""
-        self._save_game_data(GameConfig.SAVE_GAME_DATA_FILE_PATH)
+        self._save_game_data(compact=True)
         self._handle_return_to_menu()
     
     def _handle_resume_replay_game(self):
@@ -418,43 +471,60 @@ class GameScene(Scene):
     
     def _handle_restart_replay_game(self):
         """处理重新开始回放按钮点击"""
-        # 重新加载当前重放文件
-        if hasattr(self, 'current_replay_file_path'):
-            self.load_game_replay_data(self.current_replay_file_path)
+        # 回到回放的第0帧，无需重新加载重放文件
+        if self.is_replay:
+            self.engine.restart_replay()
             self.is_replay_paused = False
             self.is_replay_over = False
-            self.game_frame_counter.reset()
-            self.score = 0
             self.map.create_map_texture()
-            self.current_piece = PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy)
-            self.next_piece_queue = deque()
-            self.next_piece_queue.extend([PieceFactory().create_random_piece(self.current_piece_dx, self.current_piece_dy) for _ in range(self.next_piece_length)])
-            self.game_frame_counter.reset()
         else:
             print("重复失败：当前没有重放文件")
 
     def _game_over(self):
         """处理游戏结束逻辑"""
-        self.is_game_over = True
         self.move_down_timer.stop()
         self.move_left_timer.stop()
         self.move_right_timer.stop()
         self.rotate_timer.stop()
         self.auto_save_timer.stop()
         self._remove_save_game_data()
-        self._save_game_replay_data(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH)
+        # 重放数据已经完整读入内存并提交写入，回放日志可以删除；创建失败时保留日志
+        if self._save_game_replay_data(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH):
+            self._close_replay_journal(delete=True)
+        else:
+            self._close_replay_journal()
 
     def _game_replay_update(self):
         """处理游戏重放更新逻辑"""
         if self.is_replay_paused:
+            self.simulation_clock.reset()
             return
-        self.game_frame_counter.tick()
-        while len(self.event_queue) > 0 and self.event_queue[0].frame <= self.game_frame_counter.frame_count:
-            event = self.event_queue.popleft()
-            event.execute(self)
-        if len(self.event_queue) == 0:
+        speed = GameConfig.REPLAY_SPEEDS[self.replay_speed_index]
+        if speed == GameConfig.REPLAY_SPEED_INSTANT:
+            # 瞬间播放：一次性执行完剩余的回放，中途不重建地图纹理，结束后整体重绘一次
+            self.engine.run_replay()
+            self.map.mark_all_dirty()
+        else:
+            # 每个模拟步推进speed帧，地图纹理只在渲染时按最终状态重建一次
+            for _ in range(self.simulation_clock.update() * speed):
+                if self.engine.step_replay():
+                    break
+        if self.engine.is_replay_over:
             self.is_replay_over = True
 
+    def _set_replay_speed(self, speed_index: int):
+        """设置回放速度档位"""
+        self.replay_speed_index = speed_index % len(GameConfig.REPLAY_SPEEDS)
+
+    def seek_replay(self, frame: int):
+        """跳转到回放的指定帧，从最近的关键帧恢复后最多重新模拟一个关键帧间隔"""
+        if not self.is_replay:
+            return
+        self.engine.seek_replay(frame)
+        self.is_replay_over = self.engine.is_replay_over
+        # 跳转本身的耗时不计入回放时间
+        self.simulation_clock.reset()
+
     def _game_replay_input(self, event):
         """处理游戏重放输入逻辑"""
         if self.is_replay_paused:
@@ -470,6 +540,16 @@ class GameScene(Scene):
                 self.is_replay_paused = True
             elif event.key == pygame.K_ESCAPE:
                 self._handle_return_to_menu()
+            elif event.key == pygame.K_f:
+                # 切换到下一档回放速度
+                self._set_replay_speed(self.replay_speed_index + 1)
+            elif pygame.K_1 <= event.key < pygame.K_1 + len(GameConfig.REPLAY_SPEEDS):
+                # 数字键直接选择回放速度档位
+                self._set_replay_speed(event.key - pygame.K_1)
+            elif event.key == pygame.K_LEFT:
+                self.seek_replay(self.game_frame_counter.frame_count - GameConfig.REPLAY_SEEK_STEP)
+            elif event.key == pygame.K_RIGHT:
+                self.seek_replay(self.game_frame_counter.frame_count + GameConfig.REPLAY_SEEK_STEP)
     
     def enter(self):
         """进入游戏场景"""
@@ -488,16 +568,22 @@ class GameScene(Scene):
             if self.is_game_paused or self.is_game_over:
                 return
 
+            # 按下按键后的下一个模拟步立即移动或旋转一次，之后按间隔重复
             if event.key == pygame.K_a:
                 self.is_move_left = True
+                self.move_left_timer.start(delay=0)
                 if self.is_move_right:
                     self.is_move_right = False
+                    self.move_right_timer.stop()
             elif event.key == pygame.K_d:
                 self.is_move_right = True
+                self.move_right_timer.start(delay=0)
                 if self.is_move_left:
                     self.is_move_left = False
+                    self.move_left_timer.stop()
             elif event.key == pygame.K_w:
                 self.is_rotate = True
+                self.rotate_timer.start(delay=0)
             elif event.key == pygame.K_s:
                 # 加快下落速度
                 self.move_down_timer.set_acceleration(GameConfig.MOVE_DOWN_INTERVAL / GameConfig.MOVE_DOWN_INTERVAL_ACCEL)
@@ -506,10 +592,13 @@ class GameScene(Scene):
         elif event.type == pygame.KEYUP:
             if event.key == pygame.K_a:
                 self.is_move_left = False
+                self.move_left_timer.stop()
             elif event.key == pygame.K_d:
                 self.is_move_right = False
+                self.move_right_timer.stop()
             elif event.key == pygame.K_w:
                 self.is_rotate = False
+                self.rotate_timer.stop()
             elif event.key == pygame.K_s:
                 # 恢复正常下落速度
                 self.move_down_timer.reset_acceleration()
@@ -517,98 +606,132 @@ class GameScene(Scene):
     def update(self):
         if self.is_replay:
             if self.is_replay_over:
+                # 回放结束后不累计时间，重新开始或跳转后不会一次补回结束期间的时长
+                self.simulation_clock.reset()
                 return
             self._game_replay_update()
             return
         if self.is_game_over or self.is_game_paused:
+            # 暂停期间不累计时间，恢复后不会一次补回暂停的时长
+            self.simulation_clock.reset()
             return
         
-        # 更新定时器
-        self.move_down_timer.update()
-        if self.is_move_left:
-            self.move_left_timer.update()
-        if self.is_move_right:
-            self.move_right_timer.update()
-        if self.is_rotate:
-            self.rotate_timer.update()
-        self.auto_save_timer.update()
+        # 按真实流逝的时间执行若干个模拟步，卡顿后可以补回落下的步数
+        for _ in range(self.simulation_clock.update()):
+            self._simulation_tick()
+            if self.is_game_over:
+                break
+
+    def _simulation_tick(self):
+        """执行一个模拟步：触发到期的定时器，然后推进一帧"""
+        # 更新定时器，只处理已到期的定时器
+        self.timer_scheduler.update()
 
         # 更新帧计时器
-        self.game_frame_counter.tick()
+        self.engine.tick()
+
+    def _get_simulation_tick(self) -> int:
+        """游戏玩法定时器的时间源：当前的模拟帧号"""
+        return self.game_frame_counter.frame_count
+
+    @staticmethod
+    def _ms_to_ticks(ms: int) -> int:
+        """将毫秒换算为模拟步数，至少为1步"""
+        return max(1, round(ms * GameConfig.SIMULATION_TICK_RATE / 1000))
         
+    @profiled()
     def render(self):
-        # 获取当前屏幕并渲染地图
+        # 获取当前屏幕，游戏背景在合成器的静态层中
         screen = pygame.display.get_surface()
-        # 渲染游戏背景
-        screen.blit(self.game_background, (0, 0))
-        # 渲染地图纹理
-        if self.map.texture:
-            screen.blit(self.map.texture, (self.map_x, self.map_y))
 
-        # 渲染当前方块
-        if self.current_piece:
-            block_texture = ResourcesManager().get_resource(ResId[self.current_piece.type.value], (GameConfig.TILE_SIZE, GameConfig.TILE_SIZE), alpha_val=200)
-            for dx, dy in self.current_piece.get_block_positions():
-                if self.map.is_valid_position(dx, dy):
-                    screen.blit(block_texture, self.map_position_to_screen_position(dx, dy))
-
-        # 渲染预测的下落位置
-        if self.current_piece:
-            block_texture = ResourcesManager().get_resource(ResId[self.current_piece.type.value], (GameConfig.TILE_SIZE, GameConfig.TILE_SIZE), alpha_val=50)
-            predict_piece = PieceFactory().create_piece(self.current_piece.x, self.current_piece.y, self.current_piece.type, self.current_piece.rotation)
-            is_down = True
-            while is_down:
-                predict_piece.move(0, 1)
-                for x, y in predict_piece.get_block_positions():
-                    tile = self.map.get_tile(x, y)
-                    if tile and not tile.is_empty():
-                        predict_piece.move(0, -1)  # 撤销移动
-                        is_down = False
-                        break
-            for dx, dy in predict_piece.get_block_positions():
-                if self.map.is_valid_position(dx, dy):
-                    screen.blit(block_texture, self.map_position_to_screen_position(dx, dy))
+        # 渲染地图、当前方块和预测的下落位置，只在地图或当前方块变化时重绘
+        piece = self.current_piece
+        piece_signature = (piece.type, piece.rotation, piece.x, piece.y) if piece else None
+        map_rect = pygame.Rect(self.map_x, self.map_y, self.map.width * GameConfig.TILE_SIZE, self.map.height * GameConfig.TILE_SIZE)
+        self.compositor.add('map', map_rect, (self.map, self.map.version, piece_signature), self._render_map)
 
         # 渲染方块预览
         if self.next_piece_queue:
             font = ResourcesManager().get_resource(ResId.FONT_STHUPO, 24)
-            next_text = font.render("方块预览:", True, (235, 50, 35)) # 红色
+            next_text = TextCache().render(font, "方块预览:", True, (235, 50, 35)) # 红色
             x, y = self.map_position_to_screen_position(self.next_piece_dx - 1, self.next_piece_dy - 2)
-            screen.blit(next_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))
+            blits = [(next_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))]
             for i, next_piece in enumerate(self.next_piece_queue):
-                block_texture = ResourcesManager().get_resource(ResId[next_piece.type.value], (GameConfig.TILE_SIZE, GameConfig.TILE_SIZE), alpha_val=230)
+                atlas, area = TileAtlas().get(next_piece.type, GameConfig.TILE_SIZE, 230)
                 for dx, dy in next_piece.get_block_positions():
                     dx, dy = dx - next_piece.x + self.next_piece_dx, dy - next_piece.y + self.next_piece_dy
                     x, y = self.map_position_to_screen_position(dx, dy + i * 5)
-                    screen.blit(block_texture, (x + GameConfig.TILE_SIZE // 2, y + GameConfig.TILE_SIZE // 2))
+                    blits.append((atlas, (x + GameConfig.TILE_SIZE // 2, y + GameConfig.TILE_SIZE // 2), area))
+            preview_signature = tuple((next_piece.type, next_piece.rotation) for next_piece in self.next_piece_queue)
+            self.compositor.add_blits('next_piece_queue', blits, preview_signature)
         
         # 渲染分数
         font = ResourcesManager().get_resource(ResId.FONT_STHUPO, 24)
-        score_text = font.render(f"分数: {self.score}", True, (235, 50, 35)) # 红色
+        score_text = TextCache().render(font, f"分数: {self.score}", True, (235, 50, 35)) # 红色
         x, y = self.map_position_to_screen_position(self.score_dx, self.score_dy)
-        screen.blit(score_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))
+        self.compositor.add_surface('score', score_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))
 
         # 渲染游戏帧计数器
         font = ResourcesManager().get_resource(ResId.FONT_STHUPO, 24)
-        game_frame_counter_text = font.render(f"游戏时间: {self.game_frame_counter.get_time_parts()}", True, (0, 0, 0)) # 黑色
+        game_frame_counter_text = TextCache().render(font, f"游戏时间: {self.game_frame_counter.get_time_parts()}", True, (0, 0, 0)) # 黑色
         x, y = self.map_position_to_screen_position(self.game_frame_counter_dx, self.game_frame_counter_dy)
-        screen.blit(game_frame_counter_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))
+        self.compositor.add_surface('game_frame_counter', game_frame_counter_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))
+
+        # 渲染回放速度
+        if self.is_replay:
+            speed = GameConfig.REPLAY_SPEEDS[self.replay_speed_index]
+            speed_label = "瞬间" if speed == GameConfig.REPLAY_SPEED_INSTANT else f"x{speed}"
+            replay_speed_text = TextCache().render(font, f"回放速度: {speed_label}", True, (0, 0, 0)) # 黑色
+            x, y = self.map_position_to_screen_position(self.replay_speed_dx, self.replay_speed_dy)
+            self.compositor.add_surface('replay_speed', replay_speed_text, (x - GameConfig.TILE_SIZE // 2, y - GameConfig.TILE_SIZE // 2))
 
         # 渲染游戏结束界面
         if self.is_game_over:
-            self.game_over_panel.render()
+            self.game_over_panel.compose(self.compositor, 'game_over_panel')
 
         # 渲染暂停界面
         if self.is_game_paused:
-            self.pause_panel.render()
+            self.pause_panel.compose(self.compositor, 'pause_panel')
         
         # 渲染重放暂停界面
         if self.is_replay_paused:
-            self.replay_pause_panel.render()
+            self.replay_pause_panel.compose(self.compositor, 'replay_pause_panel')
         
         # 渲染重放结束界面
         if self.is_replay_over:
-            self.replay_over_panel.render()
+            self.replay_over_panel.compose(self.compositor, 'replay_over_panel')
+
+        return self.compositor.render(screen)
+
+    def _render_map(self, screen: pygame.Surface):
+        """渲染地图纹理、当前方块和预测的下落位置"""
+        # 渲染地图纹理（只重绘发生变化的方块）
+        self.map.create_map_texture()
+        if self.map.texture:
+            screen.blit(self.map.texture, (self.map_x, self.map_y))
+
+        if not self.current_piece:
+            return
+        tile_size = GameConfig.TILE_SIZE
+        blits = []
+
+        # 渲染当前方块
+        atlas, area = TileAtlas().get(self.current_piece.type, tile_size, 200)
+        for dx, dy in self.current_piece.get_block_positions():
+            if self.map.is_valid_position(dx, dy):
+                blits.append((atlas, (self.map_x + dx * tile_size, self.map_y + dy * tile_size), area))
+
+        # 渲染预测的下落位置
+        atlas, area = TileAtlas().get(self.current_piece.type, tile_size, 50)
+        # 落点只在方块移动、旋转或地图变化时重新计算
+        piece_x = self.current_piece.x
+        piece_y = self.landing_cache.get_landing_y(self.current_piece, self.map)
+        for dx, dy in self.current_piece.get_shape().offsets:
+            if self.map.is_valid_position(piece_x + dx, piece_y + dy):
+                blits.append((atlas, (self.map_x + (piece_x + dx) * tile_size, self.map_y + (piece_y + dy) * tile_size), area))
+
+        # 当前方块和落点按原来的先后顺序一次提交
+        screen.blits(blits, doreturn=False)
 
     def exit(self):
         # 停止定时器
@@ -617,6 +740,8 @@ class GameScene(Scene):
         self.move_right_timer.stop()
         self.rotate_timer.stop()
         self.auto_save_timer.stop()
+        # 写入回放日志中缓存的事件，直接关闭窗口时不丢失最后一块事件
+        self._close_replay_journal()
 
     def map_position_to_screen_position(self, map_x: int, map_y: int) -> Tuple[int, int]:
         """将地图坐标转换为屏幕坐标"""
@@ -3,6 +3,7 @@ from data.config import GameConfig
 import pygame
 from scene.scene import Scene
 from ui.panel import Panel
+from ui.compositor import Compositor
 from resources.resource_manager import ResId, ResourcesManager
 from scene.scene_manager import SceneManager
 from scene.game.game_replay_data import GameReplayData
@@ -29,6 +30,9 @@ class MenuScene(Scene):
             res_id=None
         )
 
+        # 分层合成器，静态层只有背景图片，每帧只重绘状态变化的按钮
+        self.compositor = Compositor(lambda surface: surface.blit(self.image_background, (0, 0)))
+
         # 创建菜单按钮
         self.menu_panel.add_button("开始游戏", self._start_game)
         self.menu_panel.add_button("继续游戏", self._continue_game)
@@ -52,6 +56,7 @@ class MenuScene(Scene):
         if os.path.exists(GameConfig.SAVE_GAME_DATA_FILE_PATH):
             if not messagebox.askyesno("确认开始新游戏", "当前有保存的游戏数据，是否确认开始新游戏？"):
                 return
+            GameScene.discard_saved_game()
         game_scene = GameScene()
         SceneManager().add_scene(game_scene)
         SceneManager().set_active_scene(game_scene.name)
@@ -90,13 +95,9 @@ class MenuScene(Scene):
         
         # 遍历目录中的文件
         for file_name in os.listdir(replay_data_path):
-            if file_name.endswith('.json'):
-                file_path = os.path.join(replay_data_path, file_name)
-                # 检查是否是重放文件格式
-                pattern = r"game_replay_data_(\d+)\.json"
-                match = re.match(pattern, file_name)
-                if match:
-                    replay_files.append(file_path)
+            # 检查是否是重放文件格式（二进制或旧版JSON）
+            if re.match(GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATTERN, file_name):
+                replay_files.append(os.path.join(replay_data_path, file_name))
         
         return replay_files
     
@@ -134,11 +135,9 @@ class MenuScene(Scene):
         # 获取全局screen对象
         screen = pygame.display.get_surface()
 
-        # 绘制背景
-        screen.blit(self.image_background, (0, 0))
-
-        # 绘制菜单面板
-        self.menu_panel.render()
+        # 绘制菜单面板，背景在合成器的静态层中
+        self.menu_panel.compose(self.compositor, 'menu_panel')
+        return self.compositor.render(screen)
 
     def exit(self):
         pass
\ No newline at end of file
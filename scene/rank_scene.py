@@ -5,8 +5,10 @@ from data.config import GameConfig
 from resources.resource_manager import ResId, ResourcesManager
 from ui.panel import Panel
 from ui.button import Button, ButtonState
+from ui.compositor import Compositor
+from tools.text_cache import TextCache
 from scene.scene_manager import SceneManager
-from scene.game.game_replay_data import GameReplayData
+from scene.game.game_leaderboard import GameLeaderboard
 
 
 class RankScene(Scene):
@@ -42,9 +44,20 @@ class RankScene(Scene):
         self.back_button.set_background_image(ButtonState.HOVERED, ResId.BUTTON_HOVERED)
         self.back_button.set_background_image(ButtonState.PRESSED, ResId.BUTTON_PRESSED)
         
-        # 排行榜数据
+        # 排行榜数据，只保存当前页的记录
+        self.leaderboard = None
         self.game_records = []
         self.selected_index = -1
+        self.page = 0
+        self.page_size = (self.panel_height - 160) // 40  # 面板内能完整显示的记录行数
+        self.total_records = 0
+        self.sort_key = 'score'
+        self.sort_descending = True
+        # 表头对应的排序字段，排名列不能排序
+        self.header_sort_keys = [None, 'score', 'game_time', 'start_date']
+        
+        # 分层合成器，静态层为背景、面板和标题
+        self.compositor = Compositor(self._render_static_layer)
         
         # 加载游戏记录
         self._load_game_records()
@@ -63,40 +76,45 @@ class RankScene(Scene):
         
     
     def _load_game_records(self):
-        """加载游戏记录"""
-        import re
-        
+        """加载游戏记录，将重放索引同步到排行榜数据库后只查询第一页"""
         replay_data_path = GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH
         self.game_records = []
         
         # 确保目录存在
         if not os.path.exists(replay_data_path):
             os.makedirs(replay_data_path, exist_ok=True)
-            return
-        
-        # 遍历目录中的文件
-        for file_name in os.listdir(replay_data_path):
-            if file_name.endswith('.json'):
-                file_path = os.path.join(replay_data_path, file_name)
-                # 检查是否是重放文件格式
-                pattern = r"game_replay_data_(\d+)\.json"
-                match = re.match(pattern, file_name)
-                if match:
-                    try:
-                        replay_data = GameReplayData.load_from_file(file_path)
-                        if replay_data:
-                            self.game_records.append({
-                                'file_name': file_name,
-                                'file_path': file_path,
-                                'score': replay_data.score,
-                                'game_time': replay_data.game_finished_time,
-                                'start_date': replay_data.game_start_date
-                            })
-                    except Exception as e:
-                        print(f"加载重放文件失败 {file_path}: {e}")
-        
-        # 按分数排序
-        self.game_records.sort(key=lambda x: x['score'], reverse=True)
+        
+        try:
+            self.leaderboard = GameLeaderboard()
+            self.leaderboard.sync_if_changed(replay_data_path)
+            self.total_records = self.leaderboard.count()
+        except Exception as e:
+            print(f"加载排行榜失败: {e}")
+            self.leaderboard = None
+            self.total_records = 0
+        self._load_page(0)
+    
+    def _page_count(self) -> int:
+        """总页数，没有记录时为1"""
+        return max(1, (self.total_records + self.page_size - 1) // self.page_size)
+    
+    def _load_page(self, page: int, selected_index: int = -1):
+        """查询指定页的记录"""
+        self.page = max(0, min(page, self._page_count() - 1))
+        if self.leaderboard is None:
+            self.game_records = []
+        else:
+            self.game_records = self.leaderboard.get_page(self.page, self.page_size, self.sort_key, self.sort_descending)
+        self.selected_index = min(selected_index, len(self.game_records) - 1)
+    
+    def _toggle_sort(self, sort_key: str):
+        """切换排序字段，再次选择同一字段时切换升序/降序"""
+        if self.sort_key == sort_key:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key = sort_key
+            self.sort_descending = True
+        self._load_page(0)
     
     
     def _back_to_menu(self):
@@ -137,9 +155,25 @@ class RankScene(Scene):
             if event.key == pygame.K_UP:
                 if self.selected_index > 0:
                     self.selected_index -= 1
+                elif self.page > 0:
+                    # 翻到上一页的最后一条
+                    self._load_page(self.page - 1, self.page_size - 1)
             elif event.key == pygame.K_DOWN:
                 if self.selected_index < len(self.game_records) - 1:
                     self.selected_index += 1
+                elif self.page < self._page_count() - 1:
+                    # 翻到下一页的第一条
+                    self._load_page(self.page + 1, 0)
+            elif event.key in (pygame.K_LEFT, pygame.K_PAGEUP):
+                self._load_page(self.page - 1)
+            elif event.key in (pygame.K_RIGHT, pygame.K_PAGEDOWN):
+                self._load_page(self.page + 1)
+            elif event.key == pygame.K_s:
+                self._toggle_sort('score')
+            elif event.key == pygame.K_t:
+                self._toggle_sort('game_time')
+            elif event.key == pygame.K_d:
+                self._toggle_sort('start_date')
             elif event.key == pygame.K_RETURN:
                 self._replay_selected()
             elif event.key == pygame.K_ESCAPE:
@@ -150,6 +184,13 @@ class RankScene(Scene):
             if event.button == 1:  # 左键点击
                 mouse_x, mouse_y = event.pos
                 
+                # 点击表头切换排序
+                header_y = self.panel_y + 80
+                if header_y <= mouse_y < header_y + 30 and mouse_x >= self.panel_x + 180:
+                    column = (mouse_x - (self.panel_x + 180)) // 180
+                    if column < len(self.header_sort_keys) and self.header_sort_keys[column]:
+                        self._toggle_sort(self.header_sort_keys[column])
+                
                 # 检查是否点击了记录区域
                 record_area = pygame.Rect(
                     self.panel_x + 50,
@@ -172,21 +213,38 @@ class RankScene(Scene):
         """渲染场景"""
         screen = pygame.display.get_surface()
         
+        # 背景、面板和标题在合成器的静态层中，记录只在翻页、排序或选中变化时重绘
+        records_signature = (
+            self.sort_key, self.sort_descending, self.selected_index, self.page, self.total_records,
+            tuple(record['file_name'] for record in self.game_records)
+        )
+        self.compositor.add('records', self.rank_panel.rect, records_signature, self._render_records)
+        
+        # 绘制按钮
+        self.back_button.compose(self.compositor, 'back_button')
+        self.replay_button.compose(self.compositor, 'replay_button')
+        return self.compositor.render(screen)
+    
+    def _render_static_layer(self, surface: pygame.Surface):
+        """绘制静态层：背景、面板和标题"""
         # 绘制背景
-        screen.blit(self.background, (0, 0))
+        surface.blit(self.background, (0, 0))
         
         # 绘制面板
-        self.rank_panel.render()
+        surface.blit(self.rank_panel.image, self.rank_panel.rect)
         
         # 绘制标题
         font = ResourcesManager().get_resource(ResId.FONT_STHUPO, 32)
-        title_text = font.render("游戏排行榜", True, (235, 50, 35))  # 红色
+        title_text = TextCache().render(font, "游戏排行榜", True, (235, 50, 35))  # 红色
         title_rect = title_text.get_rect(center=(GameConfig.WINDOW_WIDTH // 2, self.panel_y + 30))
-        screen.blit(title_text, title_rect)
-        
+        surface.blit(title_text, title_rect)
+    
+    def _render_records(self, screen: pygame.Surface):
+        """绘制表头、当前页的记录和页码"""
         if not self.game_records:
             # 没有记录
-            no_records_text = font.render("没有游戏记录", True, (0, 0, 0))  # 黑色
+            font = ResourcesManager().get_resource(ResId.FONT_STHUPO, 32)
+            no_records_text = TextCache().render(font, "没有游戏记录", True, (0, 0, 0))  # 黑色
             no_records_rect = no_records_text.get_rect(center=(GameConfig.WINDOW_WIDTH // 2, GameConfig.WINDOW_HEIGHT // 2))
             screen.blit(no_records_text, no_records_rect)
         else:
@@ -197,14 +255,17 @@ class RankScene(Scene):
             header_y = self.panel_y + 80
             
             for i, header in enumerate(headers):
-                header_text = header_font.render(header, True, (0, 0, 0))  # 黑色
+                # 当前排序的列标出升序/降序
+                if self.header_sort_keys[i] == self.sort_key:
+                    header += "(降)" if self.sort_descending else "(升)"
+                header_text = TextCache().render(header_font, header, True, (0, 0, 0))  # 黑色
                 screen.blit(header_text, (header_x + i * 180, header_y))
             
             # 绘制记录
             record_font = ResourcesManager().get_resource(ResId.FONT_STHUPO, 18)
             
             for i, record in enumerate(self.game_records):
-                rank = i + 1
+                rank = record['rank']
                 score = record['score']
                 game_time = record['game_time'] if record['game_time'] else "未完成"
                 start_date = record['start_date']
@@ -219,21 +280,23 @@ class RankScene(Scene):
                     pygame.draw.rect(screen, (100, 100, 100), highlight_rect, 2)
                 
                 # 绘制记录信息
-                rank_text = record_font.render(str(rank), True, (0, 0, 0))
-                score_text = record_font.render(str(score), True, (0, 0, 0))
-                time_text = record_font.render(game_time, True, (0, 0, 0))
-                date_text = record_font.render(start_date, True, (0, 0, 0))
+                rank_text = TextCache().render(record_font, str(rank), True, (0, 0, 0))
+                score_text = TextCache().render(record_font, str(score), True, (0, 0, 0))
+                time_text = TextCache().render(record_font, game_time, True, (0, 0, 0))
+                date_text = TextCache().render(record_font, start_date, True, (0, 0, 0))
                 
                 screen.blit(rank_text, (header_x, y))
                 screen.blit(score_text, (header_x + 180, y))
                 screen.blit(time_text, (header_x + 360, y))
                 screen.blit(date_text, (header_x + 540, y))
-        
-        # 绘制按钮
-        self.back_button.render()
-        self.replay_button.render()
-        
+            
+            # 绘制页码
+            page_text = TextCache().render(record_font, f"第 {self.page + 1}/{self._page_count()} 页  共 {self.total_records} 条", True, (0, 0, 0))
+            page_rect = page_text.get_rect(center=(GameConfig.WINDOW_WIDTH // 2, self.panel_y + self.panel_height - 30))
+            screen.blit(page_text, page_rect)
     
     def exit(self):
         """退出场景"""
-        pass
\ No newline at end of file
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+            self.leaderboard = None
\ No newline at end of file
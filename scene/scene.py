@@ -5,6 +5,8 @@ import pygame
 class Scene:
     def __init__(self, name):
         self.name = name
+        # 分层合成器，由使用合成器渲染的场景创建
+        self.compositor = None
 
     def enter(self):
         pass
@@ -16,7 +18,13 @@ class Scene:
         pass
 
     def render(self):
+        """渲染场景，返回需要更新到窗口的矩形列表，返回None时更新整个窗口"""
         pass
 
+    def invalidate(self):
+        """下一帧整屏重绘，用于场景之外的内容（如性能分析浮层）覆盖或离开屏幕之后"""
+        if self.compositor is not None:
+            self.compositor.invalidate()
+
     def exit(self):
         pass
\ No newline at end of file
@@ -41,4 +41,4 @@ class SceneManager(Singleton):
         self.active_scene.update()
 
     def render(self):
-        self.active_scene.render()
+        return self.active_scene.render()
@@ -0,0 +1,177 @@
+"""
+性能分析器 - 统计主循环各阶段和热点函数的耗时，并导出Chrome trace文件
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from core.singleton import Singleton
+from data.config import GameConfig
+
+
+class Profiler(Singleton):
+    """
+    帧耗时分析器
+
+    关闭时scope和profiled只多一次布尔判断；开启后每个计时区间同时记入
+    最近GameConfig.PROFILER_FRAME_WINDOW帧的统计（供浮层显示平均值和p50/p99）
+    和最多GameConfig.PROFILER_TRACE_MAX_EVENTS条的trace缓冲区（供导出Chrome trace）。
+    后台存档线程也会记录，trace中按线程分行显示
+    """
+    enabled = GameConfig.PROFILER_ENABLED
+    _origin_ns = time.perf_counter_ns()
+    # trace缓冲区：(名称, 开始时间ns, 耗时ns, 线程id)
+    _trace_events: Deque[Tuple[str, int, int, int]] = deque(maxlen=GameConfig.PROFILER_TRACE_MAX_EVENTS)
+    # 各计时区间最近若干次的耗时（毫秒）
+    _durations: Dict[str, Deque[float]] = {}
+    # 最近若干帧的帧耗时（毫秒），不含等待帧率的时间
+    _frame_times: Deque[float] = deque(maxlen=GameConfig.PROFILER_FRAME_WINDOW)
+    _frame_start_ns = 0
+    _thread_names: Dict[int, str] = {}
+
+    def set_enabled(self, enabled: bool):
+        """开启或关闭分析，重新开启时清空之前的统计"""
+        if enabled and not Profiler.enabled:
+            self.reset()
+        Profiler.enabled = enabled
+
+    def reset(self):
+        """清空统计和trace缓冲区"""
+        self._trace_events.clear()
+        self._durations.clear()
+        self._frame_times.clear()
+        self._thread_names.clear()
+
+    def record(self, name: str, start_ns: int, duration_ns: int):
+        """
+        记录一个计时区间
+
+        Args:
+            name: 区间名称
+            start_ns: 开始时间（time.perf_counter_ns）
+            duration_ns: 耗时（纳秒）
+        """
+        thread = threading.current_thread()
+        if thread.ident not in self._thread_names:
+            self._thread_names[thread.ident] = thread.name
+        self._trace_events.append((name, start_ns, duration_ns, thread.ident))
+        durations = self._durations.get(name)
+        if durations is None:
+            durations = self._durations.setdefault(name, deque(maxlen=GameConfig.PROFILER_FRAME_WINDOW))
+        durations.append(duration_ns / 1e6)
+
+    @contextmanager
+    def scope(self, name: str) -> Iterator[None]:
+        """
+        计时区间，用于with语句
+
+        Args:
+            name: 区间名称
+        """
+        if not Profiler.enabled:
+            yield
+            return
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start_ns, time.perf_counter_ns() - start_ns)
+
+    def begin_frame(self):
+        """主循环每帧开始时调用（等待帧率之后）"""
+        if Profiler.enabled:
+            Profiler._frame_start_ns = time.perf_counter_ns()
+
+    def end_frame(self):
+        """主循环每帧结束时调用，记录帧耗时"""
+        if Profiler.enabled and self._frame_start_ns:
+            duration_ns = time.perf_counter_ns() - self._frame_start_ns
+            self.record("frame", self._frame_start_ns, duration_ns)
+            self._frame_times.append(duration_ns / 1e6)
+
+    def get_frame_percentiles(self, *percents: float) -> List[float]:
+        """
+        获取最近若干帧帧耗时的百分位数（毫秒）
+
+        Args:
+            percents: 百分位，如50、99
+        """
+        frame_times = sorted(self._frame_times)
+        if not frame_times:
+            return [0.0 for _ in percents]
+        return [frame_times[min(len(frame_times) - 1, int(len(frame_times) * percent / 100))] for percent in percents]
+
+    def get_stats(self) -> Dict[str, Tuple[float, float]]:
+        """获取各计时区间最近若干次耗时的(平均值, 最大值)，单位毫秒"""
+        stats = {}
+        for name, durations in list(self._durations.items()):
+            values = list(durations)
+            if values:
+                stats[name] = (sum(values) / len(values), max(values))
+        return stats
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """将trace缓冲区转换为Chrome trace格式（chrome://tracing、Perfetto可直接打开）"""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        for name, start_ns, duration_ns, tid in list(self._trace_events):
+            events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000,
+                'dur': duration_ns / 1000,
+                'pid': pid,
+                'tid': tid
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, file_path: str = GameConfig.PROFILER_TRACE_FILE_PATH):
+        """
+        在后台线程中导出trace文件
+
+        Args:
+            file_path: trace文件路径
+        """
+        from core.save_writer import SaveWriter
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 在主线程中取出快照，序列化在后台线程中进行
+        trace = self.to_chrome_trace()
+
+        def on_done(success: bool):
+            if success:
+                print(f"性能分析trace已导出：{file_path}")
+
+        SaveWriter().submit(file_path, lambda: json.dumps(trace), on_done)
+
+
+def profiled(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    函数计时装饰器，分析器开启时把每次调用记录为一个计时区间
+
+    Args:
+        name: 区间名称，默认为函数的限定名
+    """
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Profiler.enabled:
+                return func(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                Profiler().record(label, start_ns, time.perf_counter_ns() - start_ns)
+        return wrapper
+    return decorator
@@ -0,0 +1,186 @@
+"""
+回放校验工具 - 批量重新模拟重放文件，检查是否能由游戏种子和事件复现记录的分数
+
+用法：
+    python -m tools.replay_verifier [重放目录或文件 ...] [--workers N] [--json 报告文件]
+
+默认校验GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH目录下的所有重放文件，
+每个工作进程独立模拟一个重放（PieceFactory的随机数状态是进程内的单例，进程之间互不影响），
+有分数不一致或加载失败的重放时返回码为1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from data.config import GameConfig
+
+
+def verify_replay(file_path: str) -> Dict[str, Any]:
+    """
+    在无界面的GameEngine中重新模拟一个重放文件
+
+    Args:
+        file_path: 重放文件路径
+
+    Returns:
+        校验结果：file_path、recorded_score、score、events、frames、load_time、simulate_time、ok、error
+    """
+    from scene.game.game_engine import GameEngine
+    from scene.game.game_replay_data import GameReplayData
+
+    result: Dict[str, Any] = {
+        'file_path': file_path,
+        'recorded_score': None,
+        'score': None,
+        'events': 0,
+        'frames': 0,
+        'load_time': 0.0,
+        'simulate_time': 0.0,
+        'ok': False,
+        'error': None
+    }
+    start = time.perf_counter()
+    replay_data = GameReplayData.load_from_file(file_path)
+    result['load_time'] = time.perf_counter() - start
+    if replay_data is None:
+        result['error'] = "加载失败"
+        return result
+    result['recorded_score'] = replay_data.score
+    result['events'] = len(replay_data.event_queue)
+
+    start = time.perf_counter()
+    try:
+        engine = GameEngine()
+        if not engine.load_replay_data(replay_data):
+            result['error'] = "回放数据不完整"
+            return result
+        result['score'] = engine.run_replay()
+        result['frames'] = engine.game_frame_counter.frame_count
+    except Exception as e:
+        result['error'] = f"模拟失败: {e}"
+        return result
+    finally:
+        result['simulate_time'] = time.perf_counter() - start
+    result['ok'] = result['score'] == result['recorded_score']
+    return result
+
+
+def collect_replay_files(paths: List[str]) -> List[str]:
+    """
+    收集重放文件，目录按文件名中的编号排序，直接给出的文件原样保留
+
+    Args:
+        paths: 重放目录或重放文件路径
+    """
+    from scene.game.game_replay_store import GameReplayStore
+
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_names = [name for name in os.listdir(path) if GameReplayStore.get_replay_id(name) >= 0]
+            file_names.sort(key=GameReplayStore.get_replay_id)
+            file_paths.extend(os.path.join(path, name) for name in file_names)
+        elif os.path.isfile(path):
+            file_paths.append(path)
+        else:
+            print(f"找不到重放文件或目录：{path}")
+    return file_paths
+
+
+def verify_replays(file_paths: List[str], workers: Optional[int] = None, verbose: bool = True) -> Dict[str, Any]:
+    """
+    使用多个进程并行校验重放文件
+
+    Args:
+        file_paths: 重放文件路径
+        workers: 工作进程数，默认为CPU核数
+        verbose: 是否在每个重放校验完成时打印结果
+
+    Returns:
+        校验报告：results（按file_paths的顺序）、mismatches、errors、wall_time、replays_per_second等
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(file_paths) or 1))
+    results: Dict[str, Dict[str, Any]] = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(verify_replay, file_path): file_path for file_path in file_paths}
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 工作进程异常退出
+                result = {'file_path': file_path, 'ok': False, 'error': f"工作进程失败: {e}"}
+            results[file_path] = result
+            if verbose:
+                print(format_result(result))
+    wall_time = time.perf_counter() - start
+
+    ordered = [results[file_path] for file_path in file_paths]
+    simulate_times = [result.get('simulate_time', 0.0) for result in ordered]
+    return {
+        'workers': workers,
+        'total': len(ordered),
+        'mismatches': [result['file_path'] for result in ordered if not result['ok'] and not result.get('error')],
+        'errors': [result['file_path'] for result in ordered if result.get('error')],
+        'wall_time': wall_time,
+        'replays_per_second': len(ordered) / wall_time if wall_time > 0 else 0.0,
+        'frames_per_second': sum(result.get('frames', 0) for result in ordered) / wall_time if wall_time > 0 else 0.0,
+        'average_simulate_time': sum(simulate_times) / len(simulate_times) if simulate_times else 0.0,
+        'max_simulate_time': max(simulate_times, default=0.0),
+        'results': ordered
+    }
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """格式化单个重放的校验结果"""
+    file_name = os.path.basename(result['file_path'])
+    if result.get('error'):
+        return f"[错误] {file_name}: {result['error']}"
+    status = "通过" if result['ok'] else "不一致"
+    return (f"[{status}] {file_name}: 记录分数 {result['recorded_score']} 模拟分数 {result['score']} "
+            f"事件 {result['events']} 帧 {result['frames']} "
+            f"加载 {result['load_time'] * 1000:.1f} ms 模拟 {result['simulate_time'] * 1000:.1f} ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量重新模拟重放文件，检查记录的分数能否复现")
+    parser.add_argument('paths', nargs='*', default=[GameConfig.SAVE_GAME_REPLAY_DATA_FILE_PATH],
+                        help="重放目录或重放文件，默认为存档中的重放目录")
+    parser.add_argument('--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    parser.add_argument('--json', dest='json_path', default=None, help="将完整报告保存为JSON文件")
+    parser.add_argument('--quiet', action='store_true', help="只打印不一致、失败的重放和汇总")
+    args = parser.parse_args(argv)
+
+    file_paths = collect_replay_files(args.paths)
+    if not file_paths:
+        print("没有找到重放文件")
+        return 0
+
+    report = verify_replays(file_paths, args.workers, verbose=not args.quiet)
+    if args.quiet:
+        for result in report['results']:
+            if not result['ok']:
+                print(format_result(result))
+
+    print(f"共校验 {report['total']} 个重放（{report['workers']} 个进程）："
+          f"不一致 {len(report['mismatches'])} 个，失败 {len(report['errors'])} 个")
+    print(f"总耗时 {report['wall_time']:.2f} s，{report['replays_per_second']:.1f} 个重放/秒，"
+          f"{report['frames_per_second']:.0f} 帧/秒")
+    print(f"单个重放模拟耗时：平均 {report['average_simulate_time'] * 1000:.1f} ms，"
+          f"最长 {report['max_simulate_time'] * 1000:.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"校验报告已保存：{args.json_path}")
+
+    return 1 if report['mismatches'] or report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
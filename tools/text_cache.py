@@ -0,0 +1,45 @@
+import pygame
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+from core.singleton import Singleton
+from data.config import GameConfig
+
+
+class TextCache(Singleton):
+    """
+    文字表面缓存，按(字体, 文本, 颜色, 抗锯齿)缓存font.render的结果，超出容量时淘汰最久未使用的项
+
+    字体对象由ResourcesManager按字号缓存，同一字体、同一字号始终是同一个对象，因此字体对象本身就代表了(字体, 字号)；
+    返回的表面是共享的，调用者只能绘制，不能修改
+    """
+    _cache: 'OrderedDict[Tuple[Hashable, ...], pygame.Surface]' = OrderedDict()
+    capacity = GameConfig.TEXT_CACHE_SIZE
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color) -> pygame.Surface:
+        """
+        渲染文字，参数与pygame.font.Font.render一致，文字不变时直接返回缓存的表面
+
+        Args:
+            font: 字体对象
+            text: 文本
+            antialias: 是否抗锯齿
+            color: 文字颜色
+
+        Returns:
+            文字表面
+        """
+        key = (font, text, tuple(color), antialias)
+        surface = self._cache.get(key)
+        if surface is not None:
+            self._cache.move_to_end(key)
+            return surface
+        surface = font.render(text, antialias, color)
+        self._cache[key] = surface
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
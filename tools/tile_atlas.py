@@ -0,0 +1,95 @@
+import pygame
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.singleton import Singleton
+from data.config import GameConfig
+from data.tile import TileType
+
+
+class TileAtlas(Singleton):
+    """
+    方块图集
+
+    每种(尺寸, 透明度)占图集的一行，行内依次是所有方块类型；方块图片预先缩放，
+    透明度直接乘进每个像素的alpha，因此不同透明度的方块可以放在同一张表面中，
+    绘制时按缓存的矩形从同一张表面做区域blit，不再每个方块调用一次ResourcesManager，
+    也不会通过set_alpha修改资源管理器共享的表面
+    """
+    _surface: Optional[pygame.Surface] = None
+    # 图集中的行：(尺寸, 透明度)
+    _rows: List[Tuple[int, int]] = []
+    # (方块类型, 尺寸, 透明度) -> 图集中的矩形
+    _rects: Dict[Tuple[TileType, int, int], pygame.Rect] = {}
+    # 方块图片的来源：(方块类型, 尺寸) -> 表面，为None时从ResourcesManager加载
+    _image_loader: Optional[Callable[[TileType, int], pygame.Surface]] = None
+
+    def build(self, size: int = GameConfig.TILE_SIZE, alphas: Iterable[int] = GameConfig.TILE_ATLAS_ALPHAS,
+              image_loader: Optional[Callable[[TileType, int], pygame.Surface]] = None):
+        """
+        启动时预先生成所有方块类型在各透明度下的图块
+
+        Args:
+            size: 方块尺寸
+            alphas: 透明度列表
+            image_loader: 方块图片的来源，没有资源文件的环境（例如基准测试）可以提供生成的图片，
+                          默认从ResourcesManager加载
+        """
+        if image_loader is not None and image_loader is not TileAtlas._image_loader:
+            TileAtlas._image_loader = image_loader
+            TileAtlas._surface = None
+        rows = list(self._rows)
+        rows.extend(row for row in dict.fromkeys((size, alpha) for alpha in alphas) if row not in rows)
+        if rows != self._rows or self._surface is None:
+            self._build_rows(rows)
+
+    def get(self, tile_type: TileType, size: int, alpha: int) -> Tuple[pygame.Surface, pygame.Rect]:
+        """
+        获取方块在图集中的位置，没有预先生成的(尺寸, 透明度)会追加到图集中
+
+        Args:
+            tile_type: 方块类型
+            size: 方块尺寸
+            alpha: 透明度（0-255）
+
+        Returns:
+            (图集表面, 方块所在的矩形)
+        """
+        rect = self._rects.get((tile_type, size, alpha))
+        if rect is None:
+            self._build_rows(self._rows + [(size, alpha)])
+            rect = self._rects[(tile_type, size, alpha)]
+        return self._surface, rect
+
+    def _build_rows(self, rows: List[Tuple[int, int]]):
+        """重新生成整个图集"""
+        # 通过类读取，函数不会被绑定为方法
+        load_image = TileAtlas._image_loader or self._load_resource_image
+        tile_types = list(TileType)
+        width = max(size for size, _ in rows) * len(tile_types)
+        height = sum(size for size, _ in rows)
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+
+        rects = {}
+        y = 0
+        for size, alpha in rows:
+            for i, tile_type in enumerate(tile_types):
+                rect = pygame.Rect(i * size, y, size, size)
+                image = load_image(tile_type, size)
+                # 在透明背景上相加等于原样复制像素（包括alpha），再把透明度乘进alpha
+                surface.blit(image, rect, special_flags=pygame.BLEND_RGBA_ADD)
+                surface.fill((255, 255, 255, alpha), rect, special_flags=pygame.BLEND_RGBA_MULT)
+                rects[(tile_type, size, alpha)] = rect
+            y += size
+
+        TileAtlas._surface = surface
+        TileAtlas._rows = rows
+        TileAtlas._rects = rects
+
+    @staticmethod
+    def _load_resource_image(tile_type: TileType, size: int) -> pygame.Surface:
+        """从ResourcesManager加载方块图片"""
+        from resources.resource_manager import ResourcesManager, ResId
+        return ResourcesManager().get_resource(ResId[tile_type.value], (size, size))
@@ -1,31 +1,142 @@
+import heapq
+import itertools
 import pygame
-from typing import Callable, Optional
+from enum import Enum
+from typing import Callable, List, Optional, Tuple
+
+
+class CatchUpPolicy(Enum):
+    """重复定时器一次错过多个触发时间时的补偿策略"""
+    SKIP = 1  # 只触发一次，下次触发时间从当前时间重新计算
+    FIRE_ALL = 2  # 补齐错过的每一次触发
+    ALIGN = 3  # 只触发一次，下次触发时间保持原来的节拍
+
+
+class TimerScheduler:
+    """
+    定时器调度器
+
+    所有运行中的定时器按下次触发时间放在最小堆中，update只弹出已到期的定时器，
+    没有定时器到期时只需查看堆顶，开销与定时器总数无关。
+    定时器修改间隔、加速或停止时不从堆中删除旧项，而是通过代号使旧项失效，弹出时丢弃；
+    失效项超过一半时重建堆。时间源可以注入，例如模拟帧号，从而在无界面环境中运行
+    """
+
+    def __init__(self, time_source: Callable[[], int] = pygame.time.get_ticks):
+        """
+        初始化调度器
+
+        Args:
+            time_source: 返回当前时间的函数，定时器间隔的单位与其一致
+        """
+        self.time_source = time_source
+        # 堆中的项：(触发时间, 定时器创建顺序, 定时器代号, 定时器)，同一时间到期的定时器按创建顺序触发
+        self._heap: List[Tuple[int, int, int, 'Timer']] = []
+        self._stale_count = 0  # 堆中已失效的项数
+        self._paused_at: Optional[int] = None
+        self._paused_total = 0  # 累计暂停的时长
+
+    @property
+    def is_paused(self) -> bool:
+        """检查调度器是否已暂停"""
+        return self._paused_at is not None
+
+    def now(self) -> int:
+        """获取调度器的当前时间，不包含暂停的时长"""
+        if self._paused_at is not None:
+            return self._paused_at - self._paused_total
+        return self.time_source() - self._paused_total
+
+    def pause(self):
+        """暂停所有定时器，恢复后剩余时间不变"""
+        if self._paused_at is None:
+            self._paused_at = self.time_source()
+
+    def resume(self):
+        """恢复所有定时器"""
+        if self._paused_at is not None:
+            self._paused_total += self.time_source() - self._paused_at
+            self._paused_at = None
+
+    def update(self) -> int:
+        """
+        触发所有已到期的定时器
+
+        Returns:
+            本次触发的次数
+        """
+        if self._paused_at is not None:
+            return 0
+        now = self.now()
+        fired = 0
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due_time, _, generation, timer = heapq.heappop(heap)
+            if generation != timer.generation or not timer.scheduled:
+                self._stale_count -= 1
+                continue
+            timer.scheduled = False
+            timer._fire(now, due_time)
+            fired += 1
+        return fired
+
+    def _push(self, timer: 'Timer'):
+        """将定时器按下次触发时间加入堆"""
+        heapq.heappush(self._heap, (timer.due_time, timer.order, timer.generation, timer))
+
+    def _discard(self):
+        """记录一个失效的堆项，失效项过多时重建堆"""
+        self._stale_count += 1
+        if self._stale_count > 32 and self._stale_count * 2 > len(self._heap):
+            self._heap = [item for item in self._heap if item[2] == item[3].generation and item[3].scheduled]
+            heapq.heapify(self._heap)
+            self._stale_count = 0
 
 
 class Timer:
     """
-    基于pygame的定时器类，提供暂停、加速、触发回调等功能
+    定时器类，提供暂停、加速、触发回调等功能
+
+    定时器由TimerScheduler统一调度，多个定时器共用一个调度器时每帧只需调用一次调度器的update；
+    没有指定调度器时使用自己的调度器，调用update即可。
+    默认使用pygame.time.get_ticks的真实时间（毫秒），也可以传入其他时间源，
+    例如游戏玩法定时器使用模拟帧号，间隔的单位与时间源一致
     """
+    # 定时器的创建顺序，同一时间到期的定时器按创建顺序触发
+    _orders = itertools.count()
     
-    def __init__(self, interval: int, callback: Optional[Callable] = None, repeat: bool = True):
+    def __init__(self, interval: int, callback: Optional[Callable] = None, repeat: bool = True,
+                 time_source: Callable[[], int] = pygame.time.get_ticks,
+                 scheduler: Optional[TimerScheduler] = None, catch_up: CatchUpPolicy = CatchUpPolicy.SKIP):
         """
         初始化定时器
         
         Args:
-            interval: 定时间隔（毫秒）
+            interval: 定时间隔（毫秒，或时间源的时间单位）
             callback: 定时器触发时的回调函数
             repeat: 是否重复触发，False则只触发一次
+            time_source: 返回当前时间的函数，指定scheduler时使用调度器的时间源
+            scheduler: 定时器调度器
+            catch_up: 错过多个触发时间时的补偿策略
         """
         self.interval = interval  # 原始间隔时间（毫秒）
         self.callback = callback  # 回调函数
         self.repeat = repeat  # 是否重复
+        self.scheduler = scheduler if scheduler is not None else TimerScheduler(time_source)
+        self.catch_up = catch_up
+        self.order = next(Timer._orders)
         
         # 定时器状态 - True表示运行，False表示暂停
         self.state = False
         
         # 时间相关
         self.last_time = 0  # 上次触发时间
-        self.accumulated_time = 0  # 累积时间
+        self.due_time = 0  # 下次触发时间
+        self.remaining_time: Optional[int] = None  # 暂停时距离下次触发的剩余时间
+        
+        # 调度相关 - 每次重新调度时代号加1，堆中代号不一致的项已失效
+        self.generation = 0
+        self.scheduled = False
         
         # 加速相关 - 实时计算，不存储加速间隔
         self.acceleration_factor = 1.0  # 加速因子
@@ -44,16 +155,60 @@ class Timer:
     def current_interval(self) -> int:
         """获取当前间隔时间（实时计算）"""
         return int(self.interval / self.acceleration_factor)
+
+    def _schedule(self, due_time: int):
+        """按新的触发时间重新调度"""
+        self._unschedule()
+        self.generation += 1
+        self.due_time = due_time
+        self.scheduled = True
+        self.scheduler._push(self)
+
+    def _unschedule(self):
+        """使堆中的旧项失效"""
+        if self.scheduled:
+            self.scheduled = False
+            self.generation += 1
+            self.scheduler._discard()
+
+    def _reschedule(self):
+        """间隔或加速变化后，从上次触发时间重新计算下次触发时间"""
+        if self.state is True:
+            self._schedule(self.last_time + max(1, self.current_interval))
+        
+    def start(self, delay: Optional[int] = None):
+        """
+        启动定时器
         
-    def start(self):
-        """启动定时器"""
+        Args:
+            delay: 第一次触发前的等待时间，默认为当前间隔，0表示下一次update时立即触发
+        """
         self.state = True
-        self.last_time = pygame.time.get_ticks()
-        self.accumulated_time = 0
+        self.remaining_time = None
+        self.last_time = self.scheduler.now()
+        self._schedule(self.last_time + (max(1, self.current_interval) if delay is None else delay))
         
     def stop(self):
         """停止定时器"""
         self.state = False
+        self.remaining_time = None
+        self._unschedule()
+
+    def pause(self):
+        """暂停定时器，恢复后从剩余时间继续计时"""
+        if self.state is True:
+            self.remaining_time = max(0, self.due_time - self.scheduler.now())
+            self.state = False
+            self._unschedule()
+
+    def resume(self):
+        """恢复暂停的定时器"""
+        if self.remaining_time is not None:
+            now = self.scheduler.now()
+            self.state = True
+            self.last_time = now + self.remaining_time - max(1, self.current_interval)
+            self._schedule(now + self.remaining_time)
+            self.remaining_time = None
 
     def set_acceleration(self, factor: float):
         """
@@ -63,42 +218,106 @@ class Timer:
             factor: 加速因子，大于1表示加速，小于1表示减速
         """
         self.acceleration_factor = factor
+        self._reschedule()
             
     def reset_acceleration(self):
         """重置加速，恢复正常速度"""
         self.acceleration_factor = 1.0
+        self._reschedule()
             
     def set_interval(self, interval: int):
         """设置新的定时间隔"""
         self.interval = interval
+        self._reschedule()
             
     def update(self):
-        """更新定时器状态，检查是否需要触发回调"""
-        if self.state is False:
+        """更新定时器所属的调度器，触发到期的定时器（共用调度器时会触发其中所有到期的定时器）"""
+        self.scheduler.update()
+
+    def _fire(self, now: int, due_time: int):
+        """由调度器在到期时调用：触发回调并按补偿策略安排下次触发"""
+        generation = self.generation
+        # 触发回调
+        if self.callback:
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"定时器回调函数执行错误: {e}")
+        
+        # 回调中重新启动、停止或修改了定时器时，以回调中的设置为准
+        if self.generation != generation or self.state is not True:
             return
-            
-        current_time = pygame.time.get_ticks()
-        elapsed_time = current_time - self.last_time
-        
-        # 检查是否达到触发时间
-        if elapsed_time >= self.current_interval:
-            # 触发回调
-            if self.callback:
-                try:
-                    self.callback()
-                except Exception as e:
-                    print(f"定时器回调函数执行错误: {e}")
-            
-            # 重置计时器
-            self.last_time = current_time
-            
-            # 如果不重复，则停止定时器
-            if not self.repeat:
-                self.stop()
+        
+        # 如果不重复，则停止定时器
+        if not self.repeat:
+            self.stop()
+            return
+        
+        interval = max(1, self.current_interval)
+        if self.catch_up == CatchUpPolicy.SKIP:
+            self.last_time = now
+            self._schedule(now + interval)
+        elif self.catch_up == CatchUpPolicy.FIRE_ALL:
+            # 下次触发时间仍不晚于当前时间时，会在本次update中继续触发
+            self.last_time = due_time
+            self._schedule(due_time + interval)
+        else:
+            self.last_time = due_time + (now - due_time) // interval * interval
+            self._schedule(self.last_time + interval)
         
     def reset(self):
         """重置定时器到初始状态"""
+        self._unschedule()
         self.state = None
         self.last_time = 0
-        self.accumulated_time = 0
-        self.acceleration_factor = 1.0
\ No newline at end of file
+        self.remaining_time = None
+        self.acceleration_factor = 1.0
+
+
+class FixedTimestep:
+    """
+    固定步长的模拟时钟
+
+    把真实流逝的时间累加到累加器中，每凑够一个步长就执行一次模拟，渲染帧率与模拟频率无关；
+    卡顿之后一次update最多补max_ticks_per_update步，超出的时间直接丢弃，避免越补越慢
+    """
+
+    def __init__(self, tick_rate: int, max_ticks_per_update: int, time_source: Callable[[], int] = pygame.time.get_ticks):
+        """
+        初始化模拟时钟
+
+        Args:
+            tick_rate: 每秒模拟步数
+            max_ticks_per_update: 每次update最多执行的模拟步数
+            time_source: 返回当前真实时间（毫秒）的函数
+        """
+        self.tick_ms = 1000 / tick_rate  # 每步的时长（毫秒）
+        self.max_ticks_per_update = max_ticks_per_update
+        self.time_source = time_source
+        self.accumulator = 0.0  # 还没有模拟的时间（毫秒）
+        self.last_time: Optional[int] = None
+
+    def reset(self):
+        """清空累加器，暂停期间调用，恢复后不会补回暂停的时间"""
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def update(self) -> int:
+        """
+        累加真实流逝的时间
+
+        Returns:
+            本次需要执行的模拟步数
+        """
+        current_time = self.time_source()
+        if self.last_time is not None:
+            self.accumulator += current_time - self.last_time
+        self.last_time = current_time
+
+        ticks = int(self.accumulator // self.tick_ms)
+        if ticks > self.max_ticks_per_update:
+            ticks = self.max_ticks_per_update
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.tick_ms
+        return ticks
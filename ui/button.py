@@ -3,6 +3,7 @@ from enum import Enum
 import sys
 import os
 from resources.resource_manager import ResourcesManager, ResId
+from tools.text_cache import TextCache
 
 class ButtonState(Enum):
     """按钮状态枚举"""
@@ -67,6 +68,10 @@ class Button:
         
         # 是否被按下
         self.is_pressed = False
+
+        # 每种状态预先合成的表面（背景、边框和文本）及其外观签名，尺寸、文本、颜色或背景图片变化时重新合成
+        self.state_surfaces = {}
+        self.state_surfaces_size = None
     
     def set_colors(self, state, bg_color=None, border_color=None, text_color=None):
         """
@@ -84,6 +89,7 @@ class Button:
             self.colors[state]['border'] = border_color
         if text_color is not None:
             self.colors[state]['text'] = text_color
+        self.state_surfaces.pop(state, None)
     
     def set_background_image(self, state: ButtonState, res_id: ResId):
         """
@@ -100,6 +106,7 @@ class Button:
         else:
             print(f"未知的资源ID: {res_id}")
             self.background_images[state] = None
+        self.state_surfaces.pop(state, None)
     
     def set_position(self, x, y):
         """设置按钮位置"""
@@ -108,7 +115,9 @@ class Button:
     
     def set_text(self, text):
         """设置按钮文本"""
-        self.text = text
+        if text != self.text:
+            self.text = text
+            self.state_surfaces.clear()
     
     def set_callback(self, callback):
         """设置回调函数"""
@@ -143,30 +152,73 @@ class Button:
         
         return False
     
-    def render(self):
+    def compose(self, compositor, key):
+        """
+        登记到分层合成器，按钮状态或文本变化时才重绘
+
+        Args:
+            compositor (Compositor): 分层合成器
+            key: 区域的唯一标识
+        """
+        compositor.add(key, self.rect, self._state_signature(self.state), lambda screen: self.render())
+
+    def _state_signature(self, state: ButtonState) -> tuple:
+        """
+        指定状态的外观签名：尺寸、文本、颜色和背景图片，签名不变时合成的表面可以直接复用
+
+        Args:
+            state (ButtonState): 按钮状态
         """
-        绘制按钮
+        colors = self.colors[state]
+        return (state, self.rect.size, self.text, colors['bg'], colors['border'], colors['text'],
+                self.background_images[state])
+
+    def _compose_state_surface(self, state: ButtonState) -> pygame.Surface:
+        """
+        合成指定状态的按钮表面
         
         Args:
-            surface: pygame表面
+            state (ButtonState): 按钮状态
         """
-        # 获取当前状态的颜色
-        colors = self.colors[self.state]
+        # 获取该状态的颜色
+        colors = self.colors[state]
         
         # 绘制背景或背景图片
-        screen = pygame.display.get_surface()
-        if self.background_images[self.state]:
-            # 加载背景图片
-            image = ResourcesManager().get_resource(self.background_images[self.state], (self.rect.width, self.rect.height))
-            screen.blit(image, self.rect)
+        if self.background_images[state]:
+            # 复制背景图片而不是绘制到透明表面上，保留图片原有的透明度
+            image = ResourcesManager().get_resource(self.background_images[state], (self.rect.width, self.rect.height))
+            surface = image.copy()
+            rect = surface.get_rect()
         else:
-            pygame.draw.rect(screen, colors['bg'], self.rect)
+            surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            rect = surface.get_rect()
+            pygame.draw.rect(surface, colors['bg'], rect)
             # 绘制边框
-            pygame.draw.rect(screen, colors['border'], self.rect, 2)
-        
+            pygame.draw.rect(surface, colors['border'], rect, 2)
         
         # 绘制文本
         if self.text:
-            text_surface = self.font.render(self.text, True, colors['text'])
-            text_rect = text_surface.get_rect(center=self.rect.center)
-            screen.blit(text_surface, text_rect)
+            text_surface = TextCache().render(self.font, self.text, True, colors['text'])
+            text_rect = text_surface.get_rect(center=rect.center)
+            surface.blit(text_surface, text_rect)
+        return surface
+
+    def render(self):
+        """
+        绘制按钮，每种状态的表面只在第一次使用或尺寸、文本、颜色、背景图片变化后合成一次
+        """
+        # 面板会直接修改按钮的rect，尺寸变化时重新合成
+        if self.state_surfaces_size != self.rect.size:
+            self.state_surfaces.clear()
+            self.state_surfaces_size = self.rect.size
+        
+        # 颜色字典可能被直接修改而没有经过set_colors，按签名判断缓存的表面是否仍然有效
+        signature = self._state_signature(self.state)
+        cached = self.state_surfaces.get(self.state)
+        if cached is None or cached[0] != signature:
+            cached = (signature, self._compose_state_surface(self.state))
+            self.state_surfaces[self.state] = cached
+        surface = cached[1]
+        
+        screen = pygame.display.get_surface()
+        screen.blit(surface, self.rect)
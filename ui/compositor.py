@@ -0,0 +1,123 @@
+import pygame
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# 区域绘制函数，参数为屏幕表面，只能在登记的矩形内绘制
+DrawFunc = Callable[[pygame.Surface], None]
+
+
+class Compositor:
+    """
+    分层合成器
+
+    静态层（背景、面板外框、标题等不变的内容）只绘制一次并缓存为一张表面；
+    动态元素每帧按绘制顺序登记为区域，每个区域带有签名，只有签名或位置变化、区域出现或消失时，
+    才从静态层恢复受影响的矩形，并在这些矩形内按顺序重绘与之相交的区域。
+    render返回本帧需要更新到窗口的矩形，画面没有变化时返回空列表
+    """
+
+    def __init__(self, build_static_layer: Callable[[pygame.Surface], None]):
+        """
+        初始化Compositor对象
+
+        Args:
+            build_static_layer: 绘制静态层的函数，参数为与屏幕大小相同的表面
+        """
+        self.build_static_layer = build_static_layer
+        self.static_layer: Optional[pygame.Surface] = None
+        self.full_redraw = True  # 下一帧是否整屏重绘
+        # 上一帧的区域：key -> (矩形, 签名)
+        self._regions: Dict[Hashable, Tuple[pygame.Rect, Any]] = {}
+        # 本帧登记的区域，按绘制顺序排列
+        self._frame: List[Tuple[Hashable, pygame.Rect, Any, DrawFunc]] = []
+
+    def invalidate(self):
+        """静态层内容变化时调用，下一帧重建静态层并整屏重绘"""
+        self.static_layer = None
+        self.full_redraw = True
+
+    def add(self, key: Hashable, rect: pygame.Rect, signature: Any, draw: DrawFunc):
+        """
+        登记一个区域
+
+        Args:
+            key: 区域的唯一标识
+            rect: 区域的矩形，draw只能在矩形内绘制
+            signature: 区域内容的签名，与上一帧不同时重绘
+            draw: 绘制函数
+        """
+        self._frame.append((key, pygame.Rect(rect), signature, draw))
+
+    def add_blits(self, key: Hashable, blits: Sequence[Tuple], signature: Any):
+        """
+        登记由一组(表面, 位置)或(表面, 位置, 源区域)组成的区域，矩形为所有绘制区域的并集，重绘时一次提交全部blit
+        """
+        if not blits:
+            return
+        rects = [pygame.Rect(blit[1], (blit[2] if len(blit) > 2 else blit[0].get_rect()).size) for blit in blits]
+        self.add(key, rects[0].unionall(rects[1:]), signature, lambda screen: screen.blits(blits, doreturn=False))
+
+    def add_surface(self, key: Hashable, surface: pygame.Surface, pos: Tuple[int, int]):
+        """
+        登记一张表面，表面对象或位置变化时重绘
+
+        配合TextCache使用时，文字不变就返回同一个表面对象，因此不需要另外计算签名
+        """
+        rect = surface.get_rect(topleft=pos)
+        self.add(key, rect, (surface, rect.topleft), lambda screen: screen.blit(surface, rect))
+
+    def render(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        """
+        合成本帧登记的区域
+
+        Args:
+            screen: 屏幕表面
+
+        Returns:
+            需要更新到窗口的矩形列表
+        """
+        frame, self._frame = self._frame, []
+        if self.static_layer is None:
+            self.static_layer = pygame.Surface(screen.get_size(), 0, screen)
+            self.build_static_layer(self.static_layer)
+
+        if self.full_redraw:
+            damage = [screen.get_rect()]
+            self.full_redraw = False
+        else:
+            damage = []
+            for key, rect, signature, _ in frame:
+                previous = self._regions.pop(key, None)
+                if previous is None:
+                    damage.append(rect)
+                elif previous[0] != rect or previous[1] != signature:
+                    damage.append(previous[0])
+                    damage.append(rect)
+            # 本帧没有再登记的区域需要擦除
+            damage.extend(rect for rect, _ in self._regions.values())
+            damage = self._merge_rects(damage)
+        self._regions = {key: (rect, signature) for key, rect, signature, _ in frame}
+
+        for area in damage:
+            screen.set_clip(area)
+            screen.blit(self.static_layer, area, area)
+            for _, rect, _, draw in frame:
+                if rect.colliderect(area):
+                    draw(screen)
+        screen.set_clip(None)
+        return damage
+
+    @staticmethod
+    def _merge_rects(rects: List[pygame.Rect]) -> List[pygame.Rect]:
+        """合并相交的矩形，避免重叠部分重复绘制"""
+        merged: List[pygame.Rect] = []
+        for rect in rects:
+            rect = rect.copy()
+            i = 0
+            while i < len(merged):
+                if rect.colliderect(merged[i]):
+                    rect.union_ip(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+        return merged
@@ -80,6 +80,19 @@ class Panel:
         for button in self.buttons:
             button.handle_event(event)
 
+    def compose(self, compositor, key):
+        """
+        将面板背景和所有按钮登记到分层合成器
+
+        Args:
+            compositor (Compositor): 分层合成器
+            key: 面板的唯一标识，按钮的标识为(key, 序号)
+        """
+        if self.image:
+            compositor.add((key, 'image'), self.rect, self.image, lambda screen: screen.blit(self.image, self.rect))
+        for i, button in enumerate(self.buttons):
+            button.compose(compositor, (key, i))
+
     def render(self):
         """渲染面板和所有按钮"""
         screen = pygame.display.get_surface()
@@ -0,0 +1,74 @@
+import time
+import pygame
+from typing import Optional
+
+from data.config import GameConfig
+from tools.profiler import Profiler
+
+# 浮层中优先显示的主循环阶段，其余计时区间按名称排序显示在后面
+PHASES = ["frame", "input", "update", "render", "display"]
+
+
+class ProfilerOverlay:
+    """
+    性能分析浮层，显示帧率、帧耗时p50/p99和各计时区间的平均/最大耗时
+
+    数值每隔GameConfig.PROFILER_OVERLAY_REFRESH_MS毫秒重新绘制一次，其余帧只blit缓存的表面；
+    浮层显示或隐藏时需要场景整屏重绘（Scene.invalidate）
+    """
+
+    def __init__(self, x: int = 10, y: int = 10):
+        """
+        初始化浮层
+
+        Args:
+            x (int): 浮层X坐标
+            y (int): 浮层Y坐标
+        """
+        self.x = x
+        self.y = y
+        self.font = pygame.font.Font(None, 20)
+        self.surface: Optional[pygame.Surface] = None
+        self.last_refresh = 0.0
+
+    def _refresh(self, fps: float):
+        """重新绘制浮层表面"""
+        p50, p99 = Profiler().get_frame_percentiles(50, 99)
+        lines = [f"FPS {fps:5.1f}   frame p50 {p50:6.2f} ms   p99 {p99:6.2f} ms"]
+        stats = Profiler().get_stats()
+        names = [name for name in PHASES if name in stats] + sorted(name for name in stats if name not in PHASES)
+        for name in names:
+            average, maximum = stats[name]
+            lines.append(f"{name:<28} avg {average:6.2f} ms   max {maximum:6.2f} ms")
+
+        line_height = self.font.get_linesize()
+        texts = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(text.get_width() for text in texts) + 16
+        height = line_height * len(texts) + 12
+        # 浮层不透明且只会变大，每帧直接覆盖上一帧的浮层，不需要场景重绘下面的内容
+        if self.surface is not None:
+            width = max(width, self.surface.get_width())
+            height = max(height, self.surface.get_height())
+        self.surface = pygame.Surface((width, height))
+        self.surface.fill((0, 0, 0))
+        for i, text in enumerate(texts):
+            self.surface.blit(text, (8, 6 + i * line_height))
+
+    def render(self, screen: pygame.Surface, fps: float) -> Optional[pygame.Rect]:
+        """
+        绘制浮层
+
+        Args:
+            screen: 屏幕表面
+            fps (float): 当前帧率
+
+        Returns:
+            浮层的矩形，分析器关闭时返回None
+        """
+        if not Profiler.enabled:
+            return None
+        now = time.perf_counter()
+        if self.surface is None or (now - self.last_refresh) * 1000 >= GameConfig.PROFILER_OVERLAY_REFRESH_MS:
+            self.last_refresh = now
+            self._refresh(fps)
+        return screen.blit(self.surface, (self.x, self.y))